@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compare the size and encoding cost of batch wire formats.
+
+Encodes the same queued batch as JSON rows and as columnar JSON, each
+uncompressed, gzip and (if ``zstandard`` is installed) zstd. Run from the
+package root:
+
+    python -m benchmarks.batch_encoding --batch-size 1000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from metering.encoding import encode_batch
+
+
+def _batch(size: int, tenants: int) -> list:
+    """Build queued events the way EventQueue stores them."""
+    started = datetime.utcnow()
+    features = ["api_call", "pdf_export", "invoice_generate", "data_export"]
+    return [
+        {
+            "tenant_id": f"org_{random.randrange(tenants):04d}",
+            "resource": "billing",
+            "feature": random.choice(features),
+            "quantity": 1,
+            "metadata": {},
+            "timestamp": (started + timedelta(milliseconds=i * 7)).isoformat()
+        }
+        for i in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch wire format comparison")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    
+    events = _batch(args.batch_size, args.tenants)
+    results = {}
+    for batch_format in ("json", "columnar"):
+        for compression in ("none", "gzip", "zstd"):
+            body, headers = encode_batch(events, batch_format, compression)
+            if compression != "none" and headers.get("Content-Encoding") != compression:
+                continue  # zstandard not installed
+            
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                encode_batch(events, batch_format, compression)
+            elapsed = (time.perf_counter() - started) / args.rounds
+            
+            results[f"{batch_format}+{compression}"] = {
+                "bytes": len(body),
+                "bytes_per_event": round(len(body) / len(events), 1),
+                "encode_ms": round(elapsed * 1000, 3)
+            }
+    
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
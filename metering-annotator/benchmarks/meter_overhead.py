@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Measure the per-call overhead added by ``@meter``.
+
+Uses the batch transport so no network call is made on the measured path;
+the background sender is parked and the local queue is drained between
+rounds. Run from the package root:
+
+    python -m benchmarks.meter_overhead --calls 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# Park the batch sender so it never flushes during the measurement
+os.environ.setdefault("METERING_BATCH_INTERVAL_SECONDS", "3600")
+
+from metering import meter  # noqa: E402
+
+ROUND_SIZE = 5000
+
+
+def plain(tenant_id: str) -> int:
+    return 1
+
+
+sync_meter = meter(resource="bench", feature="plain", transport="batch")
+metered = sync_meter(plain)
+
+
+async def plain_async(tenant_id: str) -> int:
+    return 1
+
+
+async_meter = meter(resource="bench", feature="plain_async", transport="batch")
+metered_async = async_meter(plain_async)
+
+
+def _time_sync(func, calls: int, queue=None) -> float:
+    """Return nanoseconds per call, draining queue between rounds."""
+    total = 0.0
+    done = 0
+    while done < calls:
+        n = min(ROUND_SIZE, calls - done)
+        started = time.perf_counter_ns()
+        for _ in range(n):
+            func("org_001")
+        total += time.perf_counter_ns() - started
+        done += n
+        if queue:
+            queue.clear()
+    return total / calls
+
+
+def _time_async(func, calls: int, queue=None) -> float:
+    """Return nanoseconds per awaited call, draining queue between rounds."""
+    
+    async def run() -> float:
+        total = 0.0
+        done = 0
+        while done < calls:
+            n = min(ROUND_SIZE, calls - done)
+            started = time.perf_counter_ns()
+            for _ in range(n):
+                await func("org_001")
+            total += time.perf_counter_ns() - started
+            done += n
+            if queue:
+                queue.clear()
+        return total / calls
+    
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="@meter overhead microbenchmark")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    
+    baseline = _time_sync(plain, args.calls)
+    sync_ns = _time_sync(metered, args.calls, sync_meter.client.queue)
+    baseline_async = _time_async(plain_async, args.calls)
+    async_ns = _time_async(metered_async, args.calls, async_meter.client.queue)
+    
+    results = {
+        "calls": args.calls,
+        "sync": {
+            "baseline_ns": round(baseline, 1),
+            "metered_ns": round(sync_ns, 1),
+            "overhead_ns": round(sync_ns - baseline, 1)
+        },
+        "async": {
+            "baseline_ns": round(baseline_async, 1),
+            "metered_ns": round(async_ns, 1),
+            "overhead_ns": round(async_ns - baseline_async, 1)
+        }
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
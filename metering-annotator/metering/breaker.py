@@ -0,0 +1,46 @@
+"""Circuit breaker for calls to the metering API."""
+
+import threading
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    
+    Closed, calls go to the API. After failure_threshold failures in a row
+    it opens and callers skip the API until something (the client's
+    recovery thread) closes it again.
+    """
+    
+    def __init__(self, failure_threshold: int):
+        self.failure_threshold = max(1, failure_threshold)
+        self.failures = 0
+        self.open = False
+        self.lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Check whether calls may go to the API."""
+        return not self.open
+    
+    def record_success(self):
+        """Reset the failure count and close the breaker."""
+        with self.lock:
+            self.failures = 0
+            self.open = False
+    
+    def record_failure(self) -> bool:
+        """Count a failed call; returns True if this failure opened the breaker."""
+        with self.lock:
+            self.failures += 1
+            if self.open or self.failures < self.failure_threshold:
+                return False
+            self.open = True
+            return True
+    
+    def trip(self) -> bool:
+        """Open the breaker now; returns True if it was closed."""
+        with self.lock:
+            if self.open:
+                return False
+            self.open = True
+            return True
@@ -5,16 +5,54 @@ import aiohttp
 import asyncio
 import threading
 import time
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Optional, Dict, Any, List, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from metering.breaker import CircuitBreaker
 from metering.config import config
-from metering.queue import EventQueue
-from metering.exceptions import MeteringAPIError
+from metering.encoding import encode_batch
+from metering.queue import EventQueue, make_event
+from metering.transport import AsyncBatchTransport, LoopThread
+from metering.lease import QuotaEnforcer
+from metering.metrics import ClientMetrics
+from metering.exceptions import MeteringError, MeteringAPIError
+
+
+# Statuses the API's admission control answers with when it sheds load
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(status: int, headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds a throttled response asks the client to wait, or None."""
+    if status not in THROTTLE_STATUSES:
+        return None
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # The HTTP-date form
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
 
 
 class MeteringClient:
-    """HTTP client for Metering Service API."""
+    """
+    HTTP client for Metering Service API.
+    
+    Sync and async sends make one attempt and fall back to the local queue
+    on failure. After breaker_failure_threshold failures in a row the
+    circuit breaker opens and events go straight to the queue; a
+    background thread probes the API and, once it answers, closes the
+    breaker and drains the queue. Events queued by failures that did not
+    open the breaker are drained after the next successful send. Callers
+    never wait on retries. Events
+    the API rejects as invalid (4xx but 429) are dropped, not retried.
+    """
     
     def __init__(
         self,
@@ -26,8 +64,20 @@ class MeteringClient:
         self.api_key = api_key or config.api_key
         self.transport_mode = transport_mode or config.transport_mode
         self.queue = EventQueue()
+        self.metrics = ClientMetrics(self.queue)
+        self._quota_enforcer = None
         self._batch_thread = None
         self._running = False
+        # time.monotonic() before which background flushes do not run
+        self._resume_at = 0.0
+        self.breaker = CircuitBreaker(config.breaker_failure_threshold)
+        self._recovery_thread = None
+        self._recovery_lock = threading.Lock()
+        self._closed = threading.Event()
+        # Async transport: one per event loop, plus a loop thread for callers without one
+        self._transports: Dict[asyncio.AbstractEventLoop, AsyncBatchTransport] = {}
+        self._loop_thread = None
+        self._transport_lock = threading.Lock()
         
         if self.transport_mode == "batch":
             self._start_batch_worker()
@@ -42,10 +92,12 @@ class MeteringClient:
         def worker():
             while self._running:
                 try:
-                    batch = self.queue.get_batch(config.batch_size)
-                    if batch:
-                        self._send_batch_sync(batch)
-                    time.sleep(config.batch_interval_seconds)
+                    # While the breaker is open the recovery thread owns the queue
+                    if self.breaker.allow():
+                        batch = self.queue.get_batch(config.batch_size)
+                        if batch:
+                            self._send_batch_sync(batch)
+                    time.sleep(max(config.batch_interval_seconds, self._resume_at - time.monotonic()))
                 except Exception:
                     pass  # Log error in production
         
@@ -59,10 +111,93 @@ class MeteringClient:
             headers["X-API-Key"] = self.api_key
         return headers
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    def _throttled(self, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Note a Retry-After from the API and hold off background flushes until it passes."""
+        retry_after = parse_retry_after(status, headers)
+        if retry_after is not None:
+            self.metrics.record_throttled()
+            self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+        return retry_after
+    
+    def _rejected(self, status: int, count: int) -> bool:
+        """
+        Drop events the API refused as invalid, counting them.
+        
+        Any 4xx but 429 means the request itself is bad, so resending it
+        cannot succeed; the API answered, so it is not a failure either.
+        """
+        if not 400 <= status < 500 or status == 429:
+            return False
+        self.metrics.record_dropped(count)
+        self.breaker.record_success()
+        return True
+    
+    def _requeue(self, events: List[Dict[str, Any]]):
+        """Put serialized events back on the local queue, counting any that do not fit."""
+        requeued = self.queue.requeue(events)
+        self.metrics.record_requeued(requeued)
+        if requeued < len(events):
+            self.metrics.record_dropped(len(events) - requeued)
+    
+    def _enqueue(self, *args):
+        """Add an event to the local queue, counting it if dropped."""
+        try:
+            self.queue.add_event(*args)
+        except MeteringError:
+            self.metrics.record_dropped()
+            raise
+    
+    def _record_failure(self):
+        """Count a failed API call and start recovery if the breaker opened."""
+        if self.breaker.record_failure():
+            self.metrics.record_breaker_open()
+            self._start_recovery()
+    
+    def _record_success(self):
+        """Close the breaker and send events that earlier failures left queued."""
+        self.breaker.record_success()
+        # Failures below the breaker threshold queue events without opening it;
+        # the batch worker drains its own queue
+        if self.transport_mode != "batch" and self.queue.size():
+            self._start_recovery()
+    
+    def _start_recovery(self):
+        """Start the thread that probes the API while the breaker is open and drains the queue."""
+        with self._recovery_lock:
+            if self._recovery_thread and self._recovery_thread.is_alive():
+                return
+            self._recovery_thread = threading.Thread(target=self._recover, daemon=True)
+            self._recovery_thread.start()
+    
+    def _recover(self):
+        """Probe until the API answers, then drain the local queue."""
+        while not self._closed.is_set():
+            if not self.breaker.allow():
+                delay = max(config.breaker_probe_interval_seconds, self._resume_at - time.monotonic())
+                if self._closed.wait(delay):
+                    return
+                if not self._probe():
+                    continue
+                self.breaker.record_success()
+            
+            # The batch worker drains its own queue once the breaker closes
+            if self.transport_mode == "batch":
+                return
+            batch = self.queue.get_batch(config.batch_size)
+            if not batch:
+                return
+            self.metrics.record_retry()
+            if not self._send_batch_sync(batch) and self.breaker.trip():
+                self.metrics.record_breaker_open()
+    
+    def _probe(self) -> bool:
+        """Check whether the API answers its health endpoint."""
+        try:
+            response = requests.get(f"{self.api_url}/v1/meter/health", timeout=config.timeout)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
     def record_event_sync(
         self,
         tenant_id: str,
@@ -72,7 +207,17 @@ class MeteringClient:
         metadata: Optional[Dict[str, Any]] = None,
         timestamp: Optional[datetime] = None
     ) -> bool:
-        """Record event synchronously."""
+        """
+        Record event synchronously.
+        
+        Returns False without calling the API while the breaker is open;
+        the event is queued and sent once the API recovers.
+        """
+        if not self.breaker.allow():
+            self._enqueue(tenant_id, resource, feature, quantity, metadata, timestamp)
+            return False
+        
+        retry_after = None
         try:
             payload = {
                 "tenant_id": tenant_id,
@@ -90,12 +235,20 @@ class MeteringClient:
                 headers=self._get_headers(),
                 timeout=config.timeout
             )
+            retry_after = self._throttled(response.status_code, response.headers)
+            if self._rejected(response.status_code, 1):
+                raise MeteringAPIError(f"Event rejected: {response.status_code} {response.text}")
             response.raise_for_status()
+            self._record_success()
+            self.metrics.record_sent()
             return True
+        except MeteringAPIError:
+            raise
         except Exception as e:
             # Fallback to local queue
-            self.queue.add_event(tenant_id, resource, feature, quantity, metadata, timestamp)
-            raise MeteringAPIError(f"Failed to record event: {str(e)}")
+            self._record_failure()
+            self._enqueue(tenant_id, resource, feature, quantity, metadata, timestamp)
+            raise MeteringAPIError(f"Failed to record event: {str(e)}", retry_after)
     
     async def record_event_async(
         self,
@@ -106,7 +259,12 @@ class MeteringClient:
         metadata: Optional[Dict[str, Any]] = None,
         timestamp: Optional[datetime] = None
     ) -> bool:
-        """Record event asynchronously."""
+        """Record event asynchronously; queued without calling the API while the breaker is open."""
+        if not self.breaker.allow():
+            self._enqueue(tenant_id, resource, feature, quantity, metadata, timestamp)
+            return False
+        
+        retry_after = None
         try:
             payload = {
                 "tenant_id": tenant_id,
@@ -125,27 +283,117 @@ class MeteringClient:
                     headers=self._get_headers(),
                     timeout=aiohttp.ClientTimeout(total=config.timeout)
                 ) as response:
+                    retry_after = self._throttled(response.status, response.headers)
+                    if self._rejected(response.status, 1):
+                        raise MeteringAPIError(f"Event rejected: {response.status} {await response.text()}")
                     response.raise_for_status()
+                    self._record_success()
+                    self.metrics.record_sent()
                     return True
+        except MeteringAPIError:
+            raise
         except Exception as e:
             # Fallback to local queue
-            self.queue.add_event(tenant_id, resource, feature, quantity, metadata, timestamp)
-            raise MeteringAPIError(f"Failed to record event: {str(e)}")
+            self._record_failure()
+            self._enqueue(tenant_id, resource, feature, quantity, metadata, timestamp)
+            raise MeteringAPIError(f"Failed to record event: {str(e)}", retry_after)
     
-    def _send_batch_sync(self, events: List[Dict[str, Any]]):
-        """Send batch of events synchronously."""
+    def _send_batch_sync(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Send batch of events synchronously.
+        
+        Batches that fail on a transport error, 5xx or 429 are re-queued and
+        False is returned; batches the API rejects as invalid are dropped.
+        """
+        started = time.perf_counter()
         try:
+            body, encoding_headers = encode_batch(events, config.batch_format, config.compression)
             response = requests.post(
                 f"{self.api_url}/v1/meter/events/batch",
-                json={"events": events},
-                headers=self._get_headers(),
+                data=body,
+                headers={**self._get_headers(), **encoding_headers},
                 timeout=config.timeout * 2
             )
+            # A throttled batch is re-queued below and the worker waits out Retry-After
+            self._throttled(response.status_code, response.headers)
+            if self._rejected(response.status_code, len(events)):
+                self.metrics.record_flush(len(events), time.perf_counter() - started, False)
+                return True
             response.raise_for_status()
         except Exception:
-            # Re-queue events on failure
-            for event in events:
-                self.queue.add_event(**event)
+            self._record_failure()
+            self.metrics.record_flush(len(events), time.perf_counter() - started, False)
+            self._requeue(events)
+            return False
+        self.breaker.record_success()
+        self.metrics.record_flush(len(events), time.perf_counter() - started, True)
+        return True
+    
+    def acquire_lease(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        requested: int,
+        ttl_seconds: int
+    ) -> Dict[str, Any]:
+        """Lease a slice of remaining quota from the server."""
+        response = requests.post(
+            f"{self.api_url}/v1/meter/leases",
+            json={
+                "tenant_id": tenant_id,
+                "resource": resource,
+                "feature": feature,
+                "period": period,
+                "requested": requested,
+                "ttl_seconds": ttl_seconds
+            },
+            headers=self._get_headers(),
+            timeout=config.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def release_lease(
+        self,
+        lease_id: str,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str
+    ):
+        """Return the unused part of a lease to the server."""
+        response = requests.post(
+            f"{self.api_url}/v1/meter/leases/release",
+            json={
+                "lease_id": lease_id,
+                "tenant_id": tenant_id,
+                "resource": resource,
+                "feature": feature,
+                "period": period
+            },
+            headers=self._get_headers(),
+            timeout=config.timeout
+        )
+        response.raise_for_status()
+    
+    @property
+    def quota_enforcer(self) -> QuotaEnforcer:
+        """Lease-backed local quota enforcer, created on first use."""
+        if self._quota_enforcer is None:
+            self._quota_enforcer = QuotaEnforcer(self)
+        return self._quota_enforcer
+    
+    def check_quota(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        quantity: int = 1
+    ) -> bool:
+        """Check and consume quota locally using leases."""
+        return self.quota_enforcer.check(tenant_id, resource, feature, quantity)
     
     def record_event(
         self,
@@ -160,20 +408,68 @@ class MeteringClient:
         if self.transport_mode == "sync":
             return self.record_event_sync(tenant_id, resource, feature, quantity, metadata, timestamp)
         elif self.transport_mode == "async":
-            # Fire and forget
-            asyncio.create_task(
-                self.record_event_async(tenant_id, resource, feature, quantity, metadata, timestamp)
-            )
+            self._submit(make_event(tenant_id, resource, feature, quantity, metadata, timestamp))
             return True
         elif self.transport_mode == "batch":
-            self.queue.add_event(tenant_id, resource, feature, quantity, metadata, timestamp)
+            self._enqueue(tenant_id, resource, feature, quantity, metadata, timestamp)
             return True
         else:
             raise MeteringAPIError(f"Unknown transport mode: {self.transport_mode}")
     
+    def _submit(self, event: Dict[str, Any]):
+        """Hand an event to the async transport of the running loop, or of the loop thread."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is not None:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = AsyncBatchTransport(self)
+                # Forget transports of loops that are gone
+                for other in [other for other in self._transports if other.is_closed()]:
+                    del self._transports[other]
+            transport.submit(event)
+            return
+        
+        with self._transport_lock:
+            if self._loop_thread is None:
+                self._loop_thread = LoopThread()
+                self._transports[self._loop_thread.loop] = self._loop_thread.run(self._open_transport())
+            transport = self._transports[self._loop_thread.loop]
+        self._loop_thread.call(transport.submit, event)
+    
+    async def _open_transport(self) -> AsyncBatchTransport:
+        return AsyncBatchTransport(self)
+    
+    async def aclose(self):
+        """Flush the async transport of the running loop, then close the client."""
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport:
+            await transport.aclose()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+    
     def close(self):
-        """Close client and cleanup."""
+        """
+        Close client and cleanup.
+        
+        Flushes the loop thread's async transport. Transports on other
+        loops are flushed by aclose() on their loop; events they still
+        hold when their loop shuts down go to the local queue.
+        """
         self._running = False
+        self._closed.set()
+        if self._loop_thread:
+            transport = self._transports.pop(self._loop_thread.loop, None)
+            if transport:
+                self._loop_thread.run(transport.aclose(), timeout=config.timeout * 2)
+            self._loop_thread.stop()
+            self._loop_thread = None
         if self._batch_thread:
             self._batch_thread.join(timeout=5)
+        if self._recovery_thread:
+            self._recovery_thread.join(timeout=5)
+        if self._quota_enforcer:
+            self._quota_enforcer.close()
 
@@ -13,8 +13,18 @@ class Config:
         self.transport_mode = os.getenv("METERING_TRANSPORT_MODE", "async")
         self.batch_size = int(os.getenv("METERING_BATCH_SIZE", "100"))
         self.batch_interval_seconds = int(os.getenv("METERING_BATCH_INTERVAL_SECONDS", "5"))
+        # Async transport: a batch is sent when full or this long after its first event
+        self.async_flush_interval_ms = int(os.getenv("METERING_ASYNC_FLUSH_INTERVAL_MS", "200"))
+        self.async_max_in_flight = int(os.getenv("METERING_ASYNC_MAX_IN_FLIGHT", "4"))
+        self.async_queue_size = int(os.getenv("METERING_ASYNC_QUEUE_SIZE", "10000"))
+        self.batch_format = os.getenv("METERING_BATCH_FORMAT", "columnar")  # columnar or json
+        self.compression = os.getenv("METERING_COMPRESSION", "gzip")  # gzip, zstd or none
         self.retry_max_attempts = int(os.getenv("METERING_RETRY_MAX_ATTEMPTS", "3"))
         self.timeout = int(os.getenv("METERING_TIMEOUT", "5"))
+        self.breaker_failure_threshold = int(os.getenv("METERING_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.breaker_probe_interval_seconds = int(os.getenv("METERING_BREAKER_PROBE_INTERVAL_SECONDS", "5"))
+        self.lease_size = int(os.getenv("METERING_LEASE_SIZE", "100"))
+        self.lease_ttl_seconds = int(os.getenv("METERING_LEASE_TTL_SECONDS", "30"))
 
 
 config = Config()
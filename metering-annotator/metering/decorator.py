@@ -5,6 +5,8 @@ import inspect
 from typing import Callable, Optional, Dict, Any
 from metering.client import MeteringClient
 from metering.config import config
+from metering.exceptions import QuotaExceededError
+from metering.sampling import SAMPLE_RATE_KEY, make_sampler
 
 
 class Meter:
@@ -17,7 +19,10 @@ class Meter:
         quantity: int = 1,
         tenant_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-        transport: Optional[str] = None
+        transport: Optional[str] = None,
+        enforce_quota: bool = False,
+        sample_every: Optional[int] = None,
+        sample_target_per_second: Optional[float] = None
     ):
         self.resource = resource
         self.feature = feature
@@ -25,6 +30,8 @@ class Meter:
         self.tenant_id = tenant_id
         self.metadata = metadata or {}
         self.transport = transport or config.transport_mode
+        self.enforce_quota = enforce_quota
+        self.sampler = make_sampler(sample_every, sample_target_per_second)
         self.client = MeteringClient(transport_mode=self.transport)
     
     def _extract_tenant_id(self, args, kwargs, func) -> Optional[str]:
@@ -57,8 +64,33 @@ class Meter:
         
         return None
     
+    def _check_quota(self, args, kwargs, func):
+        """Enforce quota locally before the function runs."""
+        if not self.enforce_quota:
+            return
+        tenant_id = self._extract_tenant_id(args, kwargs, func) or "unknown"
+        if not self.client.check_quota(tenant_id, self.resource, self.feature, self.quantity):
+            raise QuotaExceededError(
+                f"Quota exceeded for feature '{self.feature}' (tenant '{tenant_id}')"
+            )
+    
+    def _sample(self) -> Optional[tuple]:
+        """Quantity and metadata to record for this call, or None to skip it."""
+        if self.sampler is None:
+            return self.quantity, self.metadata
+        weight = self.sampler.sample()
+        if not weight:
+            return None
+        if weight == 1:
+            return self.quantity, self.metadata
+        return self.quantity * weight, {**self.metadata, SAMPLE_RATE_KEY: 1 / weight}
+    
     def _record_event(self, result, args, kwargs, func):
         """Record event synchronously."""
+        sampled = self._sample()
+        if sampled is None:
+            return
+        quantity, metadata = sampled
         tenant_id = self._extract_tenant_id(args, kwargs, func) or "unknown"
         
         try:
@@ -66,24 +98,38 @@ class Meter:
                 tenant_id=tenant_id,
                 resource=self.resource,
                 feature=self.feature,
-                quantity=self.quantity,
-                metadata=self.metadata
+                quantity=quantity,
+                metadata=metadata
             )
         except Exception:
             pass  # Don't fail the function if metering fails
     
     async def _record_event_async(self, result, args, kwargs, func):
         """Record event asynchronously."""
+        sampled = self._sample()
+        if sampled is None:
+            return
+        quantity, metadata = sampled
         tenant_id = self._extract_tenant_id(args, kwargs, func) or "unknown"
         
         try:
-            await self.client.record_event_async(
-                tenant_id=tenant_id,
-                resource=self.resource,
-                feature=self.feature,
-                quantity=self.quantity,
-                metadata=self.metadata
-            )
+            if self.client.transport_mode == "sync":
+                await self.client.record_event_async(
+                    tenant_id=tenant_id,
+                    resource=self.resource,
+                    feature=self.feature,
+                    quantity=quantity,
+                    metadata=metadata
+                )
+            else:
+                # Queued for a batch; never waits on the network
+                self.client.record_event(
+                    tenant_id=tenant_id,
+                    resource=self.resource,
+                    feature=self.feature,
+                    quantity=quantity,
+                    metadata=metadata
+                )
         except Exception:
             pass  # Don't fail the function if metering fails
     
@@ -92,6 +138,7 @@ class Meter:
         if inspect.iscoroutinefunction(func):
             @functools.wraps(func)
             async def async_wrapper(*args, **kwargs):
+                self._check_quota(args, kwargs, func)
                 result = await func(*args, **kwargs)
                 await self._record_event_async(result, args, kwargs, func)
                 return result
@@ -99,6 +146,7 @@ class Meter:
         else:
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
+                self._check_quota(args, kwargs, func)
                 result = func(*args, **kwargs)
                 self._record_event(result, args, kwargs, func)
                 return result
@@ -111,15 +159,38 @@ def meter(
     quantity: int = 1,
     tenant_id: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-    transport: Optional[str] = None
+    transport: Optional[str] = None,
+    enforce_quota: bool = False,
+    sample_every: Optional[int] = None,
+    sample_target_per_second: Optional[float] = None
 ):
     """
     Decorator for metering function calls.
     
+    With enforce_quota=True the call is checked against a locally leased
+    slice of the tenant's quota and QuotaExceededError is raised when it is
+    used up.
+    
+    For very frequent, non-billing features, sample_every=N records about
+    one call in N with its quantity scaled by N, and
+    sample_target_per_second records about that many calls per second
+    whatever the call rate. Sampled events carry their sample rate in
+    metadata; aggregates report the resulting estimated error.
+    
     Usage:
         @meter(resource="billing", feature="invoice_generate")
         def generate_invoice(order_id):
             ...
     """
-    return Meter(resource, feature, quantity, tenant_id, metadata, transport)
+    return Meter(
+        resource,
+        feature,
+        quantity,
+        tenant_id,
+        metadata,
+        transport,
+        enforce_quota,
+        sample_every,
+        sample_target_per_second
+    )
 
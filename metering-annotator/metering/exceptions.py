@@ -1,5 +1,7 @@
 """Custom exceptions for Metering Annotator."""
 
+from typing import Optional
+
 
 class MeteringError(Exception):
     """Base exception for metering annotator."""
@@ -8,10 +10,19 @@ class MeteringError(Exception):
 
 class MeteringAPIError(MeteringError):
     """Raised when API call fails."""
-    pass
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Seconds the server asked to wait (Retry-After on 429/503), if any
+        self.retry_after = retry_after
 
 
 class MeteringConfigError(MeteringError):
     """Raised when configuration is invalid."""
     pass
 
+
+
+class QuotaExceededError(MeteringError):
+    """Raised when a locally enforced quota has no units left."""
+    pass
@@ -0,0 +1,159 @@
+"""Local quota enforcement backed by server-issued leases."""
+
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+from metering.config import config
+
+# Leases are treated as expired this many seconds before the server does
+EXPIRY_MARGIN_SECONDS = 1.0
+
+# How long a denied lease (nothing granted) is remembered before asking again
+DENIAL_BACKOFF_SECONDS = 1.0
+
+
+class LeaseBucket:
+    """Token bucket holding the units granted by one quota lease."""
+    
+    def __init__(self, key: Tuple[str, str, str], lease: Dict[str, Any]):
+        self.key = key
+        self.lease_id = lease["lease_id"]
+        self.period = lease["period"]
+        self.unlimited = lease.get("unlimited", False)
+        self.tokens = lease["granted"]
+        self.denied = not self.unlimited and self.tokens == 0
+        
+        ttl = lease["ttl_seconds"]
+        if self.denied:
+            ttl = min(ttl, DENIAL_BACKOFF_SECONDS + EXPIRY_MARGIN_SECONDS)
+        self.expires_at = time.monotonic() + max(0.0, ttl - EXPIRY_MARGIN_SECONDS)
+    
+    def expired(self, now: float) -> bool:
+        """Check whether the lease may no longer be used."""
+        return now >= self.expires_at
+    
+    def try_consume(self, quantity: int) -> bool:
+        """Take quantity tokens if available."""
+        if self.unlimited:
+            return True
+        if self.tokens >= quantity:
+            self.tokens -= quantity
+            return True
+        return False
+
+
+class QuotaEnforcer:
+    """
+    Enforce quotas in-process using leases.
+    
+    Each (tenant, resource, feature) holds a lease on a slice of the
+    remaining quota; checks consume tokens from it without a network call.
+    When the slice is used up or expires it is returned to the server and a
+    new one is leased. If the API cannot be reached, checks fail open.
+    
+    Only one lease request per key is in flight at a time and it is made
+    without holding the key's lock; concurrent checks wait for it up to the
+    client timeout and then fail open.
+    """
+    
+    def __init__(
+        self,
+        client,
+        lease_size: Optional[int] = None,
+        lease_ttl_seconds: Optional[int] = None,
+        period: str = "monthly"
+    ):
+        self.client = client
+        self.lease_size = lease_size or config.lease_size
+        self.lease_ttl_seconds = lease_ttl_seconds or config.lease_ttl_seconds
+        self.period = period
+        self._buckets: Dict[Tuple[str, str, str], LeaseBucket] = {}
+        self._locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        # Keys with a lease request in flight; other checks wait on the event
+        self._refills: Dict[Tuple[str, str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+    
+    def _key_lock(self, key: Tuple[str, str, str]) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+    
+    def check(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        quantity: int = 1
+    ) -> bool:
+        """Consume quantity units of quota; returns False if none are left."""
+        key = (tenant_id, resource, feature)
+        waited = False
+        
+        while True:
+            with self._key_lock(key):
+                bucket = self._buckets.get(key)
+                if bucket and not bucket.expired(time.monotonic()):
+                    if bucket.try_consume(quantity):
+                        return True
+                    if bucket.denied:
+                        return False
+                elif waited and bucket is None:
+                    return True  # The refill we waited on failed open
+                
+                refill = self._refills.get(key)
+                if refill is None:
+                    refill = self._refills[key] = threading.Event()
+                    self._buckets.pop(key, None)
+                    break
+            
+            # Another thread is leasing for this key; wait for it outside the lock
+            if not refill.wait(config.timeout):
+                return True  # Fail open rather than queue behind a slow lease
+            waited = True
+        
+        bucket = self._refill(key, bucket, quantity)
+        with self._key_lock(key):
+            if bucket:
+                self._buckets[key] = bucket
+            del self._refills[key]
+            refill.set()
+            return bucket is None or bucket.try_consume(quantity)
+    
+    def _refill(
+        self,
+        key: Tuple[str, str, str],
+        stale: Optional[LeaseBucket],
+        quantity: int
+    ) -> Optional[LeaseBucket]:
+        """Return the stale lease and lease a new slice; None if the API is unavailable."""
+        if stale:
+            self._release(stale)
+        try:
+            lease = self.client.acquire_lease(
+                *key,
+                self.period,
+                max(self.lease_size, quantity),
+                self.lease_ttl_seconds
+            )
+        except Exception:
+            return None  # Fail open if the metering API is unavailable
+        return LeaseBucket(key, lease)
+    
+    def _release(self, bucket: LeaseBucket):
+        """Return a lease's reservation to the server."""
+        if bucket.unlimited or bucket.denied:
+            return  # Nothing is reserved server-side
+        try:
+            self.client.release_lease(bucket.lease_id, *bucket.key, bucket.period)
+        except Exception:
+            pass  # The reservation expires server-side anyway
+    
+    def close(self):
+        """Return all open leases."""
+        with self._lock:
+            buckets = list(self._buckets.values())
+            self._buckets.clear()
+        for bucket in buckets:
+            self._release(bucket)
@@ -0,0 +1,122 @@
+"""Client-side delivery metrics."""
+
+import threading
+from typing import Dict, Any
+from metering.queue import EventQueue
+
+
+class ClientMetrics:
+    """Thread-safe counters for event delivery from one MeteringClient."""
+    
+    def __init__(self, queue: EventQueue):
+        self.queue = queue
+        self.lock = threading.Lock()
+        self.events_sent = 0
+        self.events_requeued = 0
+        self.events_dropped = 0
+        self.retries = 0
+        self.throttled = 0
+        self.breaker_opens = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_seconds = 0.0
+    
+    def record_flush(self, size: int, elapsed: float, success: bool):
+        """Record one batch flush to the API."""
+        with self.lock:
+            self.flushes += 1
+            self.flush_seconds_total += elapsed
+            self.last_flush_seconds = elapsed
+            if success:
+                self.events_sent += size
+            else:
+                self.failed_flushes += 1
+    
+    def record_sent(self, count: int = 1):
+        """Record events delivered outside a batch flush."""
+        with self.lock:
+            self.events_sent += count
+    
+    def record_requeued(self, count: int):
+        """Record events put back on the local queue after a failure."""
+        with self.lock:
+            self.events_requeued += count
+    
+    def record_dropped(self, count: int = 1):
+        """Record events lost because the local queue was full or the API rejected them."""
+        with self.lock:
+            self.events_dropped += count
+    
+    def record_retry(self):
+        """Record one retried API call."""
+        with self.lock:
+            self.retries += 1
+    
+    def record_throttled(self):
+        """Record one API response asking the client to back off."""
+        with self.lock:
+            self.throttled += 1
+    
+    def record_breaker_open(self):
+        """Record the circuit breaker opening."""
+        with self.lock:
+            self.breaker_opens += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a consistent copy of all counters."""
+        with self.lock:
+            return {
+                "queue_depth": self.queue.size(),
+                "events_sent": self.events_sent,
+                "events_requeued": self.events_requeued,
+                "events_dropped": self.events_dropped,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "breaker_opens": self.breaker_opens,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "flush_seconds_total": self.flush_seconds_total,
+                "last_flush_seconds": self.last_flush_seconds
+            }
+    
+    def register_prometheus(self, registry=None, prefix: str = "metering_client"):
+        """
+        Expose the counters through prometheus_client.
+        
+        Requires the ``prometheus`` extra. Registers into the default
+        registry unless one is given.
+        """
+        from prometheus_client import REGISTRY
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+        
+        metrics = self
+        
+        class _Collector:
+            def collect(self):
+                snapshot = metrics.snapshot()
+                yield GaugeMetricFamily(
+                    f"{prefix}_queue_depth",
+                    "Events waiting in the local queue",
+                    value=snapshot["queue_depth"]
+                )
+                for name, help_text in (
+                    ("events_sent", "Events delivered to the API"),
+                    ("events_requeued", "Events re-queued after a failed flush"),
+                    ("events_dropped", "Events dropped because the local queue was full"),
+                    ("retries", "Retried API calls"),
+                    ("throttled", "API responses asking the client to back off (429/503 Retry-After)"),
+                    ("breaker_opens", "Times the circuit breaker opened and sends fell back to the local queue"),
+                    ("flushes", "Batch flushes attempted"),
+                    ("failed_flushes", "Batch flushes that failed")
+                ):
+                    yield CounterMetricFamily(f"{prefix}_{name}", help_text, value=snapshot[name])
+                yield CounterMetricFamily(
+                    f"{prefix}_flush_seconds",
+                    "Time spent flushing batches",
+                    value=snapshot["flush_seconds_total"]
+                )
+        
+        collector = _Collector()
+        (registry or REGISTRY).register(collector)
+        return collector
@@ -1,18 +1,28 @@
 """Middleware for FastAPI/Flask/Starlette."""
 
-from typing import Callable
+from typing import Callable, Optional
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from metering.client import MeteringClient
 from metering.config import config
+from metering.sampling import SAMPLE_RATE_KEY, make_sampler
 
 
 class MeteringMiddleware(BaseHTTPMiddleware):
     """FastAPI middleware for automatic API metering."""
     
-    def __init__(self, app, api_url: str = None, api_key: str = None):
+    def __init__(
+        self,
+        app,
+        api_url: str = None,
+        api_key: str = None,
+        sample_every: Optional[int] = None,
+        sample_target_per_second: Optional[float] = None
+    ):
         super().__init__(app)
         self.client = MeteringClient(api_url=api_url, api_key=api_key)
+        # Shared by all routes; see meter() for the sampling options
+        self.sampler = make_sampler(sample_every, sample_target_per_second)
     
     def _extract_tenant_id(self, request: Request) -> str:
         """Extract tenant_id from request."""
@@ -53,17 +63,30 @@ class MeteringMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         
         # Record event if successful
-        if response.status_code < 400:
+        weight = self.sampler.sample() if self.sampler else 1
+        if response.status_code < 400 and weight:
             tenant_id = self._extract_tenant_id(request)
             resource, feature = self._extract_resource_feature(request)
+            metadata = {SAMPLE_RATE_KEY: 1 / weight} if weight > 1 else None
             
             try:
-                await self.client.record_event_async(
-                    tenant_id=tenant_id,
-                    resource=resource,
-                    feature=feature,
-                    quantity=1
-                )
+                if self.client.transport_mode == "sync":
+                    await self.client.record_event_async(
+                        tenant_id=tenant_id,
+                        resource=resource,
+                        feature=feature,
+                        quantity=weight,
+                        metadata=metadata
+                    )
+                else:
+                    # Queued for a batch; never waits on the network
+                    self.client.record_event(
+                        tenant_id=tenant_id,
+                        resource=resource,
+                        feature=feature,
+                        quantity=weight,
+                        metadata=metadata
+                    )
             except Exception:
                 pass  # Don't fail request if metering fails
         
@@ -8,6 +8,25 @@ from collections import deque
 from metering.exceptions import MeteringError
 
 
+def make_event(
+    tenant_id: str,
+    resource: str,
+    feature: str,
+    quantity: int = 1,
+    metadata: Dict[str, Any] = None,
+    timestamp: datetime = None
+) -> Dict[str, Any]:
+    """Serialize an event the way batches send it."""
+    return {
+        "tenant_id": tenant_id,
+        "resource": resource,
+        "feature": feature,
+        "quantity": quantity,
+        "metadata": metadata or {},
+        "timestamp": timestamp.isoformat() if timestamp else datetime.utcnow().isoformat()
+    }
+
+
 class EventQueue:
     """Thread-safe in-memory event queue."""
     
@@ -30,15 +49,14 @@ class EventQueue:
             if len(self.queue) >= self.max_size:
                 raise MeteringError("Event queue is full")
             
-            event = {
-                "tenant_id": tenant_id,
-                "resource": resource,
-                "feature": feature,
-                "quantity": quantity,
-                "metadata": metadata or {},
-                "timestamp": timestamp.isoformat() if timestamp else datetime.utcnow().isoformat()
-            }
-            self.queue.append(event)
+            self.queue.append(make_event(tenant_id, resource, feature, quantity, metadata, timestamp))
+    
+    def requeue(self, events: List[Dict[str, Any]]) -> int:
+        """Put already-serialized events back; returns how many fit."""
+        with self.lock:
+            accepted = min(len(events), self.max_size - len(self.queue))
+            self.queue.extend(events[:accepted])
+            return accepted
     
     def get_batch(self, size: int) -> List[Dict[str, Any]]:
         """Get a batch of events from queue."""
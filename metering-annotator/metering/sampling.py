@@ -0,0 +1,94 @@
+"""Call sampling for high-frequency metering."""
+
+import itertools
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from metering.exceptions import MeteringConfigError
+
+# Event metadata key carrying the probability a call was recorded with; the
+# server derives the estimated error of aggregates from it
+SAMPLE_RATE_KEY = "sample_rate"
+
+
+class Sampler(ABC):
+    """Decides which calls are recorded and how many calls each one stands for."""
+    
+    @abstractmethod
+    def sample(self) -> int:
+        """Return 0 to skip this call, otherwise the weight N to scale its quantity by."""
+
+
+class FixedSampler(Sampler):
+    """Record each call with probability 1/every, weighted by every."""
+    
+    def __init__(self, every: int):
+        if every < 1:
+            raise MeteringConfigError("sample_every must be at least 1")
+        self.every = every
+    
+    def sample(self) -> int:
+        if self.every == 1 or random.random() * self.every < 1:
+            return self.every
+        return 0
+
+
+class AdaptiveSampler(Sampler):
+    """
+    Record about target_per_second calls per second, whatever the call rate.
+    
+    The call rate is measured over window_seconds windows and sets the 1-in-N
+    rate of the next window, so weights stay whole numbers and each recorded
+    call is an unbiased estimate of the calls it stands for.
+    """
+    
+    def __init__(self, target_per_second: float, window_seconds: float = 1.0):
+        if target_per_second <= 0:
+            raise MeteringConfigError("sample_target_per_second must be positive")
+        self.target_per_second = target_per_second
+        self.window_seconds = window_seconds
+        self.every = 1
+        # next() on itertools.count is atomic, so concurrent callers each get
+        # their own call number without taking the lock
+        self.calls = itertools.count(1)
+        self.window_first_call = 1
+        self.window_started = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def sample(self) -> int:
+        call = next(self.calls)
+        now = time.monotonic()
+        if now - self.window_started >= self.window_seconds:
+            self._adjust(call, now)
+        every = self.every
+        if every == 1 or random.random() * every < 1:
+            return every
+        return 0
+    
+    def _adjust(self, call: int, now: float):
+        """Set the next window's rate from the calls seen in the last one."""
+        with self.lock:
+            elapsed = now - self.window_started
+            if elapsed < self.window_seconds:
+                return  # Another thread already started the next window
+            rate = (call - self.window_first_call) / elapsed
+            self.every = max(1, math.ceil(rate / self.target_per_second))
+            self.window_first_call = call
+            self.window_started = now
+
+
+def make_sampler(
+    sample_every: Optional[int] = None,
+    sample_target_per_second: Optional[float] = None
+) -> Optional[Sampler]:
+    """Build the sampler for @meter or MeteringMiddleware options (None records every call)."""
+    if sample_every is not None and sample_target_per_second is not None:
+        raise MeteringConfigError("Use either sample_every or sample_target_per_second, not both")
+    if sample_target_per_second is not None:
+        return AdaptiveSampler(sample_target_per_second)
+    if sample_every is not None and sample_every != 1:
+        return FixedSampler(sample_every)
+    return None
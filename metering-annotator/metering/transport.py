@@ -0,0 +1,176 @@
+"""Asyncio batching transport for MeteringClient."""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+import aiohttp
+from metering.config import config
+from metering.encoding import encode_batch
+
+
+class AsyncBatchTransport:
+    """
+    Batches events on one event loop and sends them from a single task.
+    
+    Events go on an asyncio.Queue without waiting. The sender task takes a
+    batch once batch_size events are queued or async_flush_interval_ms
+    after the first one, and posts it to /events/batch with at most
+    async_max_in_flight requests outstanding over one long-lived session.
+    After a 429/503 with Retry-After, no batch is sent until it has passed.
+    Failed batches, and events left when the loop shuts down without
+    aclose(), go to the client's local queue.
+    
+    Must be created on the loop it serves.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.async_queue_size)
+        self.ready = asyncio.Event()
+        self.slots = asyncio.Semaphore(max(1, config.async_max_in_flight))
+        self.in_flight: Set[asyncio.Task] = set()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.closing = False
+        self.sender = self.loop.create_task(self._run())
+    
+    def submit(self, event: Dict[str, Any]):
+        """Queue a serialized event; falls back to the client's local queue when full."""
+        if self.closing or not self.client.breaker.allow():
+            self.client._requeue([event])
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.client._requeue([event])
+            return
+        if self.queue.qsize() >= config.batch_size:
+            self.ready.set()
+    
+    async def _run(self):
+        """Collect batches by size and deadline and hand them to senders."""
+        events = []
+        try:
+            while not (self.closing and self.queue.empty()):
+                first = await self.queue.get()
+                if first is None:
+                    continue  # Woken by aclose()
+                events = [first]
+                if not self.closing and self.queue.qsize() < config.batch_size - 1:
+                    self.ready.clear()
+                    try:
+                        await asyncio.wait_for(self.ready.wait(), config.async_flush_interval_ms / 1000)
+                    except asyncio.TimeoutError:
+                        pass
+                events.extend(self._take(config.batch_size - 1))
+                if len(events) < config.batch_size and self.client.breaker.allow():
+                    # Top up with events an earlier failure left on the local queue
+                    events.extend(self.client.queue.get_batch(config.batch_size - len(events)))
+                await self._wait_out_throttle()
+                await self._dispatch(events)
+                events = []
+            if self.in_flight:
+                await asyncio.gather(*self.in_flight)
+        except asyncio.CancelledError:
+            # The loop is shutting down without aclose(); keep the events
+            self.client._requeue(events + self._take(self.queue.qsize()))
+            raise
+    
+    def _take(self, count: int) -> List[Dict[str, Any]]:
+        """Take up to count queued events without waiting."""
+        events = []
+        while len(events) < count and not self.queue.empty():
+            event = self.queue.get_nowait()
+            if event is not None:
+                events.append(event)
+        return events
+    
+    async def _wait_out_throttle(self):
+        """Hold the next batch until a Retry-After from the API has passed."""
+        delay = self.client._resume_at - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            # A response that arrived meanwhile may have pushed it further out
+            delay = self.client._resume_at - time.monotonic()
+    
+    async def _dispatch(self, events: List[Dict[str, Any]]):
+        """Start sending a batch once an in-flight slot is free."""
+        await self.slots.acquire()
+        task = self.loop.create_task(self._send(events))
+        # Hold a reference so the task is not collected mid-flight
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+    
+    async def _send(self, events: List[Dict[str, Any]]):
+        """Post one batch; failed batches go to the client's local queue, rejected ones are dropped."""
+        started = time.perf_counter()
+        try:
+            if not self.client.breaker.allow():
+                self.client._requeue(events)
+                return
+            if self.session is None:
+                self.session = aiohttp.ClientSession()
+            body, encoding_headers = encode_batch(events, config.batch_format, config.compression)
+            async with self.session.post(
+                f"{self.client.api_url}/v1/meter/events/batch",
+                data=body,
+                headers={**self.client._get_headers(), **encoding_headers},
+                timeout=aiohttp.ClientTimeout(total=config.timeout * 2)
+            ) as response:
+                self.client._throttled(response.status, response.headers)
+                if self.client._rejected(response.status, len(events)):
+                    self.client.metrics.record_flush(len(events), time.perf_counter() - started, False)
+                    return
+                response.raise_for_status()
+        except asyncio.CancelledError:
+            self.client._requeue(events)
+            raise
+        except Exception:
+            self.client._record_failure()
+            self.client.metrics.record_flush(len(events), time.perf_counter() - started, False)
+            self.client._requeue(events)
+        else:
+            self.client.breaker.record_success()
+            self.client.metrics.record_flush(len(events), time.perf_counter() - started, True)
+        finally:
+            self.slots.release()
+    
+    async def aclose(self):
+        """Send everything queued, wait for in-flight batches and close the session."""
+        if not self.closing:
+            self.closing = True
+            self.ready.set()
+            try:
+                # Wakes the sender if it is waiting for a first event
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+        await asyncio.shield(self.sender)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class LoopThread:
+    """Event loop on a daemon thread, bridging callers without a running loop."""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+    
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+    
+    def call(self, callback, *args):
+        """Schedule a callback on the loop without waiting."""
+        self.loop.call_soon_threadsafe(callback, *args)
+    
+    def stop(self):
+        """Stop the loop and its thread."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        if not self.loop.is_running():
+            self.loop.close()
@@ -25,11 +25,12 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "requests>=2.31.0",
-        "tenacity>=8.2.0",
     ],
     extras_require={
         "async": ["aiohttp>=3.9.0"],
         "fastapi": ["fastapi>=0.104.0"],
+        "prometheus": ["prometheus-client>=0.19.0"],
+        "zstd": ["zstandard>=0.22.0"],
     },
 )
 
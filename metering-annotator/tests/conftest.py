@@ -0,0 +1,72 @@
+"""Pytest configuration and fixtures."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from metering.config import config
+
+
+class StubAPI(ThreadingHTTPServer):
+    """Metering API stand-in that records batches and answers with a set status."""
+    
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.status = 201
+        # Statuses answered, in order, before falling back to status
+        self.responses = []
+        self.retry_after = None
+        self.healthy = True
+        self.batches = []
+        self.posted_at = []
+        self.single_events = 0
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+    
+    @property
+    def events_received(self) -> int:
+        return sum(self.batches)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+    
+    def _respond(self, status: int):
+        self.send_response(status)
+        if status >= 300 and self.server.retry_after is not None:
+            self.send_header("Retry-After", str(self.server.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+    
+    def do_GET(self):
+        self._respond(200 if self.server.healthy else 503)
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.posted_at.append(time.monotonic())
+        status = self.server.responses.pop(0) if self.server.responses else self.server.status
+        if status < 300:
+            if self.path.endswith("/batch"):
+                self.server.batches.append(len(json.loads(body)["events"]))
+            else:
+                self.server.single_events += 1
+        self._respond(status)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Run a stub API for the test; batches are sent as uncompressed JSON."""
+    monkeypatch.setattr(config, "batch_format", "json")
+    monkeypatch.setattr(config, "compression", "none")
+    server = StubAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
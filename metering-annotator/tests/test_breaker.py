@@ -0,0 +1,138 @@
+"""Tests for the circuit breaker and the client's recovery from API outages."""
+
+import time
+import pytest
+from metering.breaker import CircuitBreaker
+from metering.client import MeteringClient
+from metering.config import config
+from metering.exceptions import MeteringAPIError
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert not breaker.allow()
+    # Only the failure that opened it reports the transition
+    assert not breaker.record_failure()
+
+
+def test_breaker_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    
+    assert not breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_breaker_trip_opens_once():
+    breaker = CircuitBreaker(failure_threshold=5)
+    
+    assert breaker.trip()
+    assert not breaker.trip()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def fast_recovery(monkeypatch):
+    monkeypatch.setattr(config, "breaker_failure_threshold", 2)
+    monkeypatch.setattr(config, "breaker_probe_interval_seconds", 0.05)
+    monkeypatch.setattr(config, "batch_interval_seconds", 0.05)
+
+
+def test_client_recovers_and_drains_queue(api, fast_recovery):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="sync")
+    api.status = 503
+    api.healthy = False
+    
+    for _ in range(2):
+        with pytest.raises(MeteringAPIError):
+            client.record_event("acme", "api", "search")
+    assert not client.breaker.allow()
+    assert client.metrics.breaker_opens == 1
+    
+    # While open, events are queued without calling the API
+    assert client.record_event("acme", "api", "search") is False
+    assert client.queue.size() == 3
+    
+    api.status = 201
+    api.healthy = True
+    _wait_for(lambda: api.events_received == 3)
+    _wait_for(lambda: client.queue.size() == 0)
+    assert client.breaker.allow()
+    assert client.record_event("acme", "api", "search") is True
+    client.close()
+
+
+def test_failed_probe_keeps_breaker_open(api, fast_recovery):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="sync")
+    api.status = 503
+    api.healthy = False
+    for _ in range(2):
+        with pytest.raises(MeteringAPIError):
+            client.record_event("acme", "api", "search")
+    
+    time.sleep(0.2)
+    assert not client.breaker.allow()
+    assert api.batches == []
+    client.close()
+
+
+def test_batch_worker_resumes_after_recovery(api, fast_recovery):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="batch")
+    api.status = 503
+    api.healthy = False
+    client.record_event("acme", "api", "search")
+    client.record_event("acme", "api", "search")
+    # Each failed flush re-queues the batch until the breaker opens
+    _wait_for(lambda: not client.breaker.allow())
+    
+    api.status = 201
+    api.healthy = True
+    _wait_for(lambda: api.events_received == 2)
+    assert client.metrics.events_dropped == 0
+    client.close()
+
+
+def test_rejected_batch_is_dropped_without_opening_breaker(api, fast_recovery):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="batch")
+    api.status = 422
+    for _ in range(3):
+        client.record_event("acme", "api", "search")
+    
+    _wait_for(lambda: client.metrics.events_dropped == 3)
+    assert client.breaker.allow()
+    assert client.queue.size() == 0
+    client.close()
+
+
+def test_events_queued_below_threshold_are_sent_after_recovery(api, monkeypatch):
+    monkeypatch.setattr(config, "breaker_failure_threshold", 5)
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="sync")
+    api.responses = [503, 503]
+    for _ in range(2):
+        with pytest.raises(MeteringAPIError):
+            client.record_event("acme", "api", "search")
+    assert client.breaker.allow()
+    assert client.queue.size() == 2
+    
+    assert client.record_event("acme", "api", "search") is True
+    
+    _wait_for(lambda: api.events_received == 2)
+    assert client.queue.size() == 0
+    assert api.single_events == 1
+    client.close()
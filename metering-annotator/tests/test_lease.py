@@ -0,0 +1,89 @@
+"""Tests for lease-backed quota enforcement."""
+
+import threading
+import pytest
+from metering.config import config
+from metering.lease import QuotaEnforcer
+
+
+class SlowLeaseClient:
+    """Client whose lease requests block until the gate opens."""
+    
+    def __init__(self, granted: int = 100):
+        self.granted = granted
+        self.gate = threading.Event()
+        self.leases_requested = 0
+        self.released = []
+    
+    def acquire_lease(self, tenant_id, resource, feature, period, requested, ttl_seconds):
+        self.leases_requested += 1
+        self.gate.wait()
+        return {
+            "lease_id": f"lease-{self.leases_requested}",
+            "period": period,
+            "granted": min(requested, self.granted),
+            "ttl_seconds": ttl_seconds
+        }
+    
+    def release_lease(self, lease_id, tenant_id, resource, feature, period):
+        self.released.append(lease_id)
+
+
+def _check_in_threads(enforcer, count: int) -> tuple:
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(enforcer.check("acme", "api", "search")))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_checks_share_one_lease_request():
+    client = SlowLeaseClient()
+    enforcer = QuotaEnforcer(client, lease_size=10)
+    threads, results = _check_in_threads(enforcer, 5)
+    
+    client.gate.set()
+    for thread in threads:
+        thread.join()
+    
+    assert results == [True] * 5
+    assert client.leases_requested == 1
+    assert enforcer._buckets[("acme", "api", "search")].tokens == 5
+
+
+def test_check_fails_open_while_a_slow_lease_is_in_flight(monkeypatch):
+    monkeypatch.setattr(config, "timeout", 0.1)
+    client = SlowLeaseClient()
+    enforcer = QuotaEnforcer(client, lease_size=10)
+    threads, results = _check_in_threads(enforcer, 1)
+    
+    # The in-flight request does not hold the key's lock, so this check only waits briefly
+    assert enforcer.check("acme", "api", "search")
+    assert client.leases_requested == 1
+    
+    client.gate.set()
+    threads[0].join()
+    assert results == [True]
+
+
+def test_used_up_lease_is_returned_and_replaced():
+    client = SlowLeaseClient(granted=2)
+    client.gate.set()
+    enforcer = QuotaEnforcer(client, lease_size=2)
+    
+    assert all(enforcer.check("acme", "api", "search") for _ in range(3))
+    assert client.leases_requested == 2
+    assert client.released == ["lease-1"]
+
+
+def test_denied_lease_rejects_checks():
+    client = SlowLeaseClient(granted=0)
+    client.gate.set()
+    enforcer = QuotaEnforcer(client)
+    
+    assert not enforcer.check("acme", "api", "search")
+    assert not enforcer.check("acme", "api", "search")
+    assert client.leases_requested == 1
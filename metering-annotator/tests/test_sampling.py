@@ -0,0 +1,52 @@
+"""Tests for call sampling."""
+
+import threading
+from types import SimpleNamespace
+import pytest
+from metering import sampling
+from metering.exceptions import MeteringConfigError
+from metering.sampling import AdaptiveSampler, FixedSampler, Sampler, make_sampler
+
+
+def test_sampler_is_abstract():
+    with pytest.raises(TypeError):
+        Sampler()
+
+
+def test_make_sampler_options():
+    assert make_sampler() is None
+    assert make_sampler(sample_every=1) is None
+    assert isinstance(make_sampler(sample_every=10), FixedSampler)
+    assert isinstance(make_sampler(sample_target_per_second=5), AdaptiveSampler)
+    with pytest.raises(MeteringConfigError):
+        make_sampler(sample_every=10, sample_target_per_second=5)
+
+
+def test_fixed_sampler_weights_recorded_calls():
+    sampler = FixedSampler(4)
+    weights = [sampler.sample() for _ in range(20000)]
+    
+    assert set(weights) == {0, 4}
+    # Recorded weights estimate the number of calls
+    assert abs(sum(weights) - 20000) < 2000
+
+
+def test_adaptive_sampler_counts_calls_from_every_thread(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(sampling, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    sampler = AdaptiveSampler(target_per_second=100)
+    
+    def call(count):
+        for _ in range(count):
+            sampler.sample()
+    
+    threads = [threading.Thread(target=call, args=(2500,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    clock[0] = 1.0
+    sampler.sample()
+    # 20000 calls in the window at a target of 100 per second
+    assert sampler.every == 200
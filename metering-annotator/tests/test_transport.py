@@ -0,0 +1,105 @@
+"""Tests for the asyncio batching transport."""
+
+import asyncio
+import pytest
+from metering.client import MeteringClient
+from metering.config import config
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(config, "batch_size", 10)
+    # Long enough that only size or aclose() triggers a flush
+    monkeypatch.setattr(config, "async_flush_interval_ms", 60000)
+
+
+@pytest.mark.asyncio
+async def test_aclose_flushes_queued_events(api, small_batches):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    for _ in range(25):
+        client.record_event("acme", "api", "search")
+    
+    await client.aclose()
+    
+    assert api.events_received == 25
+    assert sorted(api.batches) == [5, 10, 10]
+    assert client.queue.size() == 0
+    assert client.metrics.events_sent == 25
+
+
+@pytest.mark.asyncio
+async def test_aclose_flushes_partial_batch_before_deadline(api, small_batches):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    client.record_event("acme", "api", "search")
+    await asyncio.sleep(0.05)
+    assert api.batches == []
+    
+    await client.aclose()
+    
+    assert api.batches == [1]
+
+
+@pytest.mark.asyncio
+async def test_aclose_with_nothing_queued(api, small_batches):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    client.record_event("acme", "api", "search")
+    await client.aclose()
+    
+    # A second client on the same loop closes cleanly without sending
+    idle = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    await idle.aclose()
+    assert api.batches == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_events_locally(api, small_batches):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    api.status = 503
+    for _ in range(3):
+        client.record_event("acme", "api", "search")
+    
+    await client.aclose()
+    
+    assert api.batches == []
+    assert client.queue.size() == 3
+    assert client.metrics.events_dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_flush_drops_events(api, small_batches):
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    api.status = 422
+    for _ in range(3):
+        client.record_event("acme", "api", "search")
+    
+    await client.aclose()
+    
+    assert client.queue.size() == 0
+    assert client.metrics.events_dropped == 3
+    assert client.breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_sender_waits_out_retry_after(api, small_batches, monkeypatch):
+    monkeypatch.setattr(config, "batch_size", 2)
+    monkeypatch.setattr(config, "async_max_in_flight", 1)
+    client = MeteringClient(api_url=api.url, api_key="key", transport_mode="async")
+    api.responses = [503]
+    api.retry_after = 1
+    for _ in range(2):
+        client.record_event("acme", "api", "search")
+    await asyncio.sleep(0.3)
+    assert len(api.posted_at) == 1
+    
+    for _ in range(2):
+        client.record_event("acme", "api", "search")
+    await asyncio.sleep(0.3)
+    # Still inside the Retry-After window: nothing else was sent
+    assert len(api.posted_at) == 1
+    
+    await client.aclose()
+    
+    assert api.posted_at[1] - api.posted_at[0] >= 0.9
+    assert client.metrics.throttled == 1
+    # The throttled batch was kept rather than dropped
+    assert api.events_received + client.queue.size() == 4
@@ -4,12 +4,16 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
+from app.config import settings
 from app.core.database import Base
 from app.models.database import *  # Import all models
 
 # this is the Alembic Config object
 config = context.config
 
+# Use the same database as the application
+config.set_main_option("sqlalchemy.url", settings.database_url)
+
 # Interpret the config file for Python logging
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -0,0 +1,103 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metering_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=False),
+        sa.Column('resource', sa.String(length=255), nullable=False),
+        sa.Column('feature', sa.String(length=255), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint('quantity > 0', name='chk_quantity_positive'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_metering_events_tenant_id'), 'metering_events', ['tenant_id'])
+    op.create_index(op.f('ix_metering_events_resource'), 'metering_events', ['resource'])
+    op.create_index(op.f('ix_metering_events_feature'), 'metering_events', ['feature'])
+    op.create_index(op.f('ix_metering_events_timestamp'), 'metering_events', ['timestamp'])
+
+    op.create_table(
+        'metering_aggregates',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=False),
+        sa.Column('resource', sa.String(length=255), nullable=False),
+        sa.Column('feature', sa.String(length=255), nullable=False),
+        sa.Column('window_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('window_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('window_type', sa.String(length=20), nullable=False),
+        sa.Column('total_quantity', sa.Integer(), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_metering_aggregates_tenant_id'), 'metering_aggregates', ['tenant_id'])
+    op.create_index(op.f('ix_metering_aggregates_resource'), 'metering_aggregates', ['resource'])
+    op.create_index(op.f('ix_metering_aggregates_feature'), 'metering_aggregates', ['feature'])
+    op.create_index(op.f('ix_metering_aggregates_window_start'), 'metering_aggregates', ['window_start'])
+    op.create_index(op.f('ix_metering_aggregates_window_end'), 'metering_aggregates', ['window_end'])
+    op.create_index(op.f('ix_metering_aggregates_window_type'), 'metering_aggregates', ['window_type'])
+
+    op.create_table(
+        'metering_quotas',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=False),
+        sa.Column('resource', sa.String(length=255), nullable=True),
+        sa.Column('feature', sa.String(length=255), nullable=False),
+        sa.Column('limit_value', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=20), nullable=False),
+        sa.Column('alert_threshold', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint('limit_value > 0', name='chk_limit_positive'),
+        sa.CheckConstraint('alert_threshold >= 0 AND alert_threshold <= 100', name='chk_alert_threshold'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_metering_quotas_tenant_id'), 'metering_quotas', ['tenant_id'])
+    op.create_index(op.f('ix_metering_quotas_resource'), 'metering_quotas', ['resource'])
+    op.create_index(op.f('ix_metering_quotas_feature'), 'metering_quotas', ['feature'])
+    op.create_index(op.f('ix_metering_quotas_is_active'), 'metering_quotas', ['is_active'])
+
+    op.create_table(
+        'metering_api_keys',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('key_hash', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('tenant_id', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_metering_api_keys_key_hash'), 'metering_api_keys', ['key_hash'], unique=True)
+    op.create_index(op.f('ix_metering_api_keys_tenant_id'), 'metering_api_keys', ['tenant_id'])
+    op.create_index(op.f('ix_metering_api_keys_is_active'), 'metering_api_keys', ['is_active'])
+
+
+def downgrade() -> None:
+    op.drop_table('metering_api_keys')
+    op.drop_table('metering_quotas')
+    op.drop_table('metering_aggregates')
+    op.drop_table('metering_events')
@@ -0,0 +1,44 @@
+"""Distinct count sketches
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metering_distinct_counts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=False),
+        sa.Column('resource', sa.String(length=255), nullable=False),
+        sa.Column('feature', sa.String(length=255), nullable=False),
+        sa.Column('metadata_key', sa.String(length=255), nullable=False),
+        sa.Column('window_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('window_type', sa.String(length=20), nullable=False),
+        sa.Column('estimate', sa.Integer(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'tenant_id', 'resource', 'feature', 'metadata_key', 'window_type', 'window_start',
+            name='uq_distinct_count_window'
+        )
+    )
+    op.create_index(op.f('ix_metering_distinct_counts_tenant_id'), 'metering_distinct_counts', ['tenant_id'])
+    op.create_index(op.f('ix_metering_distinct_counts_window_start'), 'metering_distinct_counts', ['window_start'])
+
+
+def downgrade() -> None:
+    op.drop_table('metering_distinct_counts')
@@ -0,0 +1,23 @@
+"""Aggregate sampling variance
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('metering_aggregates', sa.Column('sampling_variance', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('metering_aggregates', 'sampling_variance')
@@ -0,0 +1,30 @@
+"""Admin endpoints."""
+
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.profiling import profile_buffer
+from app.core.security import validate_admin_api_key
+from app.models.schemas import Profile, ProfileSummary
+
+router = APIRouter()
+
+
+@router.get("/admin/profiles", response_model=List[ProfileSummary])
+async def list_profiles(
+    limit: int = Query(20, ge=1, le=1000),
+    api_key: str = Depends(validate_admin_api_key)
+):
+    """List the most recent request profiles captured by this worker."""
+    return profile_buffer.list(limit)
+
+
+@router.get("/admin/profiles/{profile_id}", response_model=Profile)
+async def get_profile(
+    profile_id: str,
+    api_key: str = Depends(validate_admin_api_key)
+):
+    """Get a request profile with its stack samples and SQL statements."""
+    profile = profile_buffer.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
@@ -1,10 +1,11 @@
 """Aggregate endpoints."""
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import validate_api_key
 from app.models.schemas import AggregateFilters, AggregateResponse
 from app.services.aggregate_service import AggregateService
@@ -22,6 +23,7 @@ async def get_aggregates(
     feature: Optional[str] = Query(None),
     group_by: str = Query("resource,feature"),
     db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
     api_key: str = Depends(validate_api_key)
 ):
     """Get aggregated usage statistics."""
@@ -35,7 +37,9 @@ async def get_aggregates(
         group_by=group_by
     )
     
-    service = AggregateService(db)
+    # Aggregates missing from the store are computed and saved on the primary
+    service = AggregateService(db, read_db=read_db)
     result = await service.get_aggregates(filters)
-    return result
+    # Rows are already in response shape; skip response_model validation
+    return ORJSONResponse(result)
 
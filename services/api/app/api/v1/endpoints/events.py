@@ -1,15 +1,21 @@
 """Event endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
-from app.core.database import get_db
+from app.core.admission import admit_ingest
+from app.core.database import get_db, get_read_db
+from app.core.encoding import COLUMNAR_CONTENT_TYPE, is_columnar, read_body
 from app.core.security import validate_api_key
 from app.models.schemas import (
     EventCreate,
     EventBatchCreate,
-    Event,
+    EventBatchColumnar,
     EventFilters,
     Pagination,
     PaginatedResponse
@@ -19,7 +25,26 @@ from app.services.event_service import EventService
 router = APIRouter()
 
 
-@router.post("/events", response_model=dict, status_code=201)
+def _body_schema(model) -> dict:
+    """JSON schema of a request model; nested models are in the app's components."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return schema
+
+
+# The batch body is parsed by hand (compressed or columnar); document both formats
+BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": _body_schema(EventBatchCreate)},
+            COLUMNAR_CONTENT_TYPE: {"schema": _body_schema(EventBatchColumnar)}
+        }
+    }
+}
+
+
+@router.post("/events", response_model=dict, status_code=201, dependencies=[Depends(admit_ingest)])
 async def create_event(
     event: EventCreate,
     db: Session = Depends(get_db),
@@ -27,28 +52,63 @@ async def create_event(
 ):
     """Create a single event."""
     service = EventService(db)
-    result = await service.ingest_event(event)
+    event_id = await service.ingest_event(event)
     return {
         "status": "success",
         "events_processed": 1,
-        "event_ids": [str(result.id)]
+        "event_ids": [str(event_id)]
     }
 
 
-@router.post("/events/batch", response_model=dict, status_code=201)
+@router.post(
+    "/events/batch",
+    response_model=dict,
+    status_code=201,
+    openapi_extra=BATCH_REQUEST_BODY,
+    dependencies=[Depends(admit_ingest)]
+)
 async def create_events_batch(
-    batch: EventBatchCreate,
+    request: Request,
+    ack: str = Query("count", pattern="^(count|ids)$"),
     db: Session = Depends(get_db),
     api_key: str = Depends(validate_api_key)
 ):
-    """Create multiple events in batch."""
+    """
+    Create multiple events in batch.
+    
+    Accepts a JSON list of events or, with Content-Type
+    application/vnd.metering.columnar+json, a columnar batch; either may be
+    gzip or zstd compressed (Content-Encoding).
+    
+    The acknowledgment carries the number of events stored and a batch token
+    (the client's, or a generated one). Pass ack=ids to also get the event
+    ids, in request order.
+    """
+    body = await read_body(request)
+    columnar = is_columnar(request)
+    try:
+        if columnar:
+            batch = EventBatchColumnar.model_validate_json(body)
+        else:
+            batch = EventBatchCreate.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()]
+        )
+    
     service = EventService(db)
-    results = await service.ingest_batch(batch.events)
-    return {
+    if columnar:
+        event_ids = await service.ingest_columnar(batch)
+    else:
+        event_ids = await service.ingest_batch(batch.events)
+    result = {
         "status": "success",
-        "events_processed": len(results),
-        "event_ids": [str(r.id) for r in results]
+        "events_processed": len(event_ids),
+        "batch_token": batch.batch_token or uuid.uuid4().hex
     }
+    if ack == "ids":
+        result["event_ids"] = [str(event_id) for event_id in event_ids]
+    return result
 
 
 @router.get("/events", response_model=PaginatedResponse)
@@ -60,7 +120,7 @@ async def get_events(
     end_date: Optional[datetime] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     api_key: str = Depends(validate_api_key)
 ):
     """Get events with filtering and pagination."""
@@ -75,5 +135,6 @@ async def get_events(
     
     service = EventService(db)
     result = await service.get_events(filters, pagination)
-    return result
+    # Rows are already in response shape; skip response_model validation
+    return ORJSONResponse(result)
 
@@ -0,0 +1,37 @@
+"""Quota lease endpoints."""
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import validate_api_key
+from app.models.schemas import QuotaLeaseRequest, QuotaLease, QuotaLeaseRelease
+from app.services.lease_service import LeaseService
+
+router = APIRouter()
+
+
+@router.post("/leases", response_model=QuotaLease, status_code=201)
+async def acquire_lease(
+    request: QuotaLeaseRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(validate_api_key)
+):
+    """Lease a slice of remaining quota for local enforcement."""
+    service = LeaseService(db)
+    result = await service.acquire_lease(request)
+    return result
+
+
+@router.post("/leases/release", response_model=dict)
+async def release_lease(
+    release: QuotaLeaseRelease,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(validate_api_key)
+):
+    """Return a lease before it expires."""
+    service = LeaseService(db)
+    released = await service.release_lease(release)
+    return {
+        "status": "success",
+        "released": released
+    }
@@ -0,0 +1,34 @@
+"""Live usage streaming endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.config import settings
+from app.core.security import validate_api_key
+from app.services.live_service import LiveService
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def stream_live_usage(
+    tenant_id: str = Query(...),
+    resource: Optional[str] = Query(None),
+    feature: Optional[str] = Query(None),
+    api_key: str = Depends(validate_api_key)
+):
+    """
+    Stream a tenant's usage as Server-Sent Events.
+    
+    Sends a ``snapshot`` event with the tenant usage snapshot, then
+    ``usage`` events with the counters that changed, at most once per
+    live_update_interval_ms.
+    """
+    if not settings.live_updates_enabled:
+        raise HTTPException(status_code=404, detail="Live updates are disabled")
+    return StreamingResponse(
+        LiveService.stream(tenant_id, resource, feature),
+        media_type="text/event-stream",
+        # Keep proxies such as nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
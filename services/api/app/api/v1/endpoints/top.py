@@ -0,0 +1,27 @@
+"""Heavy-hitter endpoints."""
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+from datetime import datetime
+from app.config import settings
+from app.core.security import validate_admin_api_key
+from app.models.schemas import TopResponse
+from app.services.top_service import TopService
+
+router = APIRouter()
+
+
+@router.get("/top", response_model=TopResponse)
+async def get_top(
+    dimension: str = Query("tenants", pattern="^(tenants|features)$"),
+    period: str = Query("hourly", pattern="^(hourly|daily)$"),
+    limit: int = Query(20, ge=1, le=1000),
+    at: Optional[datetime] = Query(None, description="Any time in the window; defaults to now"),
+    api_key: str = Depends(validate_admin_api_key)
+):
+    """Get the tenants or resource/features with the most usage in a window."""
+    service = TopService()
+    result = await service.get_top(dimension, period, min(limit, settings.top_k_capacity), at)
+    # Items only carry the fields of their dimension; skip response_model validation
+    return ORJSONResponse(result)
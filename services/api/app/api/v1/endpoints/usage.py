@@ -0,0 +1,24 @@
+"""Tenant usage endpoints."""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import validate_api_key
+from app.models.schemas import TenantUsageSnapshot
+from app.services.quota_service import QuotaService
+
+router = APIRouter()
+
+
+@router.get("/tenants/{tenant_id}/usage", response_model=TenantUsageSnapshot)
+async def get_tenant_usage(
+    tenant_id: str,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(validate_api_key)
+):
+    """Get current usage against every active quota of a tenant."""
+    service = QuotaService(db)
+    result = await service.get_tenant_snapshot(tenant_id)
+    # Rows are already in response shape; skip response_model validation
+    return ORJSONResponse(result)
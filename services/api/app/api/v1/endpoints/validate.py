@@ -2,15 +2,21 @@
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+from app.core.admission import admit_validation
 from app.core.database import get_db
 from app.core.security import validate_api_key
-from app.models.schemas import QuotaValidationRequest, QuotaValidationResult
+from app.models.schemas import (
+    QuotaValidationRequest,
+    QuotaValidationResult,
+    QuotaBatchValidationRequest,
+    QuotaBatchValidationResult
+)
 from app.services.quota_service import QuotaService
 
 router = APIRouter()
 
 
-@router.post("/validate", response_model=QuotaValidationResult)
+@router.post("/validate", response_model=QuotaValidationResult, dependencies=[Depends(admit_validation)])
 async def validate_quota(
     request: QuotaValidationRequest,
     db: Session = Depends(get_db),
@@ -21,3 +27,19 @@ async def validate_quota(
     result = await service.validate_quota(request)
     return result
 
+
+
+@router.post(
+    "/validate/batch",
+    response_model=QuotaBatchValidationResult,
+    dependencies=[Depends(admit_validation)]
+)
+async def validate_quota_batch(
+    batch: QuotaBatchValidationRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(validate_api_key)
+):
+    """Validate several quota checks in one call."""
+    service = QuotaService(db)
+    result = await service.validate_quota_batch(batch)
+    return result
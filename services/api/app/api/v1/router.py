@@ -1,12 +1,17 @@
 """API v1 router."""
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import events, aggregates, validate, health
+from app.api.v1.endpoints import events, aggregates, validate, leases, health, admin, top, usage, live
 
 api_router = APIRouter()
 
 api_router.include_router(events.router, prefix="/meter", tags=["events"])
 api_router.include_router(aggregates.router, prefix="/meter", tags=["aggregates"])
 api_router.include_router(validate.router, prefix="/meter", tags=["validate"])
+api_router.include_router(leases.router, prefix="/meter", tags=["leases"])
+api_router.include_router(usage.router, prefix="/meter", tags=["usage"])
+api_router.include_router(live.router, prefix="/meter", tags=["live"])
 api_router.include_router(health.router, prefix="/meter", tags=["health"])
+api_router.include_router(admin.router, prefix="/meter", tags=["admin"])
+api_router.include_router(top.router, prefix="/meter", tags=["top"])
 
@@ -13,19 +13,106 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379/0"
     redis_pool_size: int = 10
+    # Counter layout: "legacy" (string key per counter), "dual" (write
+    # compact hashes, read hash + legacy while old windows age out) or "hash"
+    counter_layout: str = "dual"
     
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_key_hash_algorithm: str = "sha256"
+    max_request_body_bytes: int = 16 * 1024 * 1024  # After decompression
     
     # Database Connection Pool
     db_pool_size: int = 20
     db_max_overflow: int = 10
+    # Connections each worker opens on startup before serving (0 disables)
+    startup_warmup_connections: int = 0
+    
+    # Read replicas for the query endpoints, as a JSON list (empty reads from
+    # the primary). Replicas lagging more than replica_max_lag_seconds are
+    # skipped, and a tenant's reads stay on the primary for
+    # replica_read_after_write_ms after it writes.
+    database_replica_urls: list[str] = []
+    db_replica_pool_size: int = 10
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_seconds: float = 2.0
+    replica_read_after_write_ms: int = 5000
+    
+    # Ingest: "direct" writes events in the API process, "stream" publishes
+    # them to a Redis stream written by app.workers.ingest
+    ingest_mode: str = "direct"
+    ingest_read_count: int = 50  # Stream entries a worker writes per transaction
+    ingest_reclaim_idle_ms: int = 60000
+    # Deliveries after which a batch that cannot be stored on its own moves
+    # to the meter:ingest:dead stream
+    ingest_max_deliveries: int = 5
+    
+    # Cold storage: app.workers.archive moves raw events older than
+    # archive_after_days (whole months only) to Parquet files under
+    # archive_path, which GET /events also scans. Unset disables archiving.
+    archive_path: Optional[str] = None
+    archive_after_days: int = 365
+    archive_batch_size: int = 50000  # Rows streamed per Parquet row group
+    archive_interval_seconds: int = 86400
+    
+    # Admission control for ingest and quota validation: each worker admits
+    # admission_max_in_flight requests at once (0: its DB pool capacity,
+    # db_pool_size + db_max_overflow) and admission_per_key_limit per API key
+    # (0: unlimited). Others queue, validation ahead of ingest, for up to
+    # admission_queue_timeout_ms; overflow is rejected with 503 (429 over
+    # the per-key limit) and Retry-After.
+    admission_enabled: bool = True
+    admission_max_in_flight: int = 0
+    admission_per_key_limit: int = 0
+    admission_max_queue: int = 100
+    admission_queue_timeout_ms: int = 2000
+    admission_retry_after_seconds: int = 1
     
     # Aggregation
     aggregation_batch_size: int = 1000
     aggregation_interval_seconds: int = 300
+    reconciliation_interval_seconds: int = 60
+    # Events stored this recently may not have reached their counters yet;
+    # reconciliation only repairs counters outside the range they allow
+    reconciliation_grace_seconds: int = 30
+    
+    # Event metadata keys (e.g. ["user_id"]) whose distinct values are
+    # estimated per tenant/resource/feature and window with HyperLogLog
+    distinct_metadata_keys: list[str] = []
+    
+    # Heavy hitters: members tracked per /top window. Reported counts
+    # overestimate by at most total usage / top_k_capacity
+    top_k_capacity: int = 1000
+    
+    # Quota leases (SDK-side enforcement)
+    lease_max_ttl_seconds: int = 300
+    lease_max_fraction: float = 0.1  # Largest slice of a quota a single lease may take
+    
+    # Tenant usage snapshots cache each tenant's quota list in-process
+    snapshot_quota_cache_seconds: int = 30
+    
+    # Live usage streams (GET /live): ingest publishes counter changes over
+    # Redis pub/sub and each stream sends them at most once per interval
+    live_updates_enabled: bool = False
+    live_update_interval_ms: int = 1000
+    live_keepalive_seconds: int = 15
+    
+    # Quota alerts
+    alert_stream_maxlen: int = 100000
+    alert_webhook_url: Optional[str] = None  # Alerts are only logged when unset
+    alert_batch_size: int = 100
+    alert_quota_cache_seconds: int = 300
+    
+    # Metrics
+    metrics_enabled: bool = True
+    
+    # Request profiling (admin "X-Profile: 1" header or slow requests)
+    profiling_enabled: bool = False
+    profiling_slow_request_ms: int = 0  # 0 profiles only on request
+    profiling_sample_interval_ms: int = 5
+    profiling_buffer_size: int = 50
+    profiling_max_statements: int = 200
     
     # Logging
     log_level: str = "INFO"
@@ -0,0 +1,145 @@
+"""Admission control for the ingest and quota validation endpoints.
+
+When Postgres slows down, requests would otherwise pile up waiting for pool
+connections and every caller's latency grows with the pile. Each worker
+instead admits a bounded number of requests at once, tied to its pool
+capacity, and a bounded number per API key. Requests over the global limit
+queue briefly, quota validation ahead of bulk ingest; the rest are rejected
+early with a Retry-After hint, which the SDK honors when it schedules flushes.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional
+from fastapi import HTTPException, Security
+from app.config import settings
+from app.core.metrics import ADMISSION_QUEUE_WAIT, ADMISSION_REJECTED
+from app.core.security import api_key_header
+
+# Lower values are admitted first
+PRIORITY_VALIDATE = 0
+PRIORITY_INGEST = 1
+
+
+def _reject(status_code: int, reason: str, detail: str) -> HTTPException:
+    ADMISSION_REJECTED.labels(reason=reason).inc()
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(settings.admission_retry_after_seconds)}
+    )
+
+
+class AdmissionController:
+    """Per-worker in-flight limits with a priority queue."""
+    
+    def __init__(self):
+        self.in_flight = 0
+        self.per_key: Dict[str, int] = {}
+        # Heap of [priority, arrival, future]
+        self.waiters: List[list] = []
+        self.arrivals = itertools.count()
+    
+    @staticmethod
+    def capacity() -> int:
+        """Requests admitted at once."""
+        return settings.admission_max_in_flight or settings.db_pool_size + settings.db_max_overflow
+    
+    async def acquire(self, key: str, priority: int):
+        """
+        Wait for an in-flight slot.
+        
+        Raises HTTPException 429 when key already has its limit of requests
+        admitted or queued, and 503 when the queue is full or the wait
+        times out.
+        """
+        count = self.per_key.get(key, 0)
+        limit = settings.admission_per_key_limit
+        if limit and count >= limit:
+            raise _reject(429, "per_key", "Too many concurrent requests for this API key")
+        
+        self.per_key[key] = count + 1
+        try:
+            # Queue behind existing waiters even if a slot is free, so priority holds
+            if self.in_flight < self.capacity() and not self.waiters:
+                self.in_flight += 1
+            else:
+                if len(self.waiters) >= settings.admission_max_queue:
+                    raise _reject(503, "queue_full", "Service overloaded, retry later")
+                await self._wait(priority)
+        except BaseException:
+            self._forget(key)
+            raise
+    
+    async def _wait(self, priority: int):
+        """Queue for a slot handed over by release."""
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self.arrivals), future]
+        heapq.heappush(self.waiters, entry)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=settings.admission_queue_timeout_ms / 1000)
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was already handed over
+            if future.done():
+                self._release_slot()
+            else:
+                self._remove(entry)
+            raise
+        
+        if not future.done():
+            self._remove(entry)
+            raise _reject(503, "queue_timeout", "Service overloaded, retry later")
+        ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started)
+    
+    def _remove(self, entry: list):
+        self.waiters.remove(entry)
+        heapq.heapify(self.waiters)
+    
+    def release(self, key: str):
+        """Give back an admitted request's slot."""
+        self._forget(key)
+        self._release_slot()
+    
+    def _forget(self, key: str):
+        remaining = self.per_key.get(key, 0) - 1
+        if remaining > 0:
+            self.per_key[key] = remaining
+        else:
+            self.per_key.pop(key, None)
+    
+    def _release_slot(self):
+        """Hand the slot to the first waiter, or free it."""
+        if self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            future.set_result(None)
+        else:
+            self.in_flight -= 1
+
+
+# Shared by every admitted endpoint in this worker
+admission = AdmissionController()
+
+
+def admit(priority: int):
+    """Dependency that holds an in-flight slot until the response is sent."""
+    
+    async def dependency(api_key: Optional[str] = Security(api_key_header)):
+        if not settings.admission_enabled:
+            yield
+            return
+        # Keyed on the raw header so rejected requests never reach the database
+        key = api_key or ""
+        await admission.acquire(key, priority)
+        try:
+            yield
+        finally:
+            admission.release(key)
+    
+    return dependency
+
+
+admit_validation = admit(PRIORITY_VALIDATE)
+admit_ingest = admit(PRIORITY_INGEST)
@@ -1,31 +1,187 @@
 """Database connection and session management."""
 
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from typing import Optional, List, Dict, Tuple
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from app.config import settings
+from app.core import profiling
+from app.core.metrics import DB_REPLICA_LAG, TimedQueuePool, instrument_engine
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    pool_pre_ping=True,
-    echo=False
+logger = logging.getLogger(__name__)
+
+# Database engine, created on first use so importing the app never connects
+engine: Optional[Engine] = None
+
+# Read replica engines, one pool each, created on first use
+replica_engines: List[Engine] = []
+
+# Zero while a replica has replayed everything it received, otherwise the
+# age of the last replayed transaction (NULL on a primary, read as zero)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# (checked at, lag seconds) per replica index
+_replica_lag: Dict[int, Tuple[float, float]] = {}
+_replica_turn = itertools.count()
+
+
+class ReadOnlySession(Session):
+    """Session for query endpoints; refuses to flush changes."""
+    
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise RuntimeError("Read-only session cannot write")
+        super().flush(objects)
+
+
+# Session factories; SessionLocal is bound to the engine when it is created
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(class_=ReadOnlySession, autocommit=False, autoflush=False)
 
 # Base class for models
 Base = declarative_base()
 
 
+def get_engine() -> Engine:
+    """Get the database engine, creating it on first use."""
+    global engine
+    if engine is None:
+        engine = _create_engine(settings.database_url, settings.db_pool_size, "primary")
+        SessionLocal.configure(bind=engine)
+    return engine
+
+
+def get_replica_engines() -> List[Engine]:
+    """Get the read replica engines, creating them on first use."""
+    global replica_engines
+    if not replica_engines and settings.database_replica_urls:
+        replica_engines = [
+            _create_engine(url, settings.db_replica_pool_size, f"replica{index}")
+            for index, url in enumerate(settings.database_replica_urls)
+        ]
+    return replica_engines
+
+
+def _create_engine(url: str, pool_size: int, pool_name: str) -> Engine:
+    """Create an engine with its own pool and instrument it."""
+    new_engine = create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        echo=False,
+        **({"poolclass": TimedQueuePool} if settings.metrics_enabled else {})
+    )
+    
+    if settings.metrics_enabled:
+        instrument_engine(new_engine, pool_name)
+    if settings.profiling_enabled:
+        profiling.instrument_engine(new_engine)
+    return new_engine
+
+
+def _get_replica_lag(index: int, replica: Engine) -> float:
+    """Replication lag in seconds, re-measured every replica_lag_check_seconds."""
+    now = time.monotonic()
+    checked = _replica_lag.get(index)
+    if checked and now - checked[0] < settings.replica_lag_check_seconds:
+        return checked[1]
+    
+    try:
+        with replica.connect() as conn:
+            lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+    except Exception:
+        logger.warning("Read replica %d unreachable; reading from the primary", index)
+        lag = float("inf")
+    _replica_lag[index] = (now, lag)
+    if settings.metrics_enabled:
+        DB_REPLICA_LAG.labels(f"replica{index}").set(lag)
+    return lag
+
+
+def choose_replica() -> Optional[Engine]:
+    """Pick a replica within replica_max_lag_seconds, round robin."""
+    replicas = get_replica_engines()
+    if not replicas:
+        return None
+    
+    start = next(_replica_turn)
+    for offset in range(len(replicas)):
+        index = (start + offset) % len(replicas)
+        if _get_replica_lag(index, replicas[index]) <= settings.replica_max_lag_seconds:
+            return replicas[index]
+    return None
+
+
+def create_session() -> Session:
+    """Create a database session outside of a request."""
+    get_engine()
+    return SessionLocal()
+
+
+def create_read_session(tenant_id: Optional[str] = None) -> Session:
+    """
+    Create a read-only session for queries that tolerate replica lag.
+    
+    Falls back to the primary when no replica is within the lag limit, or
+    while tenant_id has written recently, so tenants read their own writes.
+    """
+    from app.services.cache_service import CacheService
+    
+    replica = None
+    if settings.database_replica_urls:
+        if not tenant_id or not CacheService.has_recent_write(tenant_id):
+            replica = choose_replica()
+    return ReadSessionLocal(bind=replica or get_engine())
+
+
 def get_db() -> Session:
     """Dependency for getting database session."""
-    db = SessionLocal()
+    db = create_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request) -> Session:
+    """Dependency for a read-only session, on a replica when one is usable."""
+    db = create_read_session(request.query_params.get("tenant_id"))
     try:
         yield db
     finally:
         db.close()
 
+
+def warm_up_pool(connections: int):
+    """Open pool connections up front so first requests don't pay for them."""
+    pool_engine = get_engine()
+    opened = []
+    try:
+        for _ in range(min(connections, settings.db_pool_size)):
+            conn = pool_engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def dispose_engine():
+    """Close all pooled connections."""
+    global engine, replica_engines
+    if engine is not None:
+        engine.dispose()
+        engine = None
+    for replica in replica_engines:
+        replica.dispose()
+    replica_engines = []
+    _replica_lag.clear()
@@ -0,0 +1,95 @@
+"""Request body decoding for compressed and columnar payloads."""
+
+import zlib
+from fastapi import HTTPException, Request
+from app.config import settings
+
+COLUMNAR_CONTENT_TYPE = "application/vnd.metering.columnar+json"
+
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    """Decompress every gzip member of body, as concatenated members decode to."""
+    chunks = []
+    size = 0
+    while body:
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            data = decompressor.decompress(body, limit - size + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Malformed gzip body")
+        size += len(data)
+        if size > limit:
+            raise HTTPException(status_code=413, detail="Decompressed body too large")
+        if not decompressor.eof:
+            raise HTTPException(status_code=400, detail="Truncated gzip body")
+        chunks.append(data)
+        body = decompressor.unused_data
+    return b"".join(chunks)
+
+
+def _unzstd(body: bytes, limit: int) -> bytes:
+    try:
+        import zstandard
+    except ImportError:
+        raise HTTPException(status_code=415, detail="zstd bodies are not supported by this server")
+    
+    chunks = []
+    size = 0
+    try:
+        # Keep reading after the first frame, so multi-frame bodies decode whole
+        with zstandard.ZstdDecompressor().stream_reader(body, read_across_frames=True) as reader:
+            while True:
+                chunk = reader.read(DECOMPRESS_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(status_code=413, detail="Decompressed body too large")
+                chunks.append(chunk)
+    except zstandard.ZstdError:
+        raise HTTPException(status_code=400, detail="Malformed zstd body")
+    return b"".join(chunks)
+
+
+async def _read_raw(request: Request, limit: int) -> bytes:
+    """Read the body as sent, rejecting it once it passes limit bytes."""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def read_body(request: Request) -> bytes:
+    """
+    Read the request body, decompressing it per Content-Encoding.
+    
+    gzip and zstd are accepted. Both the body as sent and the decompressed
+    body are capped at max_request_body_bytes.
+    """
+    limit = settings.max_request_body_bytes
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding not in ("", "identity", "gzip", "zstd"):
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+    
+    body = await _read_raw(request, limit)
+    if encoding == "gzip":
+        return _gunzip(body, limit)
+    if encoding == "zstd":
+        return _unzstd(body, limit)
+    return body
+
+
+def is_columnar(request: Request) -> bool:
+    """Check whether the request carries a columnar event batch."""
+    content_type = request.headers.get("content-type", "")
+    return content_type.split(";", 1)[0].strip().lower() == COLUMNAR_CONTENT_TYPE
@@ -0,0 +1,215 @@
+"""Prometheus metrics for the hot paths of the API."""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "metering_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_DURATION = Histogram(
+    "metering_db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    buckets=FAST_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "metering_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "metering_db_time_per_request_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ["route"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "metering_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    buckets=FAST_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "metering_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "metering_db_pool_overflow",
+    "Connections open beyond the pool size",
+    ["pool"]
+)
+DB_REPLICA_LAG = Gauge(
+    "metering_db_replica_lag_seconds",
+    "Replication lag of each read replica when last checked",
+    ["pool"]
+)
+REDIS_COMMANDS = Counter(
+    "metering_redis_commands_total",
+    "Redis round trips by command (pipelines count once as PIPELINE)",
+    ["command"]
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "metering_redis_command_duration_seconds",
+    "Redis round-trip latency by command",
+    ["command"],
+    buckets=FAST_BUCKETS
+)
+REDIS_PIPELINE_SIZE = Histogram(
+    "metering_redis_pipeline_commands",
+    "Commands sent per Redis pipeline",
+    buckets=COUNT_BUCKETS
+)
+INGEST_BATCH_SIZE = Histogram(
+    "metering_ingest_batch_size",
+    "Events per batch ingest request",
+    buckets=(1, 10, 50, 100, 250, 500, 1000)
+)
+INGEST_STREAM_LENGTH = Gauge(
+    "metering_ingest_stream_length",
+    "Event batches waiting in the ingest stream"
+)
+ADMISSION_REJECTED = Counter(
+    "metering_admission_rejected_total",
+    "Ingest and validation requests rejected by admission control",
+    ["reason"]
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "metering_admission_queue_wait_seconds",
+    "Time admitted requests waited for an in-flight slot",
+    buckets=LATENCY_BUCKETS
+)
+RECONCILE_DRIFT_RATE = Gauge(
+    "metering_reconcile_last_drift_rate",
+    "Share of counters found drifting in the last reconciliation pass"
+)
+RECONCILE_CHECKED = Gauge(
+    "metering_reconcile_counters_checked",
+    "Counters compared by the reconciliation worker since Redis was reset"
+)
+RECONCILE_DRIFTED = Gauge(
+    "metering_reconcile_counters_drifted",
+    "Counters found drifting by the reconciliation worker since Redis was reset"
+)
+
+
+class RequestStats:
+    """Per-request database statistics."""
+    
+    __slots__ = ("db_queries", "db_time")
+    
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+# Set by MetricsMiddleware; threadpool dependencies inherit the context
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine, pool_name: str = "primary"):
+    """Record SQL statement timings and pool usage for an engine."""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+    
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_CHECKED_OUT.labels(pool_name).set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.labels(pool_name).set_function(lambda: max(0, pool.overflow()))
+
+
+def observe_redis(command: str, elapsed: float, pipeline_size: Optional[int] = None):
+    """Record one Redis round trip."""
+    REDIS_COMMANDS.labels(command).inc()
+    REDIS_COMMAND_DURATION.labels(command).observe(elapsed)
+    if pipeline_size is not None:
+        REDIS_PIPELINE_SIZE.observe(pipeline_size)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per route."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            # Use the route template so path parameters don't explode cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_path, str(status)).observe(
+                time.perf_counter() - started
+            )
+            DB_QUERIES_PER_REQUEST.labels(route_path).observe(stats.db_queries)
+            DB_TIME_PER_REQUEST.labels(route_path).observe(stats.db_time)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate across uvicorn/gunicorn worker processes
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
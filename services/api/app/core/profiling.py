@@ -0,0 +1,299 @@
+"""Opt-in request profiling for slow or explicitly flagged requests."""
+
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+API_KEY_HEADER = b"x-api-key"
+
+MAX_STACK_DEPTH = 64
+MAX_STACKS_REPORTED = 50
+
+# Whether a key hash belongs to an active admin key, with the time the
+# answer expires
+ADMIN_KEY_CACHE_SECONDS = 60
+MAX_ADMIN_KEYS_CACHED = 1000
+_admin_key_cache: Dict[str, Tuple[float, bool]] = {}
+
+
+class RequestProfile:
+    """Samples and SQL statements collected for one request."""
+    
+    __slots__ = (
+        "id", "method", "path", "trigger", "thread_id", "started",
+        "started_at", "sample_after", "stacks", "sample_count",
+        "statements", "statements_dropped"
+    )
+    
+    def __init__(self, method: str, path: str, trigger: str, sample_delay: float):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.sample_after = self.started + sample_delay
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self.statements: List[Dict[str, Any]] = []
+        self.statements_dropped = 0
+    
+    def add_statement(self, statement: str, elapsed: float):
+        """Record one SQL statement, up to profiling_max_statements."""
+        if len(self.statements) >= settings.profiling_max_statements:
+            self.statements_dropped += 1
+            return
+        self.statements.append({
+            "statement": statement,
+            "offset_ms": round((time.perf_counter() - self.started - elapsed) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3)
+        })
+    
+    def to_dict(self, status: int, duration: float) -> Dict[str, Any]:
+        """Build the stored profile."""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "sample_interval_ms": settings.profiling_sample_interval_ms,
+            "sample_count": self.sample_count,
+            "stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in self.stacks.most_common(MAX_STACKS_REPORTED)
+            ],
+            "sql_count": len(self.statements) + self.statements_dropped,
+            "sql_time_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+            "sql_statements": self.statements,
+            "sql_statements_dropped": self.statements_dropped
+        }
+
+
+# Set by ProfilingMiddleware while a request is being profiled
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def _collapse_stack(frame) -> str:
+    """Render a frame chain root-first as 'func (file:line);...'."""
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of profiled requests.
+    
+    The thread only wakes while a profiled request is in flight. Requests
+    share the event loop thread, so requests that overlap in time may
+    attribute each other's samples.
+    """
+    
+    def __init__(self):
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+    
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+    
+    def remove(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles.discard(profile)
+    
+    def _run(self):
+        interval = settings.profiling_sample_interval_ms / 1000
+        while True:
+            self._wakeup.clear()
+            if not self._profiles:
+                self._wakeup.wait()
+                continue
+            
+            time.sleep(interval)
+            now = time.perf_counter()
+            with self._lock:
+                due = [p for p in self._profiles if now >= p.sample_after]
+                if not due:
+                    continue
+                frames = sys._current_frames()
+                stacks = {}
+                for profile in due:
+                    frame = frames.get(profile.thread_id)
+                    if frame is None:
+                        continue
+                    stack = stacks.get(profile.thread_id)
+                    if stack is None:
+                        stack = stacks[profile.thread_id] = _collapse_stack(frame)
+                    profile.stacks[stack] += 1
+                    profile.sample_count += 1
+                del frames
+
+
+class ProfileBuffer:
+    """Bounded ring buffer of the most recent profiles in this process."""
+    
+    def __init__(self, size: int):
+        self._profiles = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def add(self, profile: Dict[str, Any]):
+        with self._lock:
+            self._profiles.append(profile)
+    
+    def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get profiles, newest first."""
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        return profiles[:limit] if limit else profiles
+    
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+profile_buffer = ProfileBuffer(settings.profiling_buffer_size)
+sampler = StackSampler()
+
+
+def instrument_engine(engine: Engine):
+    """Record SQL statements run by profiled requests."""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_profile.get() is not None:
+            conn.info["profile_started"] = time.perf_counter()
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        started = conn.info.pop("profile_started", None)
+        if profile is not None and started is not None:
+            profile.add_statement(statement, time.perf_counter() - started)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _query_admin_key(api_key: str) -> bool:
+    from app.core.database import create_session
+    from app.core.security import is_admin_api_key
+    
+    db = create_session()
+    try:
+        return is_admin_api_key(db, api_key)
+    finally:
+        db.close()
+
+
+async def _is_admin_request(scope) -> bool:
+    """
+    Check the request's API key is an active admin key.
+    
+    Answers are cached per key hash, so repeated X-Profile requests with an
+    unknown key do not reach the database; lookups run off the event loop.
+    """
+    from app.core.security import hash_api_key
+    
+    api_key = _header(scope, API_KEY_HEADER)
+    if not api_key:
+        return False
+    api_key = api_key.decode("latin-1")
+    key_hash = hash_api_key(api_key)
+    now = time.monotonic()
+    cached = _admin_key_cache.get(key_hash)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    is_admin = await run_in_threadpool(_query_admin_key, api_key)
+    if len(_admin_key_cache) >= MAX_ADMIN_KEYS_CACHED:
+        _admin_key_cache.clear()
+    _admin_key_cache[key_hash] = (now + ADMIN_KEY_CACHE_SECONDS, is_admin)
+    return is_admin
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware capturing profiles of selected requests.
+    
+    A request is profiled when an admin key sends ``X-Profile: 1``, or, with
+    profiling_slow_request_ms set, when it runs longer than that; sampling
+    for slow requests starts once the threshold has passed. Only added to
+    the app when profiling_enabled is set.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        threshold = settings.profiling_slow_request_ms / 1000
+        forced = _header(scope, PROFILE_HEADER) in (b"1", b"true") and await _is_admin_request(scope)
+        if not forced and threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+        
+        profile = RequestProfile(
+            scope["method"],
+            scope["path"],
+            "header" if forced else "threshold",
+            0.0 if forced else threshold
+        )
+        token = current_profile.set(profile)
+        sampler.add(profile)
+        status = 500
+        
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if forced:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER, profile.id.encode())
+                    ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.remove(profile)
+            current_profile.reset(token)
+            duration = time.perf_counter() - profile.started
+            if forced or duration >= threshold:
+                profile_buffer.add(profile.to_dict(status, duration))
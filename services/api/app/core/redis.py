@@ -1,9 +1,70 @@
 """Redis connection and client."""
 
+import time
 import redis.asyncio as aioredis
 from redis import Redis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
 from typing import Optional
 from app.config import settings
+from app.core.metrics import observe_redis
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline that records each execute as one round trip."""
+    
+    def execute(self, raise_on_error: bool = True):
+        size = len(self.command_stack)
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            observe_redis("PIPELINE", time.perf_counter() - started, size)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client that records command counts and latency."""
+    
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            observe_redis(str(args[0]).upper(), time.perf_counter() - started)
+    
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    """Async pipeline that records each execute as one round trip."""
+    
+    async def execute(self, raise_on_error: bool = True):
+        size = len(self.command_stack)
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis("PIPELINE", time.perf_counter() - started, size)
+
+
+class InstrumentedAsyncRedis(aioredis.Redis):
+    """Async Redis client that records command counts and latency."""
+    
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis(str(args[0]).upper(), time.perf_counter() - started)
+    
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> AsyncPipeline:
+        return InstrumentedAsyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 
 # Sync Redis client
 redis_client: Optional[Redis] = None
@@ -16,7 +77,8 @@ def get_redis() -> Redis:
     """Get synchronous Redis client."""
     global redis_client
     if redis_client is None:
-        redis_client = Redis.from_url(
+        client_class = InstrumentedRedis if settings.metrics_enabled else Redis
+        redis_client = client_class.from_url(
             settings.redis_url,
             decode_responses=True,
             max_connections=settings.redis_pool_size
@@ -28,7 +90,8 @@ async def get_async_redis() -> aioredis.Redis:
     """Get asynchronous Redis client."""
     global async_redis_client
     if async_redis_client is None:
-        async_redis_client = await aioredis.from_url(
+        client_class = InstrumentedAsyncRedis if settings.metrics_enabled else aioredis.Redis
+        async_redis_client = client_class.from_url(
             settings.redis_url,
             decode_responses=True,
             max_connections=settings.redis_pool_size
@@ -36,11 +99,17 @@ async def get_async_redis() -> aioredis.Redis:
     return async_redis_client
 
 
+async def close_async_redis():
+    """Close the async client; it is bound to the event loop it was used on."""
+    global async_redis_client
+    if async_redis_client:
+        await async_redis_client.aclose()
+        async_redis_client = None
+
+
 async def close_redis():
     """Close Redis connections."""
-    global redis_client, async_redis_client
     if redis_client:
         redis_client.close()
-    if async_redis_client:
-        await async_redis_client.close()
+    await close_async_redis()
 
@@ -18,6 +18,15 @@ def hash_api_key(api_key: str, algorithm: str = "sha256") -> str:
     raise ValueError(f"Unsupported algorithm: {algorithm}")
 
 
+def is_admin_api_key(db: Session, api_key: str) -> bool:
+    """Check whether an API key is active and flagged as admin."""
+    db_key = db.query(MeteringAPIKey).filter(
+        MeteringAPIKey.key_hash == hash_api_key(api_key),
+        MeteringAPIKey.is_active == True
+    ).first()
+    return bool(db_key and (db_key.key_metadata or {}).get("admin"))
+
+
 def validate_api_key(
     api_key: Optional[str] = Security(api_key_header),
     db: Session = Depends(get_db)
@@ -51,3 +60,17 @@ def validate_api_key(
     
     return api_key
 
+
+
+def validate_admin_api_key(
+    api_key: str = Depends(validate_api_key),
+    db: Session = Depends(get_db)
+) -> str:
+    """Validate that the API key is an admin key."""
+    if not is_admin_api_key(db, api_key):
+        raise HTTPException(
+            status_code=403,
+            detail="Admin API key required"
+        )
+    
+    return api_key
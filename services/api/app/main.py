@@ -1,13 +1,46 @@
-"""FastAPI application entry point."""
+"""FastAPI application entry point.
 
-from fastapi import FastAPI
+The schema is managed by Alembic (``alembic upgrade head``); importing the
+app opens no database or Redis connections.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1.router import api_router
-from app.core.database import Base, engine
+from app.core.database import dispose_engine, warm_up_pool
+from app.core.redis import get_redis, get_async_redis, close_redis
+from app.core import metrics, profiling
+from app.services.cache_service import AsyncCacheService
+from app.services.live_service import live_hub
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up():
+    """Open DB and Redis connections before the worker takes traffic."""
+    try:
+        warm_up_pool(settings.startup_warmup_connections)
+        get_redis().ping()
+        await (await get_async_redis()).ping()
+    except Exception:
+        # Not fatal: the health endpoint reports what is unreachable
+        logger.exception("Connection warm-up failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up connections on worker startup and close them on shutdown."""
+    if settings.startup_warmup_connections > 0:
+        await warm_up()
+    yield
+    await live_hub.close()
+    await close_redis()
+    dispose_engine()
 
-# Create database tables (in production, use Alembic migrations)
-Base.metadata.create_all(bind=engine)
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,7 +48,9 @@ app = FastAPI(
     description="Dynamic API-Driven Metering Framework",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -27,6 +62,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics middleware
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Profiling middleware
+if settings.profiling_enabled:
+    app.add_middleware(profiling.ProfilingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/v1")
 
@@ -40,3 +83,22 @@ async def root():
         "docs": "/docs"
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics endpoint."""
+    # Reconciliation and ingest workers run in their own processes and
+    # report through Redis
+    try:
+        stats = await AsyncCacheService.get_reconcile_stats()
+        metrics.RECONCILE_DRIFT_RATE.set(float(stats.get("last_drift_rate", 0)))
+        metrics.RECONCILE_CHECKED.set(int(stats.get("checked", 0)))
+        metrics.RECONCILE_DRIFTED.set(int(stats.get("drifted", 0)))
+        if settings.ingest_mode == "stream":
+            metrics.INGEST_STREAM_LENGTH.set(await AsyncCacheService.get_ingest_backlog())
+    except Exception:
+        # Still serve the in-process metrics
+        logger.exception("Failed to read worker metrics from Redis")
+    
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,6 +1,6 @@
 """SQLAlchemy database models."""
 
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, JSON, CheckConstraint
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON, CheckConstraint, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -39,6 +39,8 @@ class MeteringAggregate(Base):
     window_type = Column(String(20), nullable=False, index=True)  # hourly, daily, monthly
     total_quantity = Column(Integer, nullable=False, default=0)
     event_count = Column(Integer, nullable=False, default=0)
+    # Variance of total_quantity from SDK-sampled events; NULL when none were sampled
+    sampling_variance = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now(), onupdate=func.now())
     
@@ -47,6 +49,31 @@ class MeteringAggregate(Base):
     )
 
 
+class MeteringDistinctCount(Base):
+    """Distinct-value sketch of an event metadata key for an aggregate window."""
+    __tablename__ = "metering_distinct_counts"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(255), nullable=False, index=True)
+    resource = Column(String(255), nullable=False)
+    feature = Column(String(255), nullable=False)
+    metadata_key = Column(String(255), nullable=False)
+    window_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    window_type = Column(String(20), nullable=False)  # hourly, daily, monthly
+    estimate = Column(Integer, nullable=False, default=0)
+    sketch = Column(LargeBinary, nullable=False)  # Redis DUMP of the HyperLogLog
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint(
+            'tenant_id', 'resource', 'feature', 'metadata_key', 'window_type', 'window_start',
+            name='uq_distinct_count_window'
+        ),
+        {'extend_existing': True}
+    )
+
+
 class MeteringQuota(Base):
     """Quota configuration model."""
     __tablename__ = "metering_quotas"
@@ -1,8 +1,8 @@
 """Pydantic request/response schemas."""
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, model_validator
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Annotated
 from uuid import UUID
 
 
@@ -20,6 +20,49 @@ class EventCreate(BaseModel):
 class EventBatchCreate(BaseModel):
     """Schema for batch event creation."""
     events: List[EventCreate] = Field(..., min_items=1, max_items=1000)
+    batch_token: Optional[str] = Field(None, max_length=255)  # Echoed back in the ack
+
+
+ColumnarName = Annotated[str, Field(min_length=1, max_length=255)]
+
+
+class EventBatchColumnar(BaseModel):
+    """
+    Schema for a column-oriented event batch.
+    
+    Tenants, resources and features are dictionary-encoded: each event
+    refers to them by index. Timestamps are epoch milliseconds (UTC) and
+    default to the time of ingestion.
+    """
+    tenants: List[ColumnarName] = Field(..., min_items=1)
+    resources: List[ColumnarName] = Field(..., min_items=1)
+    features: List[ColumnarName] = Field(..., min_items=1)
+    tenant_idx: List[int] = Field(..., min_items=1, max_items=1000)
+    resource_idx: List[int]
+    feature_idx: List[int]
+    quantities: List[Annotated[int, Field(gt=0)]]
+    timestamps: Optional[List[int]] = None
+    metadata: Optional[List[Optional[Dict[str, Any]]]] = None
+    batch_token: Optional[str] = Field(None, max_length=255)
+    
+    @model_validator(mode="after")
+    def check_columns(self):
+        """Check columns have one entry per event and indices are in range."""
+        count = len(self.tenant_idx)
+        for name in ("resource_idx", "feature_idx", "quantities", "timestamps", "metadata"):
+            column = getattr(self, name)
+            if column is not None and len(column) != count:
+                raise ValueError(f"{name} has {len(column)} entries, expected {count}")
+        
+        for name, dictionary in (
+            ("tenant_idx", self.tenants),
+            ("resource_idx", self.resources),
+            ("feature_idx", self.features)
+        ):
+            column = getattr(self, name)
+            if min(column) < 0 or max(column) >= len(dictionary):
+                raise ValueError(f"{name} refers outside its dictionary of {len(dictionary)}")
+        return self
 
 
 class Event(BaseModel):
@@ -84,6 +127,11 @@ class Aggregate(BaseModel):
     window_type: str
     total_quantity: int
     event_count: int
+    # Estimated distinct values per DISTINCT_METADATA_KEYS entry (HyperLogLog,
+    # about 0.81% standard error); omitted when none are configured
+    distinct: Optional[Dict[str, int]] = None
+    # Standard error of total_quantity when it includes SDK-sampled events
+    estimated_error: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -95,6 +143,26 @@ class AggregateResponse(BaseModel):
     summary: Dict[str, Any]
 
 
+# Heavy Hitter Schemas
+class TopItem(BaseModel):
+    """Schema for a heavy hitter; tenant_id or resource and feature per dimension."""
+    tenant_id: Optional[str] = None
+    resource: Optional[str] = None
+    feature: Optional[str] = None
+    quantity: int
+    error: int  # quantity - error <= true usage <= quantity
+
+
+class TopResponse(BaseModel):
+    """Schema for top tenants or features in a window."""
+    dimension: str
+    period: str
+    window_start: datetime
+    total: int
+    max_error: int  # Bounds every error, and the usage of anything not listed
+    items: List[TopItem]
+
+
 # Quota Schemas
 class QuotaValidationRequest(BaseModel):
     """Schema for quota validation request."""
@@ -116,6 +184,68 @@ class QuotaValidationResult(BaseModel):
     message: Optional[str] = None
 
 
+class QuotaBatchValidationRequest(BaseModel):
+    """Schema for validating several quotas in one call."""
+    requests: List[QuotaValidationRequest] = Field(..., min_items=1, max_items=100)
+    all_or_nothing: bool = False
+
+
+class QuotaBatchValidationResult(BaseModel):
+    """Schema for batch quota validation response."""
+    allowed: bool
+    results: List[QuotaValidationResult]
+
+
+class QuotaUsage(BaseModel):
+    """Schema for current usage against one quota."""
+    resource: Optional[str] = None  # None: the quota covers every resource
+    feature: str
+    period: str
+    limit: int
+    current_usage: int
+    remaining: int
+    alert_threshold: int
+    exceeded: bool
+    reset_at: datetime
+
+
+class TenantUsageSnapshot(BaseModel):
+    """Schema for a tenant's usage against all of its active quotas."""
+    tenant_id: str
+    generated_at: datetime
+    quotas: List[QuotaUsage]
+
+
+class QuotaLeaseRequest(BaseModel):
+    """Schema for leasing a slice of remaining quota."""
+    tenant_id: str
+    resource: str
+    feature: str
+    period: str = Field(..., pattern="^(hourly|daily|monthly|yearly)$")
+    requested: int = Field(..., gt=0)
+    ttl_seconds: int = Field(default=30, gt=0)
+
+
+class QuotaLease(BaseModel):
+    """Schema for a granted quota lease."""
+    lease_id: str
+    granted: int
+    limit: int
+    period: str
+    unlimited: bool = False
+    ttl_seconds: int
+    expires_at: datetime
+
+
+class QuotaLeaseRelease(BaseModel):
+    """Schema for returning a lease before it expires."""
+    lease_id: str
+    tenant_id: str
+    resource: str
+    feature: str
+    period: str = Field(..., pattern="^(hourly|daily|monthly|yearly)$")
+
+
 class QuotaCreate(BaseModel):
     """Schema for creating a quota."""
     tenant_id: str
@@ -143,6 +273,42 @@ class Quota(BaseModel):
         from_attributes = True
 
 
+# Profiling Schemas
+class ProfileStack(BaseModel):
+    """Schema for one sampled call stack, root first."""
+    stack: str
+    samples: int
+
+
+class ProfileStatement(BaseModel):
+    """Schema for one SQL statement run by a profiled request."""
+    statement: str
+    offset_ms: float
+    duration_ms: float
+
+
+class ProfileSummary(BaseModel):
+    """Schema for a profiled request without its samples."""
+    id: str
+    method: str
+    path: str
+    status: int
+    trigger: str
+    started_at: datetime
+    duration_ms: float
+    sample_count: int
+    sql_count: int
+    sql_time_ms: float
+
+
+class Profile(ProfileSummary):
+    """Schema for a full request profile."""
+    sample_interval_ms: int
+    stacks: List[ProfileStack]
+    sql_statements: List[ProfileStatement]
+    sql_statements_dropped: int
+
+
 # Health Check Schema
 class HealthResponse(BaseModel):
     """Schema for health check response."""
@@ -1,11 +1,17 @@
 """Repository for aggregate database operations."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import func
 from app.models.database import MeteringAggregate
 
+# Columns of the aggregate response, in response field order
+AGGREGATE_FIELDS = (
+    "tenant_id", "resource", "feature", "window_start", "window_end",
+    "window_type", "total_quantity", "event_count"
+)
+
 
 class AggregateRepository:
     """Repository for aggregate operations."""
@@ -20,7 +26,8 @@ class AggregateRepository:
         window_end: datetime,
         window_type: str,
         total_quantity: int,
-        event_count: int
+        event_count: int,
+        sampling_variance: Optional[float] = None
     ) -> MeteringAggregate:
         """Create or update an aggregate."""
         aggregate = db.query(MeteringAggregate).filter(
@@ -35,6 +42,7 @@ class AggregateRepository:
         if aggregate:
             aggregate.total_quantity = total_quantity
             aggregate.event_count = event_count
+            aggregate.sampling_variance = sampling_variance
         else:
             aggregate = MeteringAggregate(
                 tenant_id=tenant_id,
@@ -44,7 +52,8 @@ class AggregateRepository:
                 window_end=window_end,
                 window_type=window_type,
                 total_quantity=total_quantity,
-                event_count=event_count
+                event_count=event_count,
+                sampling_variance=sampling_variance
             )
             db.add(aggregate)
         
@@ -53,7 +62,50 @@ class AggregateRepository:
         return aggregate
     
     @staticmethod
-    def get_aggregates(
+    def add_to_windows(
+        db: Session,
+        deltas: Dict[Tuple[str, str, str, str, datetime, datetime], List]
+    ):
+        """
+        Add usage to stored aggregates, creating those that do not exist.
+        
+        deltas maps (tenant_id, resource, feature, window_type, window_start,
+        window_end) to [quantity, event count, sampling variance or None].
+        """
+        for (tenant_id, resource, feature, window_type, window_start, window_end), (
+            quantity, event_count, sampling_variance
+        ) in deltas.items():
+            updated = db.query(MeteringAggregate).filter(
+                MeteringAggregate.tenant_id == tenant_id,
+                MeteringAggregate.resource == resource,
+                MeteringAggregate.feature == feature,
+                MeteringAggregate.window_start == window_start,
+                MeteringAggregate.window_end == window_end,
+                MeteringAggregate.window_type == window_type
+            ).update({
+                MeteringAggregate.total_quantity: MeteringAggregate.total_quantity + quantity,
+                MeteringAggregate.event_count: MeteringAggregate.event_count + event_count,
+                MeteringAggregate.sampling_variance: (
+                    func.coalesce(MeteringAggregate.sampling_variance, 0) + sampling_variance
+                    if sampling_variance is not None else MeteringAggregate.sampling_variance
+                )
+            }, synchronize_session=False)
+            if not updated:
+                db.add(MeteringAggregate(
+                    tenant_id=tenant_id,
+                    resource=resource,
+                    feature=feature,
+                    window_start=window_start,
+                    window_end=window_end,
+                    window_type=window_type,
+                    total_quantity=quantity,
+                    event_count=event_count,
+                    sampling_variance=sampling_variance
+                ))
+        db.commit()
+    
+    @staticmethod
+    def get_aggregate_rows(
         db: Session,
         tenant_id: Optional[str],
         resource: Optional[str],
@@ -61,9 +113,12 @@ class AggregateRepository:
         window_type: str,
         start_date: datetime,
         end_date: datetime
-    ) -> List[MeteringAggregate]:
-        """Get aggregates with filters."""
-        query = db.query(MeteringAggregate).filter(
+    ) -> List[tuple]:
+        """Get aggregates as plain column tuples (AGGREGATE_FIELDS, then sampling_variance)."""
+        query = db.query(
+            *(getattr(MeteringAggregate, field) for field in AGGREGATE_FIELDS),
+            MeteringAggregate.sampling_variance
+        ).filter(
             MeteringAggregate.window_type == window_type,
             MeteringAggregate.window_start >= start_date,
             MeteringAggregate.window_end <= end_date
@@ -0,0 +1,103 @@
+"""Repository for distinct count sketch operations."""
+
+from typing import List, Optional, Dict, Iterable
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.database import MeteringDistinctCount
+
+
+class DistinctRepository:
+    """Repository for distinct count operations."""
+    
+    @staticmethod
+    def get_sketches(
+        db: Session,
+        tenant_ids: Iterable[str],
+        window_types: List[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[tuple]:
+        """
+        Get stored sketches in [start_date, end_date] for some window types.
+        
+        Returns (tenant_id, resource, feature, metadata_key, window_type,
+        window_start, sketch) tuples.
+        """
+        return db.query(
+            MeteringDistinctCount.tenant_id,
+            MeteringDistinctCount.resource,
+            MeteringDistinctCount.feature,
+            MeteringDistinctCount.metadata_key,
+            MeteringDistinctCount.window_type,
+            MeteringDistinctCount.window_start,
+            MeteringDistinctCount.sketch
+        ).filter(
+            MeteringDistinctCount.tenant_id.in_(set(tenant_ids)),
+            MeteringDistinctCount.window_type.in_(window_types),
+            MeteringDistinctCount.window_start >= start_date,
+            MeteringDistinctCount.window_start <= end_date
+        ).all()
+    
+    @staticmethod
+    def save_sketches(db: Session, window_type: str, window_start: datetime, sketches: List[dict]):
+        """
+        Create or update the sketches of one window.
+        
+        Each sketch is a dict with tenant_id, resource, feature,
+        metadata_key, estimate and sketch.
+        """
+        if not sketches:
+            return
+        existing = {
+            (row.tenant_id, row.resource, row.feature, row.metadata_key): row
+            for row in db.query(MeteringDistinctCount).filter(
+                MeteringDistinctCount.tenant_id.in_({sketch["tenant_id"] for sketch in sketches}),
+                MeteringDistinctCount.window_type == window_type,
+                MeteringDistinctCount.window_start == window_start
+            )
+        }
+        
+        for sketch in sketches:
+            row = existing.get((sketch["tenant_id"], sketch["resource"], sketch["feature"], sketch["metadata_key"]))
+            if row:
+                row.estimate = sketch["estimate"]
+                row.sketch = sketch["sketch"]
+            else:
+                db.add(MeteringDistinctCount(window_type=window_type, window_start=window_start, **sketch))
+        db.commit()
+    
+    @staticmethod
+    def get_estimates(
+        db: Session,
+        tenant_id: Optional[str],
+        resource: Optional[str],
+        feature: Optional[str],
+        window_type: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[tuple, Dict[str, int]]:
+        """Get estimates per metadata key, keyed by (tenant, resource, feature, window start)."""
+        query = db.query(
+            MeteringDistinctCount.tenant_id,
+            MeteringDistinctCount.resource,
+            MeteringDistinctCount.feature,
+            MeteringDistinctCount.window_start,
+            MeteringDistinctCount.metadata_key,
+            MeteringDistinctCount.estimate
+        ).filter(
+            MeteringDistinctCount.window_type == window_type,
+            MeteringDistinctCount.window_start >= start_date,
+            MeteringDistinctCount.window_start <= end_date
+        )
+        
+        if tenant_id:
+            query = query.filter(MeteringDistinctCount.tenant_id == tenant_id)
+        if resource:
+            query = query.filter(MeteringDistinctCount.resource == resource)
+        if feature:
+            query = query.filter(MeteringDistinctCount.feature == feature)
+        
+        estimates: Dict[tuple, Dict[str, int]] = {}
+        for tenant, row_resource, row_feature, window_start, metadata_key, estimate in query:
+            estimates.setdefault((tenant, row_resource, row_feature, window_start), {})[metadata_key] = estimate
+        return estimates
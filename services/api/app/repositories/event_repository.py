@@ -1,12 +1,26 @@
 """Repository for event database operations."""
 
-from typing import List, Optional
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, case, func, insert
 from app.models.database import MeteringEvent
 from app.models.schemas import EventFilters, Pagination
 
+# Columns of the event list response, in response field order
+EVENT_FIELDS = ("id", "tenant_id", "resource", "feature", "quantity", "timestamp", "metadata", "created_at")
+EVENT_COLUMNS = (
+    MeteringEvent.id,
+    MeteringEvent.tenant_id,
+    MeteringEvent.resource,
+    MeteringEvent.feature,
+    MeteringEvent.quantity,
+    MeteringEvent.timestamp,
+    MeteringEvent.event_metadata,
+    MeteringEvent.created_at
+)
+
 
 class EventRepository:
     """Repository for event operations."""
@@ -17,16 +31,21 @@ class EventRepository:
         event = MeteringEvent(**event_data)
         db.add(event)
         db.commit()
-        db.refresh(event)
         return event
     
     @staticmethod
-    def create_batch(db: Session, events_data: List[dict]) -> List[MeteringEvent]:
-        """Create multiple events in batch."""
-        events = [MeteringEvent(**event_data) for event_data in events_data]
-        db.bulk_save_objects(events)
+    def create_batch(db: Session, events_data: List[dict]):
+        """Create multiple events in one multi-row insert."""
+        db.execute(insert(MeteringEvent), events_data)
         db.commit()
-        return events
+    
+    @staticmethod
+    def get_existing_ids(db: Session, event_ids: List[uuid.UUID]) -> Set[uuid.UUID]:
+        """Get the ids among event_ids that are already stored."""
+        if not event_ids:
+            return set()
+        rows = db.query(MeteringEvent.id).filter(MeteringEvent.id.in_(event_ids)).all()
+        return {row[0] for row in rows}
     
     @staticmethod
     def get_by_id(db: Session, event_id: str) -> Optional[MeteringEvent]:
@@ -34,15 +53,8 @@ class EventRepository:
         return db.query(MeteringEvent).filter(MeteringEvent.id == event_id).first()
     
     @staticmethod
-    def get_all(
-        db: Session,
-        filters: EventFilters,
-        pagination: Pagination
-    ) -> tuple[List[MeteringEvent], int]:
-        """Get events with filters and pagination."""
-        query = db.query(MeteringEvent)
-        
-        # Apply filters
+    def _filter(query, filters: EventFilters):
+        """Apply event filters to a query."""
         if filters.tenant_id:
             query = query.filter(MeteringEvent.tenant_id == filters.tenant_id)
         if filters.resource:
@@ -53,15 +65,98 @@ class EventRepository:
             query = query.filter(MeteringEvent.timestamp >= filters.start_date)
         if filters.end_date:
             query = query.filter(MeteringEvent.timestamp <= filters.end_date)
+        return query
+    
+    @staticmethod
+    def count(db: Session, filters: EventFilters) -> int:
+        """Count the events matching filters."""
+        return EventRepository._filter(db.query(func.count(MeteringEvent.id)), filters).scalar()
+    
+    @staticmethod
+    def get_latest_rows(
+        db: Session,
+        filters: EventFilters,
+        limit: int,
+        offset: int = 0
+    ) -> List[tuple]:
+        """Get matching events as column tuples (see EVENT_FIELDS), newest first."""
+        return EventRepository._filter(db.query(*EVENT_COLUMNS), filters).order_by(
+            MeteringEvent.timestamp.desc()
+        ).offset(offset).limit(limit).all()
+    
+    @staticmethod
+    def get_rows(
+        db: Session,
+        filters: EventFilters,
+        pagination: Pagination
+    ) -> tuple[List[tuple], int]:
+        """Get events as plain column tuples (see EVENT_FIELDS) with pagination."""
+        total = EventRepository.count(db, filters)
         
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
         offset = (pagination.page - 1) * pagination.page_size
-        events = query.order_by(MeteringEvent.timestamp.desc()).offset(offset).limit(pagination.page_size).all()
+        rows = EventRepository.get_latest_rows(db, filters, pagination.page_size, offset)
+        
+        return rows, total
+    
+    @staticmethod
+    def get_oldest_timestamp(db: Session) -> Optional[datetime]:
+        """Get the timestamp of the oldest stored event."""
+        return db.query(func.min(MeteringEvent.timestamp)).scalar()
+    
+    @staticmethod
+    def get_tenants_between(db: Session, start: datetime, end: datetime) -> List[str]:
+        """Get the tenants with events in [start, end)."""
+        rows = db.query(MeteringEvent.tenant_id).filter(
+            MeteringEvent.timestamp >= start,
+            MeteringEvent.timestamp < end
+        ).distinct().all()
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def _archive_range(query, tenant_id: str, start: datetime, end: datetime, created_before: datetime):
+        """Restrict a query to one tenant's events in [start, end) stored by created_before."""
+        return query.filter(
+            MeteringEvent.tenant_id == tenant_id,
+            MeteringEvent.timestamp >= start,
+            MeteringEvent.timestamp < end,
+            MeteringEvent.created_at <= created_before
+        )
+    
+    @staticmethod
+    def iter_range_rows(
+        db: Session,
+        tenant_id: str,
+        start: datetime,
+        end: datetime,
+        created_before: datetime,
+        batch_size: int
+    ) -> Iterator[List[tuple]]:
+        """
+        Stream one tenant's events in [start, end) as column tuples, oldest first.
         
-        return events, total
+        Rows are fetched batch_size at a time (a server-side cursor on
+        PostgreSQL), so a partition never has to fit in memory.
+        """
+        query = EventRepository._archive_range(
+            db.query(*EVENT_COLUMNS), tenant_id, start, end, created_before
+        ).order_by(MeteringEvent.timestamp)
+        result = db.execute(query.statement.execution_options(yield_per=batch_size))
+        yield from result.partitions()
+    
+    @staticmethod
+    def delete_range(
+        db: Session,
+        tenant_id: str,
+        start: datetime,
+        end: datetime,
+        created_before: datetime
+    ) -> int:
+        """Delete the events iter_range_rows streamed for the same arguments."""
+        deleted = EventRepository._archive_range(
+            db.query(MeteringEvent), tenant_id, start, end, created_before
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
     
     @staticmethod
     def get_usage_summary(
@@ -86,4 +181,77 @@ class EventRepository:
         
         result = query.scalar()
         return result or 0
-
+    
+    @staticmethod
+    def get_usage_by_feature(
+        db: Session,
+        tenant_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        stored_after: Optional[datetime] = None
+    ) -> List[tuple]:
+        """
+        Get total usage per resource/feature for a tenant in a time range.
+        
+        With stored_after, rows also carry recent_quantity, the part of the
+        total from events stored after that time.
+        """
+        columns = [
+            MeteringEvent.resource,
+            MeteringEvent.feature,
+            func.sum(MeteringEvent.quantity).label('total_quantity')
+        ]
+        if stored_after is not None:
+            columns.append(func.sum(case(
+                (MeteringEvent.created_at > stored_after, MeteringEvent.quantity),
+                else_=0
+            )).label('recent_quantity'))
+        return db.query(*columns).filter(
+            MeteringEvent.tenant_id == tenant_id,
+            MeteringEvent.timestamp >= start_date,
+            MeteringEvent.timestamp <= end_date
+        ).group_by(
+            MeteringEvent.resource,
+            MeteringEvent.feature
+        ).all()
+    
+    @staticmethod
+    def get_usage_by_windows(
+        db: Session,
+        tenant_id: str,
+        features: Iterable[str],
+        windows: Dict[str, Tuple[datetime, datetime]]
+    ) -> Dict[Tuple[str, str, str], int]:
+        """
+        Get a tenant's usage per resource/feature in several windows at once.
+        
+        windows maps a period to its (start, end); one grouped query sums
+        each window with a conditional column. Returns usage keyed by
+        (resource, feature, period); absent keys had no usage.
+        """
+        periods = list(windows)
+        if not periods:
+            return {}
+        
+        sums = [
+            func.sum(case(
+                (and_(MeteringEvent.timestamp >= start, MeteringEvent.timestamp <= end), MeteringEvent.quantity),
+                else_=0
+            ))
+            for start, end in windows.values()
+        ]
+        rows = db.query(MeteringEvent.resource, MeteringEvent.feature, *sums).filter(
+            MeteringEvent.tenant_id == tenant_id,
+            MeteringEvent.feature.in_(set(features)),
+            MeteringEvent.timestamp >= min(start for start, _ in windows.values()),
+            MeteringEvent.timestamp <= max(end for _, end in windows.values())
+        ).group_by(
+            MeteringEvent.resource,
+            MeteringEvent.feature
+        ).all()
+        
+        return {
+            (resource, feature, period): int(total or 0)
+            for resource, feature, *totals in rows
+            for period, total in zip(periods, totals)
+        }
@@ -1,6 +1,6 @@
 """Repository for quota database operations."""
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
 from app.models.database import MeteringQuota
 
@@ -27,6 +27,39 @@ class QuotaRepository:
         
         return query.first()
     
+    @staticmethod
+    def get_by_tenant_features(
+        db: Session,
+        lookups: List[Tuple[str, str, Optional[str]]]
+    ) -> List[Optional[MeteringQuota]]:
+        """
+        Get quotas for several (tenant_id, feature, resource) lookups.
+        
+        Uses a single query and matches like get_by_tenant_feature; results
+        are returned in lookup order.
+        """
+        if not lookups:
+            return []
+        
+        quotas = db.query(MeteringQuota).filter(
+            MeteringQuota.tenant_id.in_({tenant_id for tenant_id, _, _ in lookups}),
+            MeteringQuota.feature.in_({feature for _, feature, _ in lookups}),
+            MeteringQuota.is_active == True
+        ).all()
+        
+        results = []
+        for tenant_id, feature, resource in lookups:
+            results.append(next(
+                (
+                    quota for quota in quotas
+                    if quota.tenant_id == tenant_id
+                    and quota.feature == feature
+                    and (not resource or quota.resource == resource)
+                ),
+                None
+            ))
+        return results
+    
     @staticmethod
     def create(db: Session, quota_data: dict) -> MeteringQuota:
         """Create a new quota."""
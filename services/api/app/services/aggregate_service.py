@@ -1,30 +1,53 @@
 """Service for aggregation operations."""
 
-from typing import List, Optional
+import math
+from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.schemas import Aggregate, AggregateFilters, AggregateResponse
-from app.models.database import MeteringEvent, MeteringAggregate
-from app.repositories.aggregate_repository import AggregateRepository
-from app.services.cache_service import CacheService
+from sqlalchemy import case, func
+from app.config import settings
+from app.models.schemas import AggregateFilters
+from app.models.database import MeteringEvent
+from app.repositories.aggregate_repository import AggregateRepository, AGGREGATE_FIELDS
+from app.repositories.distinct_repository import DistinctRepository
+from app.services.archive_service import archive_boundary
+from app.services.cache_service import AsyncCacheService
+from app.services.distinct_service import DistinctService
 from app.utils.time_utils import get_time_window
 
+# Aggregate window types from finest to coarsest
+WINDOW_ORDER = {"hourly": 0, "daily": 1, "monthly": 2}
+
+# Event metadata key set by SDK sampling: the probability p the call was
+# recorded with, its quantity already scaled by 1/p
+SAMPLE_RATE_KEY = "sample_rate"
+
+
+def _estimated_error(sampling_variance: Optional[float]) -> Optional[float]:
+    """Standard error of a total from its sampling variance."""
+    if sampling_variance is None:
+        return None
+    return round(math.sqrt(sampling_variance), 2)
+
 
 class AggregateService:
     """Service for aggregate business logic."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.db = db
+        # Stored aggregates are read from here, a replica when configured
+        self.read_db = read_db or db
         self.aggregate_repo = AggregateRepository()
-        self.cache_service = CacheService()
+        self.distinct_repo = DistinctRepository()
+        self.cache_service = AsyncCacheService()
+        self.distinct_service = DistinctService(db)
     
     async def compute_aggregates(
         self,
         window_type: str,
         start_date: datetime,
         end_date: datetime
-    ) -> List[Aggregate]:
+    ) -> List[Dict[str, Any]]:
         """Compute aggregates for a time window."""
         # Query raw events and group by tenant/resource/feature/window
         # This is a simplified version - in production, you'd want to batch process
@@ -34,51 +57,10 @@ class AggregateService:
         
         while current_date < end_date:
             window_start, window_end = get_time_window(current_date, window_type)
-            
-            # Query events in this window
-            query = self.db.query(
-                MeteringEvent.tenant_id,
-                MeteringEvent.resource,
-                MeteringEvent.feature,
-                func.sum(MeteringEvent.quantity).label('total_quantity'),
-                func.count(MeteringEvent.id).label('event_count')
-            ).filter(
-                MeteringEvent.timestamp >= window_start,
-                MeteringEvent.timestamp <= window_end
-            ).group_by(
-                MeteringEvent.tenant_id,
-                MeteringEvent.resource,
-                MeteringEvent.feature
+            aggregates.extend(
+                await self._compute_window(window_type, window_start, window_end)
             )
             
-            results = query.all()
-            
-            for result in results:
-                aggregate = self.aggregate_repo.create_or_update(
-                    self.db,
-                    result.tenant_id,
-                    result.resource,
-                    result.feature,
-                    window_start,
-                    window_end,
-                    window_type,
-                    int(result.total_quantity or 0),
-                    int(result.event_count or 0)
-                )
-                
-                # Cache the aggregate
-                self.cache_service.set_aggregate(
-                    result.tenant_id,
-                    result.resource,
-                    result.feature,
-                    window_type,
-                    window_start,
-                    aggregate.total_quantity,
-                    aggregate.event_count
-                )
-                
-                aggregates.append(Aggregate.from_orm(aggregate))
-            
             # Move to next window
             if window_type == "hourly":
                 current_date = window_end + datetime.resolution
@@ -92,14 +74,114 @@ class AggregateService:
         
         return aggregates
     
+    async def _compute_window(
+        self,
+        window_type: str,
+        window_start: datetime,
+        window_end: datetime,
+        tenant_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Compute and store aggregates for a single window."""
+        # Query events in this window. A sampled event of scaled quantity q
+        # recorded with probability p adds q^2 * (1 - p) to the variance of
+        # the total (Horvitz-Thompson); unsampled events add none
+        sample_rate = MeteringEvent.event_metadata[SAMPLE_RATE_KEY].as_float()
+        query = self.db.query(
+            MeteringEvent.tenant_id,
+            MeteringEvent.resource,
+            MeteringEvent.feature,
+            func.sum(MeteringEvent.quantity).label('total_quantity'),
+            func.count(MeteringEvent.id).label('event_count'),
+            func.sum(case(
+                (sample_rate < 1, MeteringEvent.quantity * MeteringEvent.quantity * (1 - sample_rate)),
+                else_=None
+            )).label('sampling_variance')
+        ).filter(
+            MeteringEvent.timestamp >= window_start,
+            MeteringEvent.timestamp <= window_end
+        )
+        
+        if tenant_id:
+            query = query.filter(MeteringEvent.tenant_id == tenant_id)
+        
+        results = query.group_by(
+            MeteringEvent.tenant_id,
+            MeteringEvent.resource,
+            MeteringEvent.feature
+        ).all()
+        
+        aggregates = []
+        for result in results:
+            aggregate = self.aggregate_repo.create_or_update(
+                self.db,
+                result.tenant_id,
+                result.resource,
+                result.feature,
+                window_start,
+                window_end,
+                window_type,
+                int(result.total_quantity or 0),
+                int(result.event_count or 0),
+                result.sampling_variance
+            )
+            row = {field: getattr(aggregate, field) for field in AGGREGATE_FIELDS}
+            row["estimated_error"] = _estimated_error(aggregate.sampling_variance)
+            aggregates.append(row)
+        
+        # Cache the window's aggregates in one round trip
+        await self.cache_service.set_aggregates(window_type, window_start, aggregates)
+        
+        if settings.distinct_metadata_keys:
+            estimates = await self.distinct_service.rollup(
+                window_type,
+                window_start,
+                window_end,
+                [(a["tenant_id"], a["resource"], a["feature"]) for a in aggregates]
+            )
+            for aggregate in aggregates:
+                aggregate["distinct"] = estimates.get(
+                    (aggregate["tenant_id"], aggregate["resource"], aggregate["feature"]), {}
+                )
+        return aggregates
+    
+    async def recompute_windows(
+        self,
+        windows: List[Tuple[str, str, datetime]]
+    ) -> int:
+        """
+        Recompute aggregates for (tenant, window type, window start) entries.
+        
+        Used for windows that received late or backdated events after they
+        closed; only the affected tenant's rows in those windows are rebuilt.
+        Windows in archived months are skipped: their events are no longer
+        in the database, and ingest adds late events to them directly.
+        """
+        count = 0
+        archived_before = archive_boundary(datetime.utcnow()) if settings.archive_path else None
+        # Finer windows first, so distinct counts roll up from fresh sketches
+        windows = sorted(windows, key=lambda window: WINDOW_ORDER.get(window[1], len(WINDOW_ORDER)))
+        for tenant_id, window_type, window_start in windows:
+            window_start, window_end = get_time_window(window_start, window_type)
+            if archived_before is not None and window_start < archived_before:
+                continue
+            count += len(
+                await self._compute_window(window_type, window_start, window_end, tenant_id)
+            )
+        return count
+    
     async def get_aggregates(
         self,
         filters: AggregateFilters
-    ) -> AggregateResponse:
-        """Get aggregates with filters."""
+    ) -> Dict[str, Any]:
+        """
+        Get aggregates with filters.
+        
+        Returns the AggregateResponse shape as plain dicts, ready for
+        ORJSONResponse.
+        """
         # Try to get from database first
-        aggregates = self.aggregate_repo.get_aggregates(
-            self.db,
+        rows = self.aggregate_repo.get_aggregate_rows(
+            self.read_db,
             filters.tenant_id,
             filters.resource,
             filters.feature,
@@ -109,35 +191,53 @@ class AggregateService:
         )
         
         # If no aggregates found, compute on-the-fly
-        if not aggregates:
-            aggregates_list = await self.compute_aggregates(
+        if not rows:
+            aggregates = await self.compute_aggregates(
                 filters.window_type,
                 filters.start_date,
                 filters.end_date
             )
             # Filter the computed aggregates
             if filters.tenant_id:
-                aggregates_list = [a for a in aggregates_list if a.tenant_id == filters.tenant_id]
+                aggregates = [a for a in aggregates if a["tenant_id"] == filters.tenant_id]
             if filters.resource:
-                aggregates_list = [a for a in aggregates_list if a.resource == filters.resource]
+                aggregates = [a for a in aggregates if a["resource"] == filters.resource]
             if filters.feature:
-                aggregates_list = [a for a in aggregates_list if a.feature == filters.feature]
-            
-            return AggregateResponse(
-                aggregates=aggregates_list,
-                summary={
-                    "total_quantity": sum(a.total_quantity for a in aggregates_list),
-                    "total_events": sum(a.event_count for a in aggregates_list)
-                }
-            )
-        
-        aggregate_models = [Aggregate.from_orm(agg) for agg in aggregates]
+                aggregates = [a for a in aggregates if a["feature"] == filters.feature]
+        else:
+            aggregates = []
+            for row in rows:
+                aggregate = dict(zip(AGGREGATE_FIELDS, row))
+                aggregate["estimated_error"] = _estimated_error(row[-1])
+                aggregates.append(aggregate)
+            if settings.distinct_metadata_keys:
+                estimates = self.distinct_repo.get_estimates(
+                    self.read_db,
+                    filters.tenant_id,
+                    filters.resource,
+                    filters.feature,
+                    filters.window_type,
+                    filters.start_date,
+                    filters.end_date
+                )
+                for aggregate in aggregates:
+                    aggregate["distinct"] = estimates.get((
+                        aggregate["tenant_id"],
+                        aggregate["resource"],
+                        aggregate["feature"],
+                        aggregate["window_start"]
+                    ), {})
         
-        return AggregateResponse(
-            aggregates=aggregate_models,
-            summary={
-                "total_quantity": sum(agg.total_quantity for agg in aggregates),
-                "total_events": sum(agg.event_count for agg in aggregates)
-            }
-        )
+        # Windows are sampled independently, so their variances add
+        errors = [a["estimated_error"] for a in aggregates if a["estimated_error"] is not None]
+        summary = {
+            "total_quantity": sum(a["total_quantity"] for a in aggregates),
+            "total_events": sum(a["event_count"] for a in aggregates)
+        }
+        if errors:
+            summary["estimated_error"] = _estimated_error(sum(error ** 2 for error in errors))
+        return {
+            "aggregates": aggregates,
+            "summary": summary
+        }
 
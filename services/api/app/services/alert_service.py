@@ -0,0 +1,145 @@
+"""Service for quota alert threshold evaluation and dispatch."""
+
+import asyncio
+import json
+import logging
+import math
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.repositories.quota_repository import QuotaRepository
+from app.services.cache_service import CacheService, AsyncCacheService
+from app.utils.time_utils import get_time_window, to_naive_utc
+
+logger = logging.getLogger(__name__)
+
+# (limit_value, period, alert_threshold) per (tenant, resource, feature), or
+# None when no quota is configured, with the time the entry expires
+_quota_cache: Dict[Tuple[str, str, str], Tuple[float, Optional[Tuple[int, str, int]]]] = {}
+_MAX_QUOTA_CACHE_ENTRIES = 10000
+
+
+class AlertService:
+    """Service for quota alert business logic."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.quota_repo = QuotaRepository()
+        self.cache_service = AsyncCacheService()
+    
+    def _get_quota(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str
+    ) -> Optional[Tuple[int, str, int]]:
+        """Get quota settings, cached in-process so ingest rarely queries."""
+        key = (tenant_id, resource, feature)
+        now = time.monotonic()
+        cached = _quota_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        quota = self.quota_repo.get_by_tenant_feature(self.db, tenant_id, feature, resource)
+        value = (quota.limit_value, quota.period, quota.alert_threshold) if quota else None
+        if len(_quota_cache) >= _MAX_QUOTA_CACHE_ENTRIES:
+            # Drop expired entries; start over if every entry is still live
+            for expired in [k for k, (expires, _) in _quota_cache.items() if expires <= now]:
+                del _quota_cache[expired]
+            if len(_quota_cache) >= _MAX_QUOTA_CACHE_ENTRIES:
+                _quota_cache.clear()
+        _quota_cache[key] = (now + settings.alert_quota_cache_seconds, value)
+        return value
+    
+    def find_crossings(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        timestamp: datetime,
+        quantity: int,
+        counters: Dict[str, int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build alerts for thresholds crossed by an increment.
+        
+        counters maps each incremented period to its value after the
+        increment. A level is crossed when the value before the increment
+        was below it and the value after is at or above it.
+        """
+        quota = self._get_quota(tenant_id, resource, feature)
+        if not quota:
+            return []
+        
+        limit_value, period, alert_threshold = quota
+        usage = counters.get(period)
+        if usage is None:
+            return []
+        previous = usage - quantity
+        
+        levels = []
+        threshold_value = math.ceil(limit_value * alert_threshold / 100)
+        if 0 < threshold_value < limit_value and previous < threshold_value <= usage:
+            levels.append(("threshold", threshold_value))
+        if previous < limit_value <= usage:
+            levels.append(("limit", limit_value))
+        
+        if not levels:
+            return []
+        
+        window_start, _ = get_time_window(to_naive_utc(timestamp), period)
+        return [
+            {
+                "tenant_id": tenant_id,
+                "resource": resource,
+                "feature": feature,
+                "period": period,
+                "window_start": window_start.isoformat(),
+                "level": level,
+                "level_value": level_value,
+                "alert_threshold": alert_threshold,
+                "limit": limit_value,
+                "usage": usage,
+                "detected_at": datetime.utcnow().isoformat()
+            }
+            for level, level_value in levels
+        ]
+    
+    async def publish(self, alerts: List[Dict[str, Any]]) -> int:
+        """
+        Publish alerts concurrently, each at most once per period window.
+        
+        Returns the number of alerts published.
+        """
+        if not alerts:
+            return 0
+        published = await asyncio.gather(*(
+            self.cache_service.publish_alert(alert, CacheService._get_ttl(alert["period"]))
+            for alert in alerts
+        ))
+        return sum(published)
+    
+    @staticmethod
+    def dispatch(alerts: List[Dict[str, str]]):
+        """Deliver a batch of alerts to the webhook, or log them if none is set."""
+        if not settings.alert_webhook_url:
+            for alert in alerts:
+                logger.warning(
+                    "Quota %(level)s reached for %(tenant_id)s %(resource)s/%(feature)s: "
+                    "%(usage)s of %(limit)s (%(period)s)",
+                    alert
+                )
+            return
+        
+        request = urllib.request.Request(
+            settings.alert_webhook_url,
+            data=json.dumps({"alerts": alerts}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Alert webhook returned {response.status}")
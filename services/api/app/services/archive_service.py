@@ -0,0 +1,320 @@
+"""Cold storage for raw events.
+
+Events older than ``archive_after_days`` are moved, a whole month at a time,
+to zstd-compressed Parquet files laid out by tenant and month:
+
+    <archive_path>/tenant=<tenant>/month=<YYYY-MM>/part-<id>.parquet
+
+Aggregates stay in the database. Late events in archived months are added to
+those aggregates at ingest, rather than recomputed from raw rows, and are
+archived by the next run. GET /events scans the files for ranges that
+reach past the archive boundary; partitions are pruned by tenant and month and
+row groups by their timestamp, resource and feature statistics.
+"""
+
+import logging
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Tuple, Optional
+from urllib.parse import quote
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.schemas import EventFilters
+from app.repositories.event_repository import EventRepository
+from app.utils.time_utils import get_time_window, to_naive_utc
+
+logger = logging.getLogger(__name__)
+
+# Files are written under a hidden name, which dataset scans skip, and renamed
+# once their rows are deleted from the database
+HIDDEN_PREFIX = "."
+
+# Month partition of an archive file path
+_MONTH_DIR = re.compile(r"month=(\d{4}-\d{2})")
+
+# Stored columns; tenant and month come from the partition directories
+ARCHIVE_COLUMNS = ["id", "resource", "feature", "quantity", "timestamp", "metadata", "created_at"]
+
+
+def _pyarrow():
+    """Import pyarrow, which only archiving needs."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Event archiving requires pyarrow")
+    return pyarrow
+
+
+def _schema(pa):
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("id", pa.string()),
+        ("resource", pa.string()),
+        ("feature", pa.string()),
+        ("quantity", pa.int64()),
+        ("timestamp", timestamp),
+        ("metadata", pa.string()),  # JSON text
+        ("created_at", timestamp)
+    ])
+
+
+def _next_month(month: datetime) -> datetime:
+    return get_time_window(month, "monthly")[1] + timedelta(microseconds=1)
+
+
+def archive_boundary(now: datetime) -> datetime:
+    """Start of the oldest month that is kept in the database."""
+    horizon = to_naive_utc(now) - timedelta(days=settings.archive_after_days)
+    return get_time_window(horizon, "monthly")[0]
+
+
+def _tenant_dir(tenant_id: str) -> str:
+    # Hive partition values are URI-decoded when scanned
+    return f"tenant={quote(tenant_id, safe='')}"
+
+
+class ArchiveService:
+    """Moves old events to Parquet and reads them back."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.event_repo = EventRepository()
+    
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Archive every complete month before the archive boundary.
+        
+        Each (tenant, month) partition is streamed to a new file in batches
+        of archive_batch_size rows, fsynced, then deleted from the database;
+        the file only becomes visible to scans after the delete commits.
+        Only one archiver should run at a time.
+        """
+        pa = _pyarrow()
+        self._recover(pa)
+        
+        stats = {"partitions": 0, "events": 0}
+        oldest = self.event_repo.get_oldest_timestamp(self.db)
+        if oldest is None:
+            return stats
+        
+        boundary = archive_boundary(now or datetime.utcnow())
+        # Rows committed after this are left for the next run, so the delete
+        # removes exactly the rows that were written to the file
+        created_before = self.db.query(func.now()).scalar()
+        
+        month = get_time_window(to_naive_utc(oldest), "monthly")[0]
+        while month < boundary:
+            month_end = _next_month(month)
+            for tenant_id in self.event_repo.get_tenants_between(self.db, month, month_end):
+                archived = self._archive_partition(pa, tenant_id, month, month_end, created_before)
+                if archived:
+                    stats["partitions"] += 1
+                    stats["events"] += archived
+            month = month_end
+        return stats
+    
+    def _archive_partition(
+        self,
+        pa,
+        tenant_id: str,
+        month: datetime,
+        month_end: datetime,
+        created_before: datetime
+    ) -> int:
+        """Move one tenant's events for one month to a new Parquet file."""
+        directory = os.path.join(settings.archive_path, _tenant_dir(tenant_id), f"month={month:%Y-%m}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        hidden_path = os.path.join(directory, HIDDEN_PREFIX + name)
+        
+        schema = _schema(pa)
+        writer = None
+        written = 0
+        try:
+            for rows in self.event_repo.iter_range_rows(
+                self.db, tenant_id, month, month_end, created_before, settings.archive_batch_size
+            ):
+                if writer is None:
+                    writer = pa.parquet.ParquetWriter(hidden_path, schema, compression="zstd")
+                writer.write_batch(self._to_batch(pa, schema, rows))
+                written += len(rows)
+            if writer is None:
+                return 0
+            writer.close()
+            writer = None
+            with open(hidden_path, "rb") as archived_file:
+                os.fsync(archived_file.fileno())
+        except Exception:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(hidden_path):
+                os.remove(hidden_path)
+            raise
+        
+        deleted = self.event_repo.delete_range(self.db, tenant_id, month, month_end, created_before)
+        if deleted != written:
+            logger.warning(
+                "Archived %d events for %s %s but deleted %d", written, tenant_id, f"{month:%Y-%m}", deleted
+            )
+        os.replace(hidden_path, os.path.join(directory, name))
+        return written
+    
+    @staticmethod
+    def _to_batch(pa, schema, rows: List[tuple]):
+        """Convert EVENT_FIELDS tuples to a record batch (tenant_id is dropped)."""
+        ids, _, resources, features, quantities, timestamps, metadata, created = zip(*rows)
+        return pa.record_batch([
+            pa.array([str(event_id) for event_id in ids], pa.string()),
+            pa.array(resources, pa.string()),
+            pa.array(features, pa.string()),
+            pa.array(quantities, pa.int64()),
+            # Naive timestamps are UTC
+            pa.array(timestamps, schema.field("timestamp").type),
+            pa.array([orjson.dumps(value).decode() if value is not None else None for value in metadata], pa.string()),
+            pa.array(created, schema.field("created_at").type)
+        ], schema=schema)
+    
+    def _recover(self, pa):
+        """Resolve files left hidden by an interrupted run."""
+        for directory, _, names in os.walk(settings.archive_path):
+            for name in names:
+                if not name.startswith(HIDDEN_PREFIX) or not name.endswith(".parquet"):
+                    continue
+                hidden_path = os.path.join(directory, name)
+                try:
+                    first_id = pa.parquet.ParquetFile(hidden_path).read_row_group(0, columns=["id"]).column(0)[0].as_py()
+                except Exception:
+                    first_id = None
+                
+                if first_id is None or self.event_repo.get_existing_ids(self.db, [uuid.UUID(first_id)]):
+                    # The delete never committed; the rows are archived again
+                    os.remove(hidden_path)
+                else:
+                    os.replace(hidden_path, os.path.join(directory, name[len(HIDDEN_PREFIX):]))
+                    logger.info("Recovered archive file %s", hidden_path)
+    
+    @staticmethod
+    def reaches(filters: EventFilters) -> bool:
+        """Whether an event query may match archived events."""
+        if not settings.archive_path:
+            return False
+        if filters.start_date is None:
+            return True
+        return to_naive_utc(filters.start_date) < archive_boundary(datetime.utcnow())
+    
+    @staticmethod
+    def _dataset(pa, filters: EventFilters):
+        """The archive dataset to query and the filter for filters; (None, None) if empty."""
+        ds = pa.dataset
+        
+        root = settings.archive_path
+        partitions = [("month", pa.string())]
+        if filters.tenant_id:
+            root = os.path.join(root, _tenant_dir(filters.tenant_id))
+        else:
+            partitions.insert(0, ("tenant", pa.string()))
+        if not os.path.isdir(root):
+            return None, None
+        
+        dataset = ds.dataset(
+            root,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema(partitions), flavor="hive")
+        )
+        
+        timestamp_type = _schema(pa).field("timestamp").type
+        
+        def at(value: datetime):
+            return pa.scalar(to_naive_utc(value).replace(tzinfo=timezone.utc), timestamp_type)
+        
+        conditions = []
+        if filters.resource:
+            conditions.append(ds.field("resource") == filters.resource)
+        if filters.feature:
+            conditions.append(ds.field("feature") == filters.feature)
+        if filters.start_date:
+            conditions.append(ds.field("month") >= f"{to_naive_utc(filters.start_date):%Y-%m}")
+            conditions.append(ds.field("timestamp") >= at(filters.start_date))
+        if filters.end_date:
+            conditions.append(ds.field("month") <= f"{to_naive_utc(filters.end_date):%Y-%m}")
+            conditions.append(ds.field("timestamp") <= at(filters.end_date))
+        condition = None
+        for part in conditions:
+            condition = part if condition is None else condition & part
+        return dataset, condition
+    
+    def count(self, filters: EventFilters) -> int:
+        """Count the archived events matching filters."""
+        dataset, condition = self._dataset(_pyarrow(), filters)
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=condition)
+    
+    def scan(self, filters: EventFilters, limit: int) -> Tuple[List[tuple], int]:
+        """
+        Get the newest limit archived events matching filters, as EVENT_FIELDS
+        tuples, and the number of archived events matching.
+        """
+        pa = _pyarrow()
+        ds = pa.dataset
+        dataset, condition = self._dataset(pa, filters)
+        if dataset is None:
+            return [], 0
+        
+        total = dataset.count_rows(filter=condition)
+        if total == 0 or limit <= 0:
+            return [], total
+        
+        def where(part):
+            return part if condition is None else condition & part
+        
+        # Read timestamps a month at a time, newest first, until the months
+        # read hold limit events; older months cannot reach the page
+        months = sorted({
+            _MONTH_DIR.search(fragment.path).group(1)
+            for fragment in dataset.get_fragments(filter=condition)
+        }, reverse=True)
+        stamps = []
+        found = 0
+        oldest = None
+        for month in months:
+            month_stamps = dataset.to_table(columns=["timestamp"], filter=where(ds.field("month") == month))
+            stamps.append(month_stamps)
+            found += month_stamps.num_rows
+            oldest = month
+            if found >= limit:
+                break
+        
+        newer = ds.field("month") >= oldest
+        if found > limit:
+            stamps = pa.concat_tables(stamps)
+            newest = pa.compute.select_k_unstable(stamps, k=limit, sort_keys=[("timestamp", "descending")])
+            cutoff = pa.compute.min(stamps.column("timestamp").take(newest))
+            newer = newer & (ds.field("timestamp") >= cutoff)
+        
+        columns = ARCHIVE_COLUMNS if filters.tenant_id else ARCHIVE_COLUMNS + ["tenant"]
+        table = dataset.to_table(columns=columns, filter=where(newer)).sort_by(
+            [("timestamp", "descending")]
+        ).slice(0, limit)
+        
+        rows = [
+            (
+                uuid.UUID(record["id"]),
+                filters.tenant_id or record["tenant"],
+                record["resource"],
+                record["feature"],
+                record["quantity"],
+                record["timestamp"],
+                orjson.loads(record["metadata"]) if record["metadata"] is not None else None,
+                record["created_at"]
+            )
+            for record in table.to_pylist()
+        ]
+        return rows, total
@@ -1,14 +1,208 @@
 """Redis cache service."""
 
-from typing import Optional
+import time
+import uuid
+import orjson
+from typing import Any, Optional, Dict, Iterable, List, Set, Tuple
 from datetime import datetime, timedelta
-from app.core.redis import get_redis
+from redis.exceptions import ResponseError
+from app.config import settings
+from app.core.redis import get_redis, get_async_redis
 from app.utils.time_utils import get_time_window
 
 
+# Compact counter layout: one hash per (tenant, period, window) holding a
+# field per resource:feature. Names are interned to short ids so the same
+# strings are not repeated in every key and field.
+PERIOD_CODES = {
+    "hourly": "h",
+    "daily": "d",
+    "monthly": "m",
+    "yearly": "y"
+}
+
+WINDOW_FORMATS = {
+    "hourly": "%Y%m%d%H",
+    "daily": "%Y%m%d",
+    "monthly": "%Y%m",
+    "yearly": "%Y"
+}
+
+PERIODS_BY_CODE = {code: period for period, code in PERIOD_CODES.items()}
+
+INTERN_KEY = "meter:intern"
+INTERN_REVERSE_KEY = "meter:intern:rev"
+INTERN_SEQ_KEY = "meter:intern:seq"
+
+ACTIVE_COUNTERS_KEY = "meter:active"
+DIRTY_WINDOWS_KEY = "meter:dirty"
+RECONCILE_STATS_KEY = "meter:reconcile:stats"
+ALERTS_STREAM_KEY = "meter:alerts"
+ALERTS_GROUP = "alert-dispatchers"
+INGEST_STREAM_KEY = "meter:ingest"
+INGEST_GROUP = "ingest-writers"
+INGEST_DEAD_LETTER_KEY = "meter:ingest:dead"
+RECENT_WRITE_PREFIX = "meter:wrote:"
+TOP_PREFIX = "meter:top:"
+DISTINCT_PREFIX = "meter:hll:"
+LIVE_PREFIX = "meter:live:"
+
+# Set a hash field only if it still holds the value the caller observed, so
+# a repair never overwrites increments that landed after the observation
+_COMPARE_AND_SET_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current == false then current = '0' end
+if current == ARGV[2] then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Drop expired leases, then grant min(requested, available - outstanding)
+_RESERVE_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if #expired > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    redis.call('HDEL', KEYS[2], unpack(expired))
+end
+local outstanding = 0
+for _, amount in ipairs(redis.call('HVALS', KEYS[2])) do
+    outstanding = outstanding + tonumber(amount)
+end
+local grant = math.min(tonumber(ARGV[4]), tonumber(ARGV[5]) - outstanding)
+if grant <= 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+redis.call('HSET', KEYS[2], ARGV[3], grant)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return grant
+"""
+
+# Publish an alert unless its dedupe key is set, then set the key. Scripts
+# do not roll back on error, so the key is only written once XADD succeeded
+_PUBLISH_ALERT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', unpack(ARGV, 3))
+redis.call('SET', KEYS[1], 1, 'EX', ARGV[1])
+return 1
+"""
+
+# Weighted Space-Saving over a sorted set of at most ARGV[1] members. A new
+# member takes over the smallest slot once the set is full, inheriting its
+# count, which is recorded as the member's possible overestimate
+_SPACE_SAVING_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local size = redis.call('ZCARD', KEYS[1])
+local added = 0
+for i = 3, #ARGV, 2 do
+    local member = ARGV[i]
+    local amount = tonumber(ARGV[i + 1])
+    added = added + amount
+    if redis.call('ZSCORE', KEYS[1], member) then
+        redis.call('ZINCRBY', KEYS[1], amount, member)
+    elseif size < capacity then
+        redis.call('ZADD', KEYS[1], amount, member)
+        size = size + 1
+    else
+        local evicted = redis.call('ZPOPMIN', KEYS[1])
+        redis.call('HDEL', KEYS[2], evicted[1])
+        redis.call('ZADD', KEYS[1], tonumber(evicted[2]) + amount, member)
+        redis.call('HSET', KEYS[2], member, evicted[2])
+    end
+end
+redis.call('INCRBY', KEYS[3], added)
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+end
+return size
+"""
+
+# Process-local caches; bounded so long-lived workers do not grow forever
+_MAX_LOCAL_ENTRIES = 100000
+_intern_cache: Dict[str, str] = {}
+_expiry_set: Set[str] = set()
+
+
+def _to_base36(value: int) -> str:
+    """Encode a positive integer in base 36."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while value:
+        value, rem = divmod(value, 36)
+        result = digits[rem] + result
+    return result or "0"
+
+
+def _remember_interned(name: str, short_id: str):
+    if len(_intern_cache) >= _MAX_LOCAL_ENTRIES:
+        _intern_cache.clear()
+    _intern_cache[name] = short_id
+
+
+def _remember_expiry_set(keys: Set[str]):
+    """Record hashes whose EXPIRE has been applied, once the pipeline succeeded."""
+    if len(_expiry_set) + len(keys) > _MAX_LOCAL_ENTRIES:
+        _expiry_set.clear()
+    _expiry_set.update(keys)
+
+
 class CacheService:
     """Service for Redis cache operations."""
     
+    @staticmethod
+    def format_window(window_start: datetime, period: str) -> str:
+        """Format a window start with the precision of its period."""
+        return window_start.strftime(WINDOW_FORMATS.get(period, "%Y%m%d%H"))
+    
+    @staticmethod
+    def intern(name: str) -> str:
+        """Map a tenant/resource/feature name to a short, stable id."""
+        short_id = _intern_cache.get(name)
+        if short_id is not None:
+            return short_id
+        
+        redis = get_redis()
+        short_id = redis.hget(INTERN_KEY, name)
+        if short_id is None:
+            candidate = _to_base36(redis.incr(INTERN_SEQ_KEY))
+            # HSETNX makes concurrent writers agree on the first id assigned
+            if redis.hsetnx(INTERN_KEY, name, candidate):
+                redis.hset(INTERN_REVERSE_KEY, candidate, name)
+                short_id = candidate
+            else:
+                short_id = redis.hget(INTERN_KEY, name)
+        
+        _remember_interned(name, short_id)
+        return short_id
+    
+    @staticmethod
+    def resolve_interned(short_ids: List[str]) -> List[Optional[str]]:
+        """Map short ids back to their original names."""
+        if not short_ids:
+            return []
+        redis = get_redis()
+        return redis.hmget(INTERN_REVERSE_KEY, short_ids)
+    
+    @staticmethod
+    def get_counter_location(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        timestamp: datetime
+    ) -> Tuple[str, str]:
+        """Get the (hash key, field) holding a counter in the compact layout."""
+        window_start, _ = get_time_window(timestamp, period)
+        window_str = CacheService.format_window(window_start, period)
+        key = f"mc:{CacheService.intern(tenant_id)}:{PERIOD_CODES[period]}:{window_str}"
+        field = f"{CacheService.intern(resource)}:{CacheService.intern(feature)}"
+        return key, field
+    
     @staticmethod
     def get_counter_key(
         tenant_id: str,
@@ -17,30 +211,112 @@ class CacheService:
         period: str,
         timestamp: datetime
     ) -> str:
-        """Generate counter key for Redis."""
+        """Generate legacy per-counter string key for Redis."""
         window_start, _ = get_time_window(timestamp, period)
         window_str = window_start.strftime("%Y-%m-%d-%H")
         return f"meter:counter:{tenant_id}:{resource}:{feature}:{period}:{window_str}"
     
     @staticmethod
-    def increment_counter(
+    def _writes_hash() -> bool:
+        return settings.counter_layout in ("dual", "hash")
+    
+    @staticmethod
+    def _reads_legacy() -> bool:
+        return settings.counter_layout in ("legacy", "dual")
+    
+    @staticmethod
+    def _queue_increment(
+        pipe,
         tenant_id: str,
         resource: str,
         feature: str,
         period: str,
         timestamp: datetime,
-        quantity: int = 1
+        quantity: int,
+        expiring: Set[str]
     ) -> int:
-        """Increment counter in Redis."""
-        redis = get_redis()
-        key = CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+        """
+        Queue one counter increment on a pipeline.
         
-        # Set TTL based on period
+        The increment is always the first command queued; returns the number
+        of commands queued. Hashes given an EXPIRE are added to expiring, for
+        the caller to remember once the pipeline has executed.
+        """
         ttl = CacheService._get_ttl(period)
-        value = redis.incrby(key, quantity)
-        redis.expire(key, ttl)
         
-        return value
+        if not CacheService._writes_hash():
+            key = CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+            pipe.incrby(key, quantity)
+            pipe.expire(key, ttl)
+            return 2
+        
+        key, field = CacheService.get_counter_location(
+            tenant_id, resource, feature, period, timestamp
+        )
+        pipe.hincrby(key, field, quantity)
+        # Expiry is set once per hash rather than on every increment
+        if key not in _expiry_set and key not in expiring:
+            pipe.expire(key, ttl, nx=True)
+            pipe.sadd(ACTIVE_COUNTERS_KEY, key)
+            expiring.add(key)
+            return 3
+        return 1
+    
+    @staticmethod
+    def increment_counters(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        periods: List[str],
+        timestamp: datetime,
+        quantity: int = 1
+    ) -> List[int]:
+        """
+        Increment the counters of several periods in one round trip.
+        
+        Returns the new counter values in period order.
+        """
+        return CacheService.increment_counter_batch([
+            (tenant_id, resource, feature, period, timestamp, quantity) for period in periods
+        ])
+    
+    @staticmethod
+    def increment_counter_batch(
+        increments: List[Tuple[str, str, str, str, datetime, int]]
+    ) -> List[int]:
+        """
+        Apply many counter increments in one round trip.
+        
+        Each increment is (tenant_id, resource, feature, period, timestamp,
+        quantity); returns the new counter values in the same order.
+        """
+        if not increments:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        positions, expiring = CacheService._queue_increments(pipe, increments)
+        results = pipe.execute()
+        _remember_expiry_set(expiring)
+        return [results[position] for position in positions]
+    
+    @staticmethod
+    def _queue_increments(
+        pipe,
+        increments: List[Tuple[str, str, str, str, datetime, int]]
+    ) -> Tuple[List[int], Set[str]]:
+        """
+        Queue increments on a pipeline.
+        
+        Returns the position of each result and the hashes given an EXPIRE,
+        which the caller passes to _remember_expiry_set after executing so
+        a failed pipeline leaves them to be expired on the next attempt.
+        """
+        positions = []
+        expiring: Set[str] = set()
+        queued = 0
+        for increment in increments:
+            positions.append(queued)
+            queued += CacheService._queue_increment(pipe, *increment, expiring)
+        return positions, expiring
     
     @staticmethod
     def get_counter(
@@ -51,44 +327,374 @@ class CacheService:
         timestamp: datetime
     ) -> Optional[int]:
         """Get counter value from Redis."""
+        return CacheService.get_counters(
+            [(tenant_id, resource, feature, period)], timestamp
+        )[0]
+    
+    @staticmethod
+    def get_counters(
+        lookups: List[Tuple[str, str, str, str]],
+        timestamp: datetime
+    ) -> List[Optional[int]]:
+        """
+        Get several counters in one round trip.
+        
+        Each lookup is (tenant_id, resource, feature, period); values are
+        returned in order, None where the counter does not exist.
+        """
+        if not lookups:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        CacheService._queue_counter_reads(pipe, lookups, timestamp)
+        return CacheService._sum_counter_reads(pipe.execute(), len(lookups))
+    
+    @staticmethod
+    def _queue_counter_reads(pipe, lookups: List[Tuple[str, str, str, str]], timestamp: datetime):
+        """Queue the reads of each looked-up counter for its layout."""
+        for tenant_id, resource, feature, period in lookups:
+            if CacheService._writes_hash():
+                key, field = CacheService.get_counter_location(
+                    tenant_id, resource, feature, period, timestamp
+                )
+                pipe.hget(key, field)
+            if CacheService._reads_legacy():
+                # Dual-read: usage recorded before the switch still lives in
+                # the legacy key, so the current window is the sum of both
+                pipe.get(
+                    CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+                )
+    
+    @staticmethod
+    def _sum_counter_reads(raw: List[Optional[str]], count: int) -> List[Optional[int]]:
+        """Combine queued counter reads into one value (or None) per lookup."""
+        step = len(raw) // count
+        values = []
+        for i in range(0, len(raw), step):
+            parts = [value for value in raw[i:i + step] if value is not None]
+            values.append(sum(int(value) for value in parts) if parts else None)
+        return values
+    
+    @staticmethod
+    def get_legacy_counters(
+        tenant_id: str,
+        pairs: List[Tuple[str, str]],
+        period: str,
+        timestamp: datetime
+    ) -> List[int]:
+        """Get legacy string-key counters for (resource, feature) pairs."""
+        if not pairs:
+            return []
+        keys = [
+            CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+            for resource, feature in pairs
+        ]
+        return [int(value or 0) for value in get_redis().mget(keys)]
+    
+    @staticmethod
+    def set_counter(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        timestamp: datetime,
+        value: int
+    ) -> bool:
+        """
+        Seed a counter value after a cache miss.
+        
+        Only writes when the counter is still absent so increments that
+        raced with the database read are never overwritten; any remaining
+        drift is repaired by the reconciliation job.
+        """
         redis = get_redis()
-        key = CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
-        value = redis.get(key)
-        return int(value) if value else None
+        ttl = CacheService._get_ttl(period)
+        
+        if not CacheService._writes_hash():
+            key = CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+            return bool(redis.set(key, value, ex=ttl, nx=True))
+        
+        key, field = CacheService.get_counter_location(
+            tenant_id, resource, feature, period, timestamp
+        )
+        pipe = redis.pipeline(transaction=False)
+        pipe.hsetnx(key, field, value)
+        pipe.expire(key, ttl, nx=True)
+        pipe.sadd(ACTIVE_COUNTERS_KEY, key)
+        return bool(pipe.execute()[0])
     
     @staticmethod
-    def get_aggregate_cache_key(
+    def parse_counter_key(key: str) -> Optional[Tuple[str, str, datetime]]:
+        """Split a compact counter key into (tenant id, period, window start)."""
+        parts = key.split(":")
+        if len(parts) != 4 or parts[0] != "mc" or parts[2] not in PERIODS_BY_CODE:
+            return None
+        period = PERIODS_BY_CODE[parts[2]]
+        try:
+            window_start = datetime.strptime(parts[3], WINDOW_FORMATS[period])
+        except ValueError:
+            return None
+        return parts[1], period, window_start
+    
+    @staticmethod
+    def get_active_counter_keys() -> List[str]:
+        """Get the counter hashes written since they were last pruned."""
+        return list(get_redis().smembers(ACTIVE_COUNTERS_KEY))
+    
+    @staticmethod
+    def remove_active_counter_keys(keys: List[str]):
+        """Stop tracking counter hashes, e.g. once their window closed."""
+        if keys:
+            get_redis().srem(ACTIVE_COUNTERS_KEY, *keys)
+    
+    @staticmethod
+    def get_counter_fields(key: str) -> Dict[str, int]:
+        """Get every resource:feature counter in a counter hash."""
+        return {
+            field: int(value)
+            for field, value in get_redis().hgetall(key).items()
+        }
+    
+    @staticmethod
+    def compare_and_set_counters(
+        key: str,
+        period: str,
+        repairs: List[Tuple[str, int, int]]
+    ) -> int:
+        """
+        Atomically repair counter fields.
+        
+        Each repair is (field, expected, value); a field is only set when it
+        still holds the expected value. Returns the number applied.
+        """
+        if not repairs:
+            return 0
+        redis = get_redis()
+        script = redis.register_script(_COMPARE_AND_SET_SCRIPT)
+        pipe = redis.pipeline(transaction=False)
+        for field, expected, value in repairs:
+            script(keys=[key], args=[field, expected, value], client=pipe)
+        pipe.expire(key, CacheService._get_ttl(period), nx=True)
+        return sum(pipe.execute()[:-1])
+    
+    @staticmethod
+    def mark_windows_dirty(windows: Iterable[Tuple[str, str, datetime]]):
+        """Flag (tenant, window type, window start) aggregates for recompute."""
+        members = CacheService._dirty_members(windows)
+        if members:
+            get_redis().sadd(DIRTY_WINDOWS_KEY, *members)
+    
+    @staticmethod
+    def _dirty_members(windows: Iterable[Tuple[str, str, datetime]]) -> Set[str]:
+        return {
+            f"{window_type}|{window_start.isoformat()}|{tenant_id}"
+            for tenant_id, window_type, window_start in windows
+        }
+    
+    @staticmethod
+    def pop_dirty_windows(count: int) -> List[Tuple[str, str, datetime]]:
+        """Claim up to count dirty windows as (tenant, window type, window start)."""
+        members = get_redis().spop(DIRTY_WINDOWS_KEY, count) or []
+        windows = []
+        for member in members:
+            window_type, window_start, tenant_id = member.split("|", 2)
+            windows.append((tenant_id, window_type, datetime.fromisoformat(window_start)))
+        return windows
+    
+    @staticmethod
+    def record_reconcile_stats(checked: int, drifted: int, repaired: int):
+        """Accumulate reconciliation counters and the latest drift rate."""
+        drift_rate = drifted / checked if checked else 0.0
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(RECONCILE_STATS_KEY, "checked", checked)
+        pipe.hincrby(RECONCILE_STATS_KEY, "drifted", drifted)
+        pipe.hincrby(RECONCILE_STATS_KEY, "repaired", repaired)
+        pipe.hset(RECONCILE_STATS_KEY, mapping={
+            "last_drift_rate": drift_rate,
+            "last_run_at": datetime.utcnow().isoformat()
+        })
+        pipe.execute()
+    
+    @staticmethod
+    def get_lease_keys(
         tenant_id: str,
         resource: str,
         feature: str,
-        window_type: str,
-        window_start: datetime
+        period: str
+    ) -> Tuple[str, str]:
+        """Get the (expiry sorted set, amount hash) keys tracking open leases."""
+        base = f"meter:lease:{tenant_id}:{resource}:{feature}:{period}"
+        return base, f"{base}:amounts"
+    
+    @staticmethod
+    def get_top_keys(dimension: str, period: str, window_start: datetime) -> Tuple[str, str, str]:
+        """Get the (counts sorted set, errors hash, total) keys of a heavy-hitter window."""
+        base = f"{TOP_PREFIX}{dimension}:{PERIOD_CODES[period]}:{CacheService.format_window(window_start, period)}"
+        return base, f"{base}:err", f"{base}:total"
+    
+    @staticmethod
+    def feature_member(resource: str, feature: str) -> str:
+        """Encode a resource/feature pair as a heavy-hitter member."""
+        return orjson.dumps([resource, feature]).decode()
+    
+    @staticmethod
+    def get_distinct_key(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        metadata_key: str,
+        hour: datetime
     ) -> str:
-        """Generate aggregate cache key."""
-        window_str = window_start.strftime("%Y-%m-%d-%H")
-        return f"meter:aggregate:{tenant_id}:{resource}:{feature}:{window_type}:{window_str}"
+        """Get the hourly HyperLogLog key of a metadata key's distinct values."""
+        return f"{DISTINCT_PREFIX}{tenant_id}:{resource}:{feature}:{metadata_key}:{hour.strftime('%Y%m%d%H')}"
     
     @staticmethod
-    def set_aggregate(
+    def reserve_lease(
         tenant_id: str,
         resource: str,
         feature: str,
-        window_type: str,
-        window_start: datetime,
-        total_quantity: int,
-        event_count: int,
-        ttl: int = 3600
-    ):
-        """Cache aggregate data."""
+        period: str,
+        lease_id: str,
+        requested: int,
+        available: int,
+        ttl: int
+    ) -> int:
+        """
+        Atomically reserve up to requested units for a lease.
+        
+        available is the quota left after recorded usage; open leases on the
+        same counter are subtracted from it. Returns the units granted.
+        """
+        redis = get_redis()
+        now = time.time()
+        script = redis.register_script(_RESERVE_LEASE_SCRIPT)
+        return int(script(
+            keys=list(CacheService.get_lease_keys(tenant_id, resource, feature, period)),
+            args=[now, now + ttl, lease_id, requested, available, CacheService._get_ttl(period)]
+        ))
+    
+    @staticmethod
+    def release_lease(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        lease_id: str
+    ) -> int:
+        """Drop a lease reservation; returns the units it held."""
+        expiry_key, amounts_key = CacheService.get_lease_keys(tenant_id, resource, feature, period)
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.hget(amounts_key, lease_id)
+        pipe.zrem(expiry_key, lease_id)
+        pipe.hdel(amounts_key, lease_id)
+        amount = pipe.execute()[0]
+        return int(amount or 0)
+    
+    @staticmethod
+    def publish_alert(alert: Dict[str, Any], ttl: int) -> bool:
+        """
+        Publish a quota alert to the alerts stream once per window and level.
+        
+        Returns False if the same alert was already published.
+        """
         redis = get_redis()
-        key = CacheService.get_aggregate_cache_key(
-            tenant_id, resource, feature, window_type, window_start
+        keys, args = CacheService._publish_alert_args(alert, ttl)
+        script = redis.register_script(_PUBLISH_ALERT_SCRIPT)
+        return bool(script(keys=keys, args=args))
+    
+    @staticmethod
+    def _publish_alert_args(alert: Dict[str, Any], ttl: int) -> Tuple[List[str], list]:
+        """Keys and arguments of the publish script for an alert."""
+        fields = [item for name, value in alert.items() for item in (name, str(value))]
+        return (
+            [CacheService._alert_dedupe_key(alert), ALERTS_STREAM_KEY],
+            [ttl, settings.alert_stream_maxlen, *fields]
+        )
+    
+    @staticmethod
+    def _alert_dedupe_key(alert: Dict[str, Any]) -> str:
+        return (
+            f"meter:alerted:{alert['tenant_id']}:{alert['resource']}:{alert['feature']}:"
+            f"{alert['period']}:{alert['window_start']}:{alert['level']}"
         )
-        redis.setex(
-            key,
-            ttl,
-            f"{total_quantity}:{event_count}"
+    
+    @staticmethod
+    def read_alerts(
+        consumer: str,
+        count: int,
+        block_ms: int,
+        min_idle_ms: int
+    ) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Read a batch of alerts for a consumer in the dispatcher group.
+        
+        Entries left pending by a crashed consumer for longer than min_idle_ms
+        are reclaimed first; otherwise new entries are read.
+        """
+        _, entries = CacheService._read_group(
+            ALERTS_STREAM_KEY, ALERTS_GROUP, consumer, count, block_ms, min_idle_ms
         )
+        return entries
+    
+    @staticmethod
+    def ack_alerts(entry_ids: List[str]):
+        """Acknowledge dispatched alerts and drop them from the stream."""
+        CacheService._ack_group(ALERTS_STREAM_KEY, ALERTS_GROUP, entry_ids)
+    
+    @staticmethod
+    def _read_group(
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: int,
+        min_idle_ms: int
+    ) -> Tuple[bool, List[Tuple[str, Dict[str, str]]]]:
+        """
+        Read entries for a consumer group member, creating the group if needed.
+        
+        Entries left pending by a crashed consumer for longer than min_idle_ms
+        are reclaimed first; otherwise new entries are read. Returns whether
+        the entries were reclaimed, and the entries.
+        """
+        redis = get_redis()
+        try:
+            redis.xgroup_create(stream, group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        
+        _, claimed, *_ = redis.xautoclaim(stream, group, consumer, min_idle_ms, count=count)
+        if claimed:
+            return True, claimed
+        
+        response = redis.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block_ms)
+        return False, response[0][1] if response else []
+    
+    @staticmethod
+    def _ack_group(stream: str, group: str, entry_ids: List[str]):
+        """Acknowledge entries and drop them from the stream."""
+        if entry_ids:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.xack(stream, group, *entry_ids)
+            pipe.xdel(stream, *entry_ids)
+            pipe.execute()
+    
+    @staticmethod
+    def has_recent_write(tenant_id: str) -> bool:
+        """Check whether a tenant wrote within replica_read_after_write_ms."""
+        return bool(get_redis().exists(f"{RECENT_WRITE_PREFIX}{tenant_id}"))
+    
+    @staticmethod
+    def get_aggregate_cache_key(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        window_type: str,
+        window_start: datetime
+    ) -> str:
+        """Generate aggregate cache key."""
+        window_str = window_start.strftime("%Y-%m-%d-%H")
+        return f"meter:aggregate:{tenant_id}:{resource}:{feature}:{window_type}:{window_str}"
     
     @staticmethod
     def get_quota_cache_key(tenant_id: str, feature: str) -> str:
@@ -136,3 +742,367 @@ class CacheService:
         }
         return ttl_map.get(period, 3600)
 
+
+
+class AsyncCacheService:
+    """
+    Cache operations for request handlers on the pooled asyncio client.
+    
+    Mirrors the CacheService methods used while serving requests and shares
+    its key layout. Names are interned up front in one round trip, after
+    which the CacheService key builders only hit the in-process cache.
+    """
+    
+    @staticmethod
+    async def intern_names(names: Iterable[str]):
+        """Make sure names have short ids in the in-process cache."""
+        if not CacheService._writes_hash():
+            return
+        missing = [name for name in set(names) if name not in _intern_cache]
+        if not missing:
+            return
+        
+        redis = await get_async_redis()
+        for name, short_id in zip(missing, await redis.hmget(INTERN_KEY, missing)):
+            if short_id is None:
+                candidate = _to_base36(await redis.incr(INTERN_SEQ_KEY))
+                # HSETNX makes concurrent writers agree on the first id assigned
+                if await redis.hsetnx(INTERN_KEY, name, candidate):
+                    await redis.hset(INTERN_REVERSE_KEY, candidate, name)
+                    short_id = candidate
+                else:
+                    short_id = await redis.hget(INTERN_KEY, name)
+            _remember_interned(name, short_id)
+    
+    @staticmethod
+    async def _intern_counter_names(counters: Iterable[tuple]):
+        """Intern the tenant, resource and feature of counter tuples."""
+        await AsyncCacheService.intern_names(
+            name for counter in counters for name in counter[:3]
+        )
+    
+    @staticmethod
+    async def increment_counters(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        periods: List[str],
+        timestamp: datetime,
+        quantity: int = 1
+    ) -> List[int]:
+        """Increment the counters of several periods in one round trip."""
+        return await AsyncCacheService.increment_counter_batch([
+            (tenant_id, resource, feature, period, timestamp, quantity) for period in periods
+        ])
+    
+    @staticmethod
+    async def increment_counter_batch(
+        increments: List[Tuple[str, str, str, str, datetime, int]]
+    ) -> List[int]:
+        """Apply many counter increments in one round trip."""
+        if not increments:
+            return []
+        await AsyncCacheService._intern_counter_names(increments)
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        positions, expiring = CacheService._queue_increments(pipe, increments)
+        results = await pipe.execute()
+        _remember_expiry_set(expiring)
+        return [results[position] for position in positions]
+    
+    @staticmethod
+    async def get_counter(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        timestamp: datetime
+    ) -> Optional[int]:
+        """Get counter value from Redis."""
+        return (await AsyncCacheService.get_counters(
+            [(tenant_id, resource, feature, period)], timestamp
+        ))[0]
+    
+    @staticmethod
+    async def get_counters(
+        lookups: List[Tuple[str, str, str, str]],
+        timestamp: datetime
+    ) -> List[Optional[int]]:
+        """Get several counters in one round trip; None where absent."""
+        if not lookups:
+            return []
+        await AsyncCacheService._intern_counter_names(lookups)
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        CacheService._queue_counter_reads(pipe, lookups, timestamp)
+        return CacheService._sum_counter_reads(await pipe.execute(), len(lookups))
+    
+    @staticmethod
+    async def set_counter(
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        timestamp: datetime,
+        value: int
+    ) -> bool:
+        """Seed a counter value after a cache miss, only if still absent."""
+        redis = await get_async_redis()
+        ttl = CacheService._get_ttl(period)
+        
+        if not CacheService._writes_hash():
+            key = CacheService.get_counter_key(tenant_id, resource, feature, period, timestamp)
+            return bool(await redis.set(key, value, ex=ttl, nx=True))
+        
+        await AsyncCacheService.intern_names((tenant_id, resource, feature))
+        key, field = CacheService.get_counter_location(
+            tenant_id, resource, feature, period, timestamp
+        )
+        pipe = redis.pipeline(transaction=False)
+        pipe.hsetnx(key, field, value)
+        pipe.expire(key, ttl, nx=True)
+        pipe.sadd(ACTIVE_COUNTERS_KEY, key)
+        return bool((await pipe.execute())[0])
+    
+    @staticmethod
+    async def mark_windows_dirty(windows: Iterable[Tuple[str, str, datetime]]):
+        """Flag (tenant, window type, window start) aggregates for recompute."""
+        members = CacheService._dirty_members(windows)
+        if members:
+            await (await get_async_redis()).sadd(DIRTY_WINDOWS_KEY, *members)
+    
+    @staticmethod
+    async def mark_recent_writes(tenant_ids: Iterable[str]):
+        """Note that tenants just wrote, keeping their reads on the primary."""
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        for tenant_id in set(tenant_ids):
+            pipe.set(
+                f"{RECENT_WRITE_PREFIX}{tenant_id}", 1, px=settings.replica_read_after_write_ms
+            )
+        await pipe.execute()
+    
+    @staticmethod
+    async def publish_events(events_data: List[Dict[str, Any]]):
+        """Append a batch of event rows to the ingest stream as one entry."""
+        redis = await get_async_redis()
+        await redis.xadd(INGEST_STREAM_KEY, {"events": orjson.dumps(events_data)})
+    
+    @staticmethod
+    async def read_events(
+        consumer: str,
+        count: int,
+        block_ms: int,
+        min_idle_ms: int
+    ) -> Tuple[bool, List[Tuple[str, List[Dict[str, Any]]]]]:
+        """
+        Read up to count event batches for a consumer in the writer group.
+        
+        Batches left pending by a crashed consumer for longer than
+        min_idle_ms are reclaimed first; otherwise new ones are read.
+        Returns whether the batches were reclaimed (and so may already be
+        stored) along with (entry id, events) pairs. Event ids stay
+        strings and timestamps ISO strings.
+        """
+        redis = await get_async_redis()
+        try:
+            await redis.xgroup_create(INGEST_STREAM_KEY, INGEST_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        
+        reclaimed = True
+        _, entries, *_ = await redis.xautoclaim(
+            INGEST_STREAM_KEY, INGEST_GROUP, consumer, min_idle_ms, count=count
+        )
+        if not entries:
+            reclaimed = False
+            response = await redis.xreadgroup(
+                INGEST_GROUP, consumer, {INGEST_STREAM_KEY: ">"}, count=count, block=block_ms
+            )
+            entries = response[0][1] if response else []
+        return reclaimed, [
+            (entry_id, orjson.loads(fields["events"])) for entry_id, fields in entries
+        ]
+    
+    @staticmethod
+    async def ack_events(entry_ids: List[str]):
+        """Acknowledge stored event batches and drop them from the stream."""
+        if entry_ids:
+            pipe = (await get_async_redis()).pipeline(transaction=False)
+            pipe.xack(INGEST_STREAM_KEY, INGEST_GROUP, *entry_ids)
+            pipe.xdel(INGEST_STREAM_KEY, *entry_ids)
+            await pipe.execute()
+    
+    @staticmethod
+    async def get_delivery_count(entry_id: str) -> int:
+        """Times a pending ingest stream entry has been delivered to writers."""
+        pending = await (await get_async_redis()).xpending_range(
+            INGEST_STREAM_KEY, INGEST_GROUP, min=entry_id, max=entry_id, count=1
+        )
+        return pending[0]["times_delivered"] if pending else 0
+    
+    @staticmethod
+    async def dead_letter_events(entry_id: str, events: List[Dict[str, Any]], error: str):
+        """Move an ingest stream entry that cannot be stored to the dead-letter stream."""
+        pipe = (await get_async_redis()).pipeline(transaction=True)
+        pipe.xadd(INGEST_DEAD_LETTER_KEY, {
+            "entry_id": entry_id,
+            "events": orjson.dumps(events),
+            "error": error
+        })
+        pipe.xack(INGEST_STREAM_KEY, INGEST_GROUP, entry_id)
+        pipe.xdel(INGEST_STREAM_KEY, entry_id)
+        await pipe.execute()
+    
+    @staticmethod
+    async def get_reconcile_stats() -> Dict[str, str]:
+        """Get accumulated reconciliation counters."""
+        return await (await get_async_redis()).hgetall(RECONCILE_STATS_KEY)
+    
+    @staticmethod
+    async def get_ingest_backlog() -> int:
+        """Event batches published but not yet stored."""
+        return await (await get_async_redis()).xlen(INGEST_STREAM_KEY)
+    
+    @staticmethod
+    async def publish_alert(alert: Dict[str, Any], ttl: int) -> bool:
+        """Publish a quota alert once per window and level."""
+        redis = await get_async_redis()
+        keys, args = CacheService._publish_alert_args(alert, ttl)
+        script = redis.register_script(_PUBLISH_ALERT_SCRIPT)
+        return bool(await script(keys=keys, args=args))
+    
+    @staticmethod
+    async def set_aggregates(
+        window_type: str,
+        window_start: datetime,
+        aggregates: List[Dict[str, Any]],
+        ttl: int = 3600
+    ):
+        """Cache the aggregates of one window in one round trip."""
+        if not aggregates:
+            return
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        for aggregate in aggregates:
+            key = CacheService.get_aggregate_cache_key(
+                aggregate["tenant_id"],
+                aggregate["resource"],
+                aggregate["feature"],
+                window_type,
+                window_start
+            )
+            pipe.setex(key, ttl, f"{aggregate['total_quantity']}:{aggregate['event_count']}")
+        await pipe.execute()
+    
+    @staticmethod
+    async def record_top(increments: Dict[Tuple[str, str, datetime], Dict[str, int]]):
+        """
+        Add usage to heavy-hitter windows in one round trip.
+        
+        increments maps (dimension, period, window start) to the quantity
+        per member; each window keeps at most top_k_capacity members.
+        """
+        if not increments:
+            return
+        redis = await get_async_redis()
+        script = redis.register_script(_SPACE_SAVING_SCRIPT)
+        pipe = redis.pipeline(transaction=False)
+        for (dimension, period, window_start), amounts in increments.items():
+            args = [settings.top_k_capacity, CacheService._get_ttl(period)]
+            # Largest first, so small members are the ones that contend for slots
+            for member, amount in sorted(amounts.items(), key=lambda item: item[1], reverse=True):
+                args.extend((member, amount))
+            await script(
+                keys=list(CacheService.get_top_keys(dimension, period, window_start)),
+                args=args,
+                client=pipe
+            )
+        await pipe.execute()
+    
+    @staticmethod
+    async def get_top(
+        dimension: str,
+        period: str,
+        window_start: datetime,
+        limit: int
+    ) -> Tuple[List[Tuple[str, int, int]], int, int]:
+        """
+        Get the largest members of a heavy-hitter window.
+        
+        Returns (member, count, error) for up to limit members, the window
+        total and the smallest tracked count once the window is full (zero
+        before), which bounds every error and any untracked member's count.
+        """
+        top_key, error_key, total_key = CacheService.get_top_keys(dimension, period, window_start)
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        pipe.zrevrange(top_key, 0, limit - 1, withscores=True)
+        pipe.hgetall(error_key)
+        pipe.get(total_key)
+        pipe.zcard(top_key)
+        pipe.zrange(top_key, 0, 0, withscores=True)
+        ranked, errors, total, size, smallest = await pipe.execute()
+        
+        floor = int(smallest[0][1]) if smallest and size >= settings.top_k_capacity else 0
+        return [
+            (member, int(count), int(errors.get(member, 0)))
+            for member, count in ranked
+        ], int(total or 0), floor
+    
+    @staticmethod
+    async def publish_live(updates: Dict[str, List[list]]):
+        """
+        Publish counter changes to live usage streams in one round trip.
+        
+        updates maps a tenant to [resource, feature, period, window start,
+        value, delta] rows, sent as one message on the tenant's channel.
+        """
+        if not updates:
+            return
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        for tenant_id, counters in updates.items():
+            pipe.publish(f"{LIVE_PREFIX}{tenant_id}", orjson.dumps(counters))
+        await pipe.execute()
+    
+    @staticmethod
+    async def add_distinct(values: Dict[str, Set[str]]):
+        """Add values to hourly HyperLogLogs (keyed by get_distinct_key) in one round trip."""
+        if not values:
+            return
+        # Hourly sketches stay until the month they belong to is rolled up
+        ttl = CacheService._get_ttl("monthly")
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        for key, members in values.items():
+            pipe.pfadd(key, *members)
+            pipe.expire(key, ttl, nx=True)
+        await pipe.execute()
+    
+    @staticmethod
+    async def merge_distinct(
+        merges: List[Tuple[List[str], List[bytes]]]
+    ) -> List[Tuple[int, Optional[bytes]]]:
+        """
+        Union HyperLogLogs in one round trip.
+        
+        Each merge combines live keys with stored sketches (Redis DUMP
+        payloads); returns the estimate and DUMP payload of each union.
+        """
+        if not merges:
+            return []
+        pipe = (await get_async_redis()).pipeline(transaction=False)
+        positions = []
+        for keys, sketches in merges:
+            scratch = [f"{DISTINCT_PREFIX}tmp:{uuid.uuid4().hex}" for _ in range(len(sketches) + 1)]
+            for key, sketch in zip(scratch[1:], sketches):
+                pipe.restore(key, 60000, sketch, replace=True)
+            pipe.pfmerge(scratch[0], *keys, *scratch[1:])
+            pipe.pfcount(scratch[0])
+            pipe.dump(scratch[0])
+            pipe.delete(*scratch)
+            positions.append(len(sketches) + 1)
+        results = await pipe.execute()
+        
+        merged = []
+        offset = 0
+        for restores in positions:
+            offset += restores
+            merged.append((int(results[offset]), results[offset + 1]))
+            offset += 3
+        return merged
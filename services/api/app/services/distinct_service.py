@@ -0,0 +1,114 @@
+"""Service for distinct counts of event metadata values."""
+
+from typing import List, Dict, Iterable, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.repositories.distinct_repository import DistinctRepository
+from app.services.cache_service import AsyncCacheService, CacheService
+
+# Stored sketches each window type is rolled up from
+CHILD_WINDOWS = {
+    "daily": "hourly",
+    "monthly": "daily"
+}
+
+
+class DistinctService:
+    """
+    Service for HyperLogLog distinct counts.
+    
+    Ingest adds the values of settings.distinct_metadata_keys to hourly Redis
+    HyperLogLogs. When a window's aggregates are computed its sketches are
+    rolled up by merging and stored next to the aggregates.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.distinct_repo = DistinctRepository()
+        self.cache_service = AsyncCacheService()
+    
+    @staticmethod
+    def collect_values(events_data: List[dict], hours: List[datetime]) -> Dict[str, set]:
+        """Group the tracked metadata values of event rows by hourly sketch key."""
+        values: Dict[str, set] = {}
+        metadata_keys = settings.distinct_metadata_keys
+        if not metadata_keys:
+            return values
+        
+        for event_data, hour in zip(events_data, hours):
+            metadata = event_data.get("event_metadata")
+            if not metadata:
+                continue
+            for metadata_key in metadata_keys:
+                value = metadata.get(metadata_key)
+                if value is None:
+                    continue
+                key = CacheService.get_distinct_key(
+                    event_data["tenant_id"], event_data["resource"], event_data["feature"], metadata_key, hour
+                )
+                values.setdefault(key, set()).add(str(value))
+        return values
+    
+    async def rollup(
+        self,
+        window_type: str,
+        window_start: datetime,
+        window_end: datetime,
+        groups: Iterable[Tuple[str, str, str]]
+    ) -> Dict[Tuple[str, str, str], Dict[str, int]]:
+        """
+        Build and store the sketches of a window for (tenant, resource, feature) groups.
+        
+        A window's sketch is the union of its hourly sketches still in Redis,
+        its stored child sketches and its own stored sketch, so it never
+        shrinks once hourly keys expire. Returns the estimate per metadata
+        key for each group that had values.
+        """
+        metadata_keys = settings.distinct_metadata_keys
+        groups = set(groups)
+        if not metadata_keys or not groups:
+            return {}
+        
+        window_types = [window_type]
+        if window_type in CHILD_WINDOWS:
+            window_types.append(CHILD_WINDOWS[window_type])
+        stored: Dict[tuple, List[bytes]] = {}
+        for tenant_id, resource, feature, metadata_key, _, _, sketch in self.distinct_repo.get_sketches(
+            self.db, (group[0] for group in groups), window_types, window_start, window_end
+        ):
+            stored.setdefault((tenant_id, resource, feature, metadata_key), []).append(sketch)
+        
+        hours = []
+        hour = window_start
+        while hour <= window_end:
+            hours.append(hour)
+            hour += timedelta(hours=1)
+        
+        items = [(group, metadata_key) for group in groups for metadata_key in metadata_keys]
+        merged = await self.cache_service.merge_distinct([
+            (
+                [CacheService.get_distinct_key(*group, metadata_key, hour) for hour in hours],
+                stored.get((*group, metadata_key), [])
+            )
+            for group, metadata_key in items
+        ])
+        
+        sketches = []
+        estimates: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        for (group, metadata_key), (estimate, sketch) in zip(items, merged):
+            if not estimate or sketch is None:
+                continue
+            tenant_id, resource, feature = group
+            sketches.append({
+                "tenant_id": tenant_id,
+                "resource": resource,
+                "feature": feature,
+                "metadata_key": metadata_key,
+                "estimate": estimate,
+                "sketch": sketch
+            })
+            estimates.setdefault(group, {})[metadata_key] = estimate
+        
+        self.distinct_repo.save_sketches(self.db, window_type, window_start, sketches)
+        return estimates
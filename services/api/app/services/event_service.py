@@ -1,11 +1,33 @@
 """Service for event operations."""
 
-from typing import List
+import asyncio
+import heapq
+import itertools
+import uuid
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from app.models.schemas import EventCreate, Event, EventFilters, Pagination, PaginatedResponse
-from app.repositories.event_repository import EventRepository
-from app.services.cache_service import CacheService
+from app.config import settings
+from app.core.metrics import INGEST_BATCH_SIZE
+from app.models.schemas import EventCreate, EventBatchColumnar, EventFilters, Pagination
+from app.repositories.aggregate_repository import AggregateRepository
+from app.repositories.event_repository import EventRepository, EVENT_FIELDS
+from app.services.alert_service import AlertService
+from app.services.aggregate_service import SAMPLE_RATE_KEY
+from app.services.archive_service import ArchiveService, archive_boundary
+from app.services.cache_service import AsyncCacheService, CacheService
+from app.services.distinct_service import DistinctService
+from app.utils.time_utils import get_time_window, get_time_windows, is_window_closed, to_naive_utc, truncate_to_hour
+
+# Periods kept as live Redis counters for every ingested event; yearly
+# counters serve yearly quotas and alerts
+COUNTER_PERIODS = ["hourly", "daily", "monthly", "yearly"]
+
+# Periods with stored aggregates; late events in closed windows flag them for recompute
+AGGREGATE_PERIODS = ["hourly", "daily", "monthly"]
+
+# Periods with heavy-hitter (top tenants and features) tracking
+TOP_PERIODS = ["hourly", "daily"]
 
 
 class EventService:
@@ -14,15 +36,185 @@ class EventService:
     def __init__(self, db: Session):
         self.db = db
         self.event_repo = EventRepository()
-        self.cache_service = CacheService()
+        self.cache_service = AsyncCacheService()
+        self.alert_service = AlertService(db)
+        self.aggregate_repo = AggregateRepository()
     
-    async def ingest_event(self, event: EventCreate) -> Event:
-        """Ingest a single event."""
+    async def _update_counters(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        timestamp: datetime,
+        quantity: int,
+        now: datetime,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Increment counters for the windows an event falls in.
+        
+        Counters are only kept for open windows; late or backdated events
+        whose window already closed get their aggregates flagged for
+        recompute instead, or, in archived months, added to them.
+        """
+        # Counter keys and alert windows are UTC, as in the batch path
+        timestamp = to_naive_utc(timestamp)
+        archived_before = self._archived_before(now)
+        archived = archived_before is not None and timestamp < archived_before
+        if archived:
+            self._add_to_archived_aggregates([{
+                "tenant_id": tenant_id,
+                "resource": resource,
+                "feature": feature,
+                "quantity": quantity,
+                "timestamp": timestamp,
+                "event_metadata": metadata
+            }], archived_before)
+        
+        open_periods = []
+        dirty_windows = set()
+        for period in COUNTER_PERIODS:
+            if not is_window_closed(timestamp, period, now):
+                open_periods.append(period)
+            elif period in AGGREGATE_PERIODS and not archived:
+                window_start, _ = get_time_window(timestamp, period)
+                dirty_windows.add((tenant_id, period, window_start))
+        
+        alerts = []
+        live = {}
+        if open_periods:
+            values = await self.cache_service.increment_counters(
+                tenant_id, resource, feature, open_periods, timestamp, quantity
+            )
+            # Alert thresholds are evaluated on the values the increment returned
+            alerts = self.alert_service.find_crossings(
+                tenant_id,
+                resource,
+                feature,
+                timestamp,
+                quantity,
+                dict(zip(open_periods, values))
+            )
+            if settings.live_updates_enabled:
+                live[tenant_id] = []
+                for period, value in zip(open_periods, values):
+                    window_start, _ = get_time_window(timestamp, period)
+                    live[tenant_id].append([resource, feature, period, window_start.isoformat(), value, quantity])
+        hour = truncate_to_hour([timestamp])[0]
+        top = self._top_increments({(tenant_id, resource, feature, hour): quantity}, to_naive_utc(now))
+        distinct = DistinctService.collect_values(
+            [{"tenant_id": tenant_id, "resource": resource, "feature": feature, "event_metadata": metadata}],
+            [hour]
+        )
+        await self._after_counters(alerts, dirty_windows, [tenant_id], top, distinct, live)
+    
+    @staticmethod
+    def _archived_before(now: datetime) -> Optional[datetime]:
+        """Archive boundary when archiving is enabled; earlier months are in Parquet."""
+        return archive_boundary(now) if settings.archive_path else None
+    
+    def _add_to_archived_aggregates(self, events_data: List[dict], archived_before: datetime):
+        """
+        Add late events in archived months straight to their aggregates.
+        
+        Those months' events are no longer in the database, so recomputing
+        their windows from raw rows would replace the archived usage with
+        the late events alone. Distinct-value rollups are not updated.
+        """
+        deltas: Dict[tuple, list] = {}
+        for event_data in events_data:
+            timestamp = to_naive_utc(event_data["timestamp"])
+            if timestamp >= archived_before:
+                continue
+            quantity = event_data["quantity"]
+            sample_rate = (event_data.get("event_metadata") or {}).get(SAMPLE_RATE_KEY)
+            variance = None
+            if isinstance(sample_rate, (int, float)) and sample_rate < 1:
+                variance = quantity * quantity * (1 - sample_rate)
+            for period in AGGREGATE_PERIODS:
+                window_start, window_end = get_time_window(timestamp, period)
+                key = (
+                    event_data["tenant_id"],
+                    event_data["resource"],
+                    event_data["feature"],
+                    period,
+                    window_start,
+                    window_end
+                )
+                delta = deltas.setdefault(key, [0, 0, None])
+                delta[0] += quantity
+                delta[1] += 1
+                if variance is not None:
+                    delta[2] = (delta[2] or 0) + variance
+        if deltas:
+            self.aggregate_repo.add_to_windows(self.db, deltas)
+    
+    @staticmethod
+    def _top_increments(
+        hourly: Dict[tuple, int],
+        now: datetime
+    ) -> Dict[tuple, Dict[str, int]]:
+        """
+        Sum usage per open heavy-hitter window and member.
+        
+        hourly maps (tenant, resource, feature, hour) to a quantity; the
+        result is keyed like AsyncCacheService.record_top expects.
+        """
+        increments: Dict[tuple, Dict[str, int]] = {}
+        for period in TOP_PERIODS:
+            windows = get_time_windows((key[3] for key in hourly), period)
+            for (key, quantity), (window_start, window_end) in zip(hourly.items(), windows):
+                if window_end < now:
+                    continue
+                tenant_id, resource, feature, _ = key
+                for dimension, member in (
+                    ("tenants", tenant_id),
+                    ("features", CacheService.feature_member(resource, feature))
+                ):
+                    amounts = increments.setdefault((dimension, period, window_start), {})
+                    amounts[member] = amounts.get(member, 0) + quantity
+        return increments
+    
+    async def _after_counters(
+        self,
+        alerts: List[dict],
+        dirty_windows: set,
+        tenant_ids: Iterable[str],
+        top: Dict[tuple, Dict[str, int]],
+        distinct: Dict[str, set],
+        live: Dict[str, List[list]]
+    ):
+        """
+        Run the Redis writes that follow counter updates concurrently:
+        alerts, dirty windows, heavy hitters, distinct values, live usage
+        updates and recent write markers.
+        """
+        writes = []
+        if live:
+            writes.append(self.cache_service.publish_live(live))
+        if top:
+            writes.append(self.cache_service.record_top(top))
+        if distinct:
+            writes.append(self.cache_service.add_distinct(distinct))
+        if alerts:
+            writes.append(self.alert_service.publish(alerts))
+        if dirty_windows:
+            writes.append(self.cache_service.mark_windows_dirty(dirty_windows))
+        if settings.database_replica_urls:
+            writes.append(self.cache_service.mark_recent_writes(tenant_ids))
+        if writes:
+            await asyncio.gather(*writes)
+    
+    async def ingest_event(self, event: EventCreate) -> uuid.UUID:
+        """Ingest a single event and return its id."""
         # Set timestamp if not provided
         timestamp = event.timestamp or datetime.utcnow()
         
-        # Create event in database
+        # Create event in database; the id is generated here so the row
+        # doesn't have to be read back
+        event_id = uuid.uuid4()
         event_data = {
+            "id": event_id,
             "tenant_id": event.tenant_id,
             "resource": event.resource,
             "feature": event.feature,
@@ -31,29 +223,35 @@ class EventService:
             "event_metadata": event.metadata
         }
         
-        db_event = self.event_repo.create(self.db, event_data)
+        if settings.ingest_mode == "stream":
+            # Stored and counted by app.workers.ingest
+            await self.cache_service.publish_events([event_data])
+            return event_id
+        
+        self.event_repo.create(self.db, event_data)
         
         # Update Redis counters for common periods
-        for period in ["hourly", "daily", "monthly"]:
-            self.cache_service.increment_counter(
-                event.tenant_id,
-                event.resource,
-                event.feature,
-                period,
-                timestamp,
-                event.quantity
-            )
+        await self._update_counters(
+            event.tenant_id,
+            event.resource,
+            event.feature,
+            timestamp,
+            event.quantity,
+            datetime.utcnow(),
+            event.metadata
+        )
         
-        return Event.model_validate(db_event)
+        return event_id
     
-    async def ingest_batch(self, events: List[EventCreate]) -> List[Event]:
-        """Ingest multiple events in batch."""
+    async def ingest_batch(self, events: List[EventCreate]) -> List[uuid.UUID]:
+        """Ingest multiple events in batch and return their ids."""
         timestamp = datetime.utcnow()
         
         events_data = []
         for event in events:
             event_timestamp = event.timestamp or timestamp
             events_data.append({
+                "id": uuid.uuid4(),
                 "tenant_id": event.tenant_id,
                 "resource": event.resource,
                 "feature": event.feature,
@@ -62,40 +260,193 @@ class EventService:
                 "event_metadata": event.metadata
             })
         
-        # Bulk insert
-        db_events = self.event_repo.create_batch(self.db, events_data)
+        return await self._store_batch(events_data, timestamp)
+    
+    async def ingest_columnar(self, batch: EventBatchColumnar) -> List[uuid.UUID]:
+        """Ingest a columnar batch and return the event ids."""
+        timestamp = datetime.utcnow()
+        count = len(batch.tenant_idx)
         
-        # Update Redis counters
-        for event, db_event in zip(events, db_events):
-            for period in ["hourly", "daily", "monthly"]:
-                self.cache_service.increment_counter(
-                    event.tenant_id,
-                    event.resource,
-                    event.feature,
-                    period,
-                    db_event.timestamp,
-                    event.quantity
-                )
+        # Decode each distinct epoch-millisecond timestamp once
+        timestamps = [timestamp] * count
+        if batch.timestamps is not None:
+            decoded = {
+                millis: datetime.utcfromtimestamp(millis / 1000)
+                for millis in set(batch.timestamps)
+            }
+            timestamps = [decoded[millis] for millis in batch.timestamps]
+        metadata = batch.metadata or [None] * count
         
-        return [Event.model_validate(db_event) for db_event in db_events]
+        events_data = [
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": batch.tenants[tenant],
+                "resource": batch.resources[resource],
+                "feature": batch.features[feature],
+                "quantity": quantity,
+                "timestamp": event_timestamp,
+                "event_metadata": event_metadata
+            }
+            for tenant, resource, feature, quantity, event_timestamp, event_metadata in zip(
+                batch.tenant_idx,
+                batch.resource_idx,
+                batch.feature_idx,
+                batch.quantities,
+                timestamps,
+                metadata
+            )
+        ]
+        
+        return await self._store_batch(events_data, timestamp)
+    
+    async def _store_batch(self, events_data: List[dict], timestamp: datetime) -> List[uuid.UUID]:
+        """Store a batch of event rows, or hand it to the ingest workers."""
+        INGEST_BATCH_SIZE.observe(len(events_data))
+        
+        if settings.ingest_mode == "stream":
+            await self.cache_service.publish_events(events_data)
+        else:
+            await self.write_batch(events_data, timestamp)
+        
+        return [event_data["id"] for event_data in events_data]
+    
+    async def write_batch(
+        self,
+        events_data: List[dict],
+        now: datetime,
+        skip_existing: bool = False
+    ) -> int:
+        """
+        Bulk insert event rows, then update their counters.
+        
+        With skip_existing, rows whose id is already stored are dropped
+        first so a redelivered batch is not inserted or counted twice.
+        Returns the number of events written.
+        """
+        if skip_existing:
+            existing = self.event_repo.get_existing_ids(
+                self.db, [event_data["id"] for event_data in events_data]
+            )
+            if existing:
+                events_data = [e for e in events_data if e["id"] not in existing]
+        
+        if events_data:
+            self.event_repo.create_batch(self.db, events_data)
+            await self._update_counters_batch(events_data, now)
+        return len(events_data)
+    
+    async def _update_counters_batch(self, events_data: List[dict], now: datetime):
+        """
+        Increment counters for a batch of events in one round trip.
+        
+        Quantities are summed per counter and hour before windows are
+        bucketed, so window math runs once per distinct hour and each
+        counter gets a single increment; alert thresholds are checked once
+        per counter on the summed increment. Windows are bucketed in UTC.
+        """
+        now = to_naive_utc(now)
+        hourly: Dict[tuple, int] = {}
+        hours = truncate_to_hour(event_data["timestamp"] for event_data in events_data)
+        for event_data, hour in zip(events_data, hours):
+            key = (event_data["tenant_id"], event_data["resource"], event_data["feature"], hour)
+            hourly[key] = hourly.get(key, 0) + event_data["quantity"]
+        
+        archived_before = self._archived_before(now)
+        if archived_before is not None and min(hours) < archived_before:
+            self._add_to_archived_aggregates(events_data, archived_before)
+        
+        dirty_windows = set()
+        increments: Dict[tuple, List] = {}
+        for period in COUNTER_PERIODS:
+            windows = get_time_windows((key[3] for key in hourly), period)
+            for (key, quantity), (window_start, window_end) in zip(hourly.items(), windows):
+                tenant_id, resource, feature, hour = key
+                if window_end < now:
+                    # Archived months were added to their aggregates above
+                    archived = archived_before is not None and hour < archived_before
+                    if period in AGGREGATE_PERIODS and not archived:
+                        dirty_windows.add((tenant_id, period, window_start))
+                    continue
+                
+                counter = (tenant_id, resource, feature, period, window_start)
+                increment = increments.get(counter)
+                if increment is None:
+                    increments[counter] = [hour, quantity]
+                else:
+                    increment[1] += quantity
+        
+        counters = [
+            (tenant_id, resource, feature, period, hour, quantity)
+            for (tenant_id, resource, feature, period, _), (hour, quantity) in increments.items()
+        ]
+        values = await self.cache_service.increment_counter_batch(counters)
+        alerts = []
+        for (tenant_id, resource, feature, period, hour, quantity), value in zip(counters, values):
+            alerts.extend(self.alert_service.find_crossings(
+                tenant_id, resource, feature, hour, quantity, {period: value}
+            ))
+        live: Dict[str, List[list]] = {}
+        if settings.live_updates_enabled:
+            for (tenant_id, resource, feature, period, window_start), (_, quantity), value in zip(
+                increments, increments.values(), values
+            ):
+                live.setdefault(tenant_id, []).append(
+                    [resource, feature, period, window_start.isoformat(), value, quantity]
+                )
+        await self._after_counters(
+            alerts,
+            dirty_windows,
+            {key[0] for key in hourly},
+            self._top_increments(hourly, now),
+            DistinctService.collect_values(events_data, hours),
+            live
+        )
     
     async def get_events(
         self,
         filters: EventFilters,
         pagination: Pagination
-    ) -> PaginatedResponse:
-        """Get events with filters and pagination."""
-        events, total = self.event_repo.get_all(self.db, filters, pagination)
+    ) -> Dict[str, Any]:
+        """
+        Get events with filters and pagination.
+        
+        Returns the PaginatedResponse shape as plain dicts built straight
+        from the selected columns, ready for ORJSONResponse.
+        """
+        if ArchiveService.reaches(filters):
+            rows, total = self._get_rows_with_archive(filters, pagination)
+        else:
+            rows, total = self.event_repo.get_rows(self.db, filters, pagination)
         
         total_pages = (total + pagination.page_size - 1) // pagination.page_size
         
-        # Convert events to dict for PaginatedResponse
-        event_dicts = [Event.model_validate(event).model_dump() for event in events]
-        return PaginatedResponse(
-            items=event_dicts,
-            page=pagination.page,
-            page_size=pagination.page_size,
-            total=total,
-            total_pages=total_pages
-        )
-
+        return {
+            "items": [dict(zip(EVENT_FIELDS, row)) for row in rows],
+            "page": pagination.page,
+            "page_size": pagination.page_size,
+            "total": total,
+            "total_pages": total_pages
+        }
+    
+    def _get_rows_with_archive(
+        self,
+        filters: EventFilters,
+        pagination: Pagination
+    ) -> tuple[List[tuple], int]:
+        """Get a page of events from the database and the Parquet archive."""
+        offset = (pagination.page - 1) * pagination.page_size
+        depth = offset + pagination.page_size
+        
+        # Either source may hold the whole page, so take the newest depth
+        # rows from each and merge them by timestamp
+        db_rows = self.event_repo.get_latest_rows(self.db, filters, depth)
+        db_total = self.event_repo.count(self.db, filters)
+        archive = ArchiveService(self.db)
+        if len(db_rows) == depth and to_naive_utc(db_rows[-1][5]) >= archive_boundary(datetime.utcnow()):
+            # Archived events are all older than the boundary, so the database
+            # holds the whole page and only the archive's count is needed
+            return db_rows[offset:], db_total + archive.count(filters)
+        archived_rows, archived_total = archive.scan(filters, depth)
+        
+        merged = heapq.merge(db_rows, archived_rows, key=lambda row: to_naive_utc(row[5]), reverse=True)
+        return list(itertools.islice(merged, offset, depth)), db_total + archived_total
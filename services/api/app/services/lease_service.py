@@ -0,0 +1,92 @@
+"""Service for quota leases used by SDK-side enforcement."""
+
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.schemas import QuotaLeaseRequest, QuotaLease, QuotaLeaseRelease
+from app.repositories.quota_repository import QuotaRepository
+from app.services.cache_service import CacheService
+from app.services.quota_service import QuotaService
+
+
+class LeaseService:
+    """
+    Service for leasing slices of remaining quota to clients.
+    
+    A lease reserves units of a counter's remaining quota for a short time so
+    the client can enforce them locally. Open leases are subtracted from the
+    quota available to further leases; units the client actually uses are
+    recorded through normal ingestion, and the reservation is dropped when the
+    lease is released or expires. Overshoot of the global limit is bounded by
+    the open lease slices (each at most lease_max_fraction of the limit).
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.quota_repo = QuotaRepository()
+        self.quota_service = QuotaService(db)
+        self.cache_service = CacheService()
+    
+    async def acquire_lease(self, request: QuotaLeaseRequest) -> QuotaLease:
+        """Lease up to request.requested units of remaining quota."""
+        now = datetime.utcnow()
+        ttl = min(request.ttl_seconds, settings.lease_max_ttl_seconds)
+        lease_id = uuid.uuid4().hex
+        
+        quota = self.quota_repo.get_by_tenant_feature(
+            self.db,
+            request.tenant_id,
+            request.feature,
+            request.resource
+        )
+        
+        if not quota:
+            # No quota configured - the whole request is granted unreserved
+            return QuotaLease(
+                lease_id=lease_id,
+                granted=request.requested,
+                limit=999999,  # Unlimited
+                period=request.period,
+                unlimited=True,
+                ttl_seconds=ttl,
+                expires_at=now + timedelta(seconds=ttl)
+            )
+        
+        current_usage = await self.quota_service.get_usage(
+            request.tenant_id,
+            request.resource,
+            request.feature,
+            quota.period
+        )
+        
+        max_slice = max(1, int(quota.limit_value * settings.lease_max_fraction))
+        granted = self.cache_service.reserve_lease(
+            request.tenant_id,
+            request.resource,
+            request.feature,
+            quota.period,
+            lease_id,
+            min(request.requested, max_slice),
+            quota.limit_value - current_usage,
+            ttl
+        )
+        
+        return QuotaLease(
+            lease_id=lease_id,
+            granted=granted,
+            limit=quota.limit_value,
+            period=quota.period,
+            ttl_seconds=ttl,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+    
+    async def release_lease(self, release: QuotaLeaseRelease) -> int:
+        """Return a lease early; returns the units it had reserved."""
+        return self.cache_service.release_lease(
+            release.tenant_id,
+            release.resource,
+            release.feature,
+            release.period,
+            release.lease_id
+        )
@@ -0,0 +1,205 @@
+"""Service for live usage streams.
+
+Ingest publishes each tenant's counter changes to ``meter:live:<tenant>``.
+Each API process holds one Redis pub/sub connection, subscribed to the
+channels of tenants that have viewers on it, and hands every message to those
+viewers. A viewer merges the updates it receives and its stream sends them at
+most once per ``live_update_interval_ms``, so Redis and the network see the
+change rate, not the number of open dashboards.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+import orjson
+from app.config import settings
+from app.core.database import create_session
+from app.core.redis import get_async_redis
+from app.services.cache_service import LIVE_PREFIX
+from app.services.quota_service import QuotaService
+
+logger = logging.getLogger(__name__)
+
+
+class LiveViewer:
+    """One subscriber's pending counter updates, merged until they are sent."""
+    
+    def __init__(self, tenant_id: str, resource: Optional[str] = None, feature: Optional[str] = None):
+        self.tenant_id = tenant_id
+        self.resource = resource
+        self.feature = feature
+        # (resource, feature, period, window start) -> [value, delta]
+        self.pending: Dict[Tuple[str, str, str, str], list] = {}
+        self.changed = asyncio.Event()
+    
+    def add(self, counters: list):
+        """Merge published [resource, feature, period, window start, value, delta] rows."""
+        for resource, feature, period, window_start, value, delta in counters:
+            if self.resource and resource != self.resource:
+                continue
+            if self.feature and feature != self.feature:
+                continue
+            key = (resource, feature, period, window_start)
+            update = self.pending.get(key)
+            if update is None:
+                self.pending[key] = [value, delta]
+            else:
+                # Concurrent ingests can publish out of order; a window's
+                # counter only grows, so the largest value is the latest
+                update[0] = max(update[0], value)
+                update[1] += delta
+        if self.pending:
+            self.changed.set()
+    
+    def drain(self) -> list:
+        """Take the pending updates as response rows."""
+        rows = [
+            {
+                "resource": resource,
+                "feature": feature,
+                "period": period,
+                "window_start": window_start,
+                "value": value,
+                "delta": delta
+            }
+            for (resource, feature, period, window_start), (value, delta) in self.pending.items()
+        ]
+        self.pending = {}
+        self.changed.clear()
+        return rows
+
+
+class LiveHub:
+    """Per-process pub/sub subscription shared by every live viewer."""
+    
+    def __init__(self):
+        self.viewers: Dict[str, Set[LiveViewer]] = {}
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+    
+    async def join(self, viewer: LiveViewer):
+        """Start delivering a tenant's updates to viewer."""
+        async with self.lock:
+            viewers = self.viewers.setdefault(viewer.tenant_id, set())
+            viewers.add(viewer)
+            if len(viewers) > 1:
+                return
+            if self.pubsub is None:
+                self.pubsub = (await get_async_redis()).pubsub()
+            await self.pubsub.subscribe(f"{LIVE_PREFIX}{viewer.tenant_id}")
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+    
+    async def leave(self, viewer: LiveViewer):
+        """Stop delivering updates to viewer."""
+        async with self.lock:
+            viewers = self.viewers.get(viewer.tenant_id)
+            if not viewers:
+                return
+            viewers.discard(viewer)
+            if not viewers:
+                del self.viewers[viewer.tenant_id]
+                if self.pubsub is not None:
+                    await self.pubsub.unsubscribe(f"{LIVE_PREFIX}{viewer.tenant_id}")
+    
+    async def _read(self):
+        """Hand published messages to the viewers of their tenant."""
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live update subscription failed")
+                await asyncio.sleep(1)
+                continue
+            if not message or message["type"] != "message":
+                continue
+            
+            tenant_id = message["channel"][len(LIVE_PREFIX):]
+            counters = orjson.loads(message["data"])
+            for viewer in self.viewers.get(tenant_id, ()):
+                viewer.add(counters)
+    
+    async def close(self):
+        """Stop reading and release the pub/sub connection."""
+        if self.reader is not None:
+            self.reader.cancel()
+            try:
+                await self.reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+        self.viewers.clear()
+
+
+# Shared by every live stream in this process
+live_hub = LiveHub()
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class LiveService:
+    """Service for streaming a tenant's usage as it changes."""
+    
+    @staticmethod
+    async def get_snapshot(tenant_id: str, resource: Optional[str], feature: Optional[str]) -> Dict[str, Any]:
+        """Get the tenant usage snapshot a stream starts from, in its own session."""
+        db = create_session()
+        try:
+            snapshot = await QuotaService(db).get_tenant_snapshot(tenant_id)
+        finally:
+            db.close()
+        snapshot["quotas"] = [
+            quota for quota in snapshot["quotas"]
+            if (not resource or quota["resource"] in (None, resource))
+            and (not feature or quota["feature"] == feature)
+        ]
+        return snapshot
+    
+    @staticmethod
+    async def stream(
+        tenant_id: str,
+        resource: Optional[str] = None,
+        feature: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a snapshot event, then usage events with the counters that changed.
+        
+        The viewer joins before the snapshot is read, so no change is missed
+        between the two; usage values are absolute, so a change already in
+        the snapshot is harmless. Ends when the client disconnects and the
+        response cancels the generator.
+        """
+        viewer = LiveViewer(tenant_id, resource, feature)
+        interval = settings.live_update_interval_ms / 1000
+        await live_hub.join(viewer)
+        try:
+            snapshot = await LiveService.get_snapshot(tenant_id, resource, feature)
+            yield format_event("snapshot", snapshot)
+            
+            sent_at = time.monotonic()
+            while True:
+                try:
+                    await asyncio.wait_for(viewer.changed.wait(), settings.live_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield b": keepalive\n\n"
+                    continue
+                
+                # Let changes arriving within the interval merge into one event
+                delay = sent_at + interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                sent_at = time.monotonic()
+                yield format_event("usage", {"tenant_id": tenant_id, "updates": viewer.drain()})
+        finally:
+            await live_hub.leave(viewer)
@@ -1,13 +1,27 @@
 """Service for quota validation operations."""
 
+import asyncio
+import time
+from typing import Optional, Dict, List, Set, Tuple, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
-from app.models.schemas import QuotaValidationRequest, QuotaValidationResult
+from app.config import settings
+from app.models.database import MeteringQuota
+from app.models.schemas import (
+    QuotaValidationRequest,
+    QuotaValidationResult,
+    QuotaBatchValidationRequest,
+    QuotaBatchValidationResult
+)
 from app.repositories.quota_repository import QuotaRepository
 from app.repositories.event_repository import EventRepository
-from app.services.cache_service import CacheService
+from app.services.cache_service import AsyncCacheService
 from app.utils.time_utils import get_time_window, get_period_end
 
+# Active quotas per tenant as (resource, feature, limit_value, period,
+# alert_threshold) tuples, with the time the entry expires
+_tenant_quota_cache: Dict[str, Tuple[float, List[tuple]]] = {}
+
 
 class QuotaService:
     """Service for quota validation business logic."""
@@ -16,7 +30,7 @@ class QuotaService:
         self.db = db
         self.quota_repo = QuotaRepository()
         self.event_repo = EventRepository()
-        self.cache_service = CacheService()
+        self.cache_service = AsyncCacheService()
     
     async def validate_quota(
         self,
@@ -31,6 +45,187 @@ class QuotaService:
             request.resource
         )
         
+        if not quota:
+            return self._build_result(request, None, 0, datetime.utcnow())
+        
+        # Get current usage
+        current_usage = await self.get_usage(
+            request.tenant_id,
+            request.resource,
+            request.feature,
+            quota.period
+        )
+        
+        return self._build_result(request, quota, current_usage, datetime.utcnow())
+    
+    async def validate_quota_batch(
+        self,
+        batch: QuotaBatchValidationRequest
+    ) -> QuotaBatchValidationResult:
+        """
+        Validate several quota checks with one quota query and one counter fetch.
+        
+        Counters missing from Redis are filled with one grouped usage query
+        per tenant. Results are returned in request order. With all_or_nothing, requests
+        against the same counter are checked cumulatively and every result is
+        denied if any single one is.
+        """
+        now = datetime.utcnow()
+        requests = batch.requests
+        
+        quotas = self.quota_repo.get_by_tenant_features(
+            self.db,
+            [(r.tenant_id, r.feature, r.resource) for r in requests]
+        )
+        
+        lookups = [
+            (r.tenant_id, r.resource, r.feature, quota.period)
+            for r, quota in zip(requests, quotas)
+            if quota
+        ]
+        usages = dict(zip(lookups, await self.cache_service.get_counters(lookups, now)))
+        
+        misses: Dict[str, set] = {}
+        for (tenant_id, resource, feature, period), usage in usages.items():
+            if usage is None:
+                misses.setdefault(tenant_id, set()).add((resource, feature, period))
+        for tenant_id, tenant_misses in misses.items():
+            totals = await self._get_usages_from_db(tenant_id, tenant_misses, now)
+            for (resource, feature, period), usage in totals.items():
+                usages[(tenant_id, resource, feature, period)] = usage
+        
+        results = []
+        pending = {}
+        for request, quota in zip(requests, quotas):
+            if not quota:
+                results.append(self._build_result(request, None, 0, now))
+                continue
+            
+            lookup = (request.tenant_id, request.resource, request.feature, quota.period)
+            claimed = pending.get(lookup, 0) if batch.all_or_nothing else 0
+            results.append(
+                self._build_result(request, quota, usages[lookup] + claimed, now)
+            )
+            pending[lookup] = pending.get(lookup, 0) + request.quantity
+        
+        allowed = all(result.allowed for result in results)
+        if batch.all_or_nothing and not allowed:
+            for result in results:
+                if result.allowed:
+                    result.allowed = False
+                    result.message = "Denied because another check in the batch exceeded its quota"
+        
+        return QuotaBatchValidationResult(allowed=allowed, results=results)
+    
+    def _get_tenant_quotas(self, tenant_id: str) -> List[tuple]:
+        """Get a tenant's active quotas, cached in-process for a short while."""
+        now = time.monotonic()
+        cached = _tenant_quota_cache.get(tenant_id)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        quotas = [
+            (quota.resource, quota.feature, quota.limit_value, quota.period, quota.alert_threshold)
+            for quota in self.quota_repo.get_all_by_tenant(self.db, tenant_id)
+        ]
+        if len(_tenant_quota_cache) >= 10000:
+            _tenant_quota_cache.clear()
+        _tenant_quota_cache[tenant_id] = (now + settings.snapshot_quota_cache_seconds, quotas)
+        return quotas
+    
+    async def get_tenant_snapshot(self, tenant_id: str) -> Dict[str, Any]:
+        """
+        Get a tenant's usage against all of its active quotas.
+        
+        Counters for every quota are read in one round trip; quotas whose
+        counter is missing, and quotas without a resource (which cover all
+        of the feature's resources), are filled from one grouped query.
+        Returns the TenantUsageSnapshot shape as plain dicts.
+        """
+        now = datetime.utcnow()
+        quotas = self._get_tenant_quotas(tenant_id)
+        
+        lookups = [
+            (tenant_id, resource, feature, period)
+            for resource, feature, _, period, _ in quotas
+            if resource
+        ]
+        usages = dict(zip(lookups, await self.cache_service.get_counters(lookups, now)))
+        
+        misses = {
+            (resource, feature, period)
+            for resource, feature, _, period, _ in quotas
+            if usages.get((tenant_id, resource, feature, period)) is None
+        }
+        totals = await self._get_usages_from_db(tenant_id, misses, now)
+        for (resource, feature, period), usage in totals.items():
+            usages[(tenant_id, resource, feature, period)] = usage
+        
+        snapshot = []
+        for resource, feature, limit_value, period, alert_threshold in quotas:
+            usage = usages[(tenant_id, resource, feature, period)]
+            snapshot.append({
+                "resource": resource,
+                "feature": feature,
+                "period": period,
+                "limit": limit_value,
+                "current_usage": usage,
+                "remaining": max(0, limit_value - usage),
+                "alert_threshold": alert_threshold,
+                "exceeded": usage >= limit_value,
+                "reset_at": get_period_end(now, period)
+            })
+        
+        return {"tenant_id": tenant_id, "generated_at": now, "quotas": snapshot}
+    
+    async def _get_usages_from_db(
+        self,
+        tenant_id: str,
+        counters: Set[Tuple[Optional[str], str, str]],
+        now: datetime
+    ) -> Dict[Tuple[Optional[str], str, str], int]:
+        """
+        Sum a tenant's usage for (resource, feature, period) counters in one query.
+        
+        A None resource sums every resource of the feature. Counters of a
+        single resource are seeded in Redis.
+        """
+        if not counters:
+            return {}
+        totals = self.event_repo.get_usage_by_windows(
+            self.db,
+            tenant_id,
+            {feature for _, feature, _ in counters},
+            {period: get_time_window(now, period) for _, _, period in counters}
+        )
+        
+        usages = {}
+        seeds = []
+        for resource, feature, period in counters:
+            if resource:
+                usage = totals.get((resource, feature, period), 0)
+                if usage > 0:
+                    seeds.append(self.cache_service.set_counter(
+                        tenant_id, resource, feature, period, now, usage
+                    ))
+            else:
+                usage = sum(
+                    total for (_, total_feature, total_period), total in totals.items()
+                    if total_feature == feature and total_period == period
+                )
+            usages[(resource, feature, period)] = usage
+        if seeds:
+            await asyncio.gather(*seeds)
+        return usages
+    
+    def _build_result(
+        self,
+        request: QuotaValidationRequest,
+        quota: Optional[MeteringQuota],
+        current_usage: int,
+        now: datetime
+    ) -> QuotaValidationResult:
+        """Build the validation result for a request against its quota."""
         if not quota:
             # No quota configured - allow by default
             return QuotaValidationResult(
@@ -38,25 +233,17 @@ class QuotaService:
                 remaining=999999,  # Unlimited
                 limit=999999,
                 period=request.period,
-                reset_at=get_period_end(datetime.utcnow(), request.period),
+                reset_at=get_period_end(now, request.period),
                 current_usage=0,
                 message="No quota configured"
             )
         
-        # Get current usage
-        current_usage = await self.get_usage(
-            request.tenant_id,
-            request.resource,
-            request.feature,
-            quota.period
-        )
-        
         # Calculate remaining
         remaining = max(0, quota.limit_value - current_usage)
         allowed = remaining >= request.quantity
         
         # Calculate reset time
-        reset_at = get_period_end(datetime.utcnow(), quota.period)
+        reset_at = get_period_end(now, quota.period)
         
         message = None
         if not allowed:
@@ -83,7 +270,7 @@ class QuotaService:
         timestamp = datetime.utcnow()
         
         # Try Redis cache first
-        usage = self.cache_service.get_counter(
+        usage = await self.cache_service.get_counter(
             tenant_id,
             resource,
             feature,
@@ -94,7 +281,17 @@ class QuotaService:
         if usage is not None:
             return usage
         
-        # Fallback to database
+        return await self._get_usage_from_db(tenant_id, resource, feature, period, timestamp)
+    
+    async def _get_usage_from_db(
+        self,
+        tenant_id: str,
+        resource: str,
+        feature: str,
+        period: str,
+        timestamp: datetime
+    ) -> int:
+        """Sum usage from the database and seed the missing counter."""
         window_start, window_end = get_time_window(timestamp, period)
         usage = self.event_repo.get_usage_summary(
             self.db,
@@ -107,13 +304,8 @@ class QuotaService:
         
         # Cache the result for future queries
         if usage > 0:
-            from app.core.redis import get_redis
-            redis = get_redis()
-            key = self.cache_service.get_counter_key(
-                tenant_id, resource, feature, period, timestamp
+            await self.cache_service.set_counter(
+                tenant_id, resource, feature, period, timestamp, usage
             )
-            ttl = self.cache_service._get_ttl(period)
-            redis.setex(key, ttl, usage)
         
         return usage
-
@@ -0,0 +1,143 @@
+"""Service for reconciling Redis counters and aggregates with the database."""
+
+import asyncio
+from typing import Dict, Any
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.repositories.event_repository import EventRepository
+from app.services.aggregate_service import AggregateService
+from app.services.archive_service import archive_boundary
+from app.services.cache_service import CacheService
+from app.utils.time_utils import get_time_window
+
+
+class ReconciliationService:
+    """Service for counter and aggregate reconciliation."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.event_repo = EventRepository()
+        self.cache_service = CacheService()
+        self.aggregate_service = AggregateService(db)
+    
+    def reconcile_counters(self) -> Dict[str, Any]:
+        """
+        Compare active Redis counters with database sums and repair drift.
+        
+        Each counter hash is read before its database sum is queried, and a
+        field is only repaired if it still holds the value read; fields that
+        moved in between are left for the next run.
+        
+        Ingest commits events before incrementing their counters, so events
+        stored within reconciliation_grace_seconds of the hash read may or
+        may not be counted in it. A field is consistent anywhere between the
+        settled sum and the settled plus recent sum, and drifted fields are
+        clamped into that range rather than set to the full sum, which would
+        count in-flight increments twice.
+        
+        Windows reaching back into archived months (yearly counters) are
+        skipped, since their archived events are no longer in the database.
+        """
+        now = datetime.utcnow()
+        grace = timedelta(seconds=settings.reconciliation_grace_seconds)
+        archived_before = archive_boundary(now) if settings.archive_path else None
+        checked = drifted = repaired = 0
+        closed_keys = []
+        
+        for key in self.cache_service.get_active_counter_keys():
+            parsed = self.cache_service.parse_counter_key(key)
+            if parsed is None:
+                closed_keys.append(key)
+                continue
+            
+            tenant_sid, period, window_start = parsed
+            window_start, window_end = get_time_window(window_start, period)
+            if window_end < now:
+                # Closed windows are no longer read; aggregates cover them
+                closed_keys.append(key)
+                continue
+            if archived_before is not None and window_start < archived_before:
+                # Part of the window's events are archived, so the database sum
+                # would undercount (yearly counters)
+                continue
+            
+            tenant_id = self.cache_service.resolve_interned([tenant_sid])[0]
+            if tenant_id is None:
+                continue
+            
+            read_at = datetime.now(timezone.utc)
+            observed = self.cache_service.get_counter_fields(key)
+            rows = self.event_repo.get_usage_by_feature(
+                self.db, tenant_id, window_start, window_end, stored_after=read_at - grace
+            )
+            
+            # In dual mode part of the usage still lives in legacy keys
+            legacy = [0] * len(rows)
+            if settings.counter_layout == "dual":
+                legacy = self.cache_service.get_legacy_counters(
+                    tenant_id,
+                    [(row.resource, row.feature) for row in rows],
+                    period,
+                    window_start
+                )
+            
+            # Field -> (lowest, highest) consistent counter value
+            expected = {}
+            for row, legacy_value in zip(rows, legacy):
+                field = (
+                    f"{self.cache_service.intern(row.resource)}:"
+                    f"{self.cache_service.intern(row.feature)}"
+                )
+                total = int(row.total_quantity or 0) - legacy_value
+                expected[field] = (total - int(row.recent_quantity or 0), total)
+            
+            repairs = []
+            for field in set(observed) | set(expected):
+                checked += 1
+                current = observed.get(field, 0)
+                lowest, highest = expected.get(field, (0, 0))
+                value = min(max(current, lowest), highest)
+                if current != value:
+                    repairs.append((field, current, value))
+            
+            drifted += len(repairs)
+            repaired += self.cache_service.compare_and_set_counters(key, period, repairs)
+        
+        self.cache_service.remove_active_counter_keys(closed_keys)
+        self.cache_service.record_reconcile_stats(checked, drifted, repaired)
+        
+        return {
+            "checked": checked,
+            "drifted": drifted,
+            "repaired": repaired,
+            "drift_rate": drifted / checked if checked else 0.0
+        }
+    
+    async def recompute_dirty_aggregates(self) -> int:
+        """Recompute aggregates for windows that received late events."""
+        windows = self.cache_service.pop_dirty_windows(settings.aggregation_batch_size)
+        if not windows:
+            return 0
+        
+        try:
+            return await self.aggregate_service.recompute_windows(windows)
+        except Exception:
+            # Put the claimed windows back so the next run retries them
+            self.cache_service.mark_windows_dirty(windows)
+            raise
+    
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run one full reconciliation pass.
+        
+        Counter reconciliation only makes blocking database and Redis calls,
+        so it runs in the default executor rather than on the event loop.
+        """
+        if settings.counter_layout == "legacy":
+            result = {"checked": 0, "drifted": 0, "repaired": 0, "drift_rate": 0.0}
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.reconcile_counters)
+        result["aggregates_recomputed"] = await self.recompute_dirty_aggregates()
+        return result
@@ -0,0 +1,51 @@
+"""Service for heavy-hitter (top tenants and features) queries."""
+
+import orjson
+from typing import Dict, Any, Optional
+from datetime import datetime
+from app.services.cache_service import AsyncCacheService
+from app.utils.time_utils import get_time_window, to_naive_utc
+
+
+class TopService:
+    """Service for heavy-hitter queries."""
+    
+    def __init__(self):
+        self.cache_service = AsyncCacheService()
+    
+    async def get_top(
+        self,
+        dimension: str,
+        period: str,
+        limit: int,
+        at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the largest tenants or resource/features in the window containing at.
+        
+        Counts come from the Space-Saving summary kept at ingest, so this
+        reads a bounded number of members whatever the traffic. Returns the
+        TopResponse shape as plain dicts.
+        """
+        window_start, _ = get_time_window(to_naive_utc(at or datetime.utcnow()), period)
+        ranked, total, max_error = await self.cache_service.get_top(dimension, period, window_start, limit)
+        
+        items = []
+        for member, quantity, error in ranked:
+            if dimension == "tenants":
+                item = {"tenant_id": member}
+            else:
+                resource, feature = orjson.loads(member)
+                item = {"resource": resource, "feature": feature}
+            item["quantity"] = quantity
+            item["error"] = error
+            items.append(item)
+        
+        return {
+            "dimension": dimension,
+            "period": period,
+            "window_start": window_start,
+            "total": total,
+            "max_error": max_error,
+            "items": items
+        }
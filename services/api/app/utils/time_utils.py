@@ -1,7 +1,7 @@
 """Time window calculation utilities."""
 
-from datetime import datetime, timedelta
-from typing import Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
 
 
 def get_time_window(
@@ -44,6 +44,34 @@ def get_time_window(
     return window_start, window_end
 
 
+def truncate_to_hour(timestamps: Iterable[datetime]) -> List[datetime]:
+    """Truncate timestamps to the start of their hour, as naive UTC."""
+    return [
+        to_naive_utc(timestamp).replace(minute=0, second=0, microsecond=0)
+        for timestamp in timestamps
+    ]
+
+
+def get_time_windows(
+    hours: Iterable[datetime],
+    window_type: str
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Calculate time windows for many hour-truncated timestamps at once.
+    
+    Every window type is a whole number of hours, so the window of each
+    distinct hour is calculated once and shared by all timestamps in it.
+    """
+    windows: Dict[datetime, Tuple[datetime, datetime]] = {}
+    result = []
+    for hour in hours:
+        window = windows.get(hour)
+        if window is None:
+            window = windows[hour] = get_time_window(hour, window_type)
+        result.append(window)
+    return result
+
+
 def get_period_start(timestamp: datetime, period: str) -> datetime:
     """Get the start of a period for a given timestamp."""
     window_start, _ = get_time_window(timestamp, period)
@@ -55,3 +83,20 @@ def get_period_end(timestamp: datetime, period: str) -> datetime:
     _, window_end = get_time_window(timestamp, period)
     return window_end
 
+
+
+def to_naive_utc(timestamp: datetime) -> datetime:
+    """Normalize a timestamp to naive UTC for comparisons."""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def is_window_closed(
+    timestamp: datetime,
+    window_type: str,
+    now: datetime
+) -> bool:
+    """Check whether the window containing timestamp ended before now."""
+    _, window_end = get_time_window(to_naive_utc(timestamp), window_type)
+    return window_end < to_naive_utc(now)
@@ -0,0 +1,51 @@
+"""Quota alert dispatch worker.
+
+Consumes threshold crossings published by ingestion to the ``meter:alerts``
+Redis stream and delivers them in batches. Run one or more with
+``python -m app.workers.alerts``; entries left pending by a crashed worker are
+reclaimed by the others.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import time
+from app.config import settings
+from app.services.alert_service import AlertService
+from app.services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+# Pending entries idle this long are assumed abandoned and reclaimed
+RECLAIM_IDLE_MS = 60000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dispatch quota alerts")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.log_level)
+    backoff = 1
+    
+    while True:
+        try:
+            entries = CacheService.read_alerts(
+                args.consumer, settings.alert_batch_size, 5000, RECLAIM_IDLE_MS
+            )
+            if not entries:
+                continue
+            
+            AlertService.dispatch([fields for _, fields in entries])
+            CacheService.ack_alerts([entry_id for entry_id, _ in entries])
+            backoff = 1
+        except Exception:
+            # Unacknowledged entries stay pending and are retried
+            logger.exception("Alert dispatch failed; retrying in %ss", backoff)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Cold storage worker.
+
+Moves events older than ``ARCHIVE_AFTER_DAYS`` to Parquet files under
+``ARCHIVE_PATH``, one file per tenant and month per run. Run a single
+instance with ``python -m app.workers.archive`` (add ``--once`` for a single
+pass, e.g. from cron).
+"""
+
+import argparse
+import logging
+import time
+from app.config import settings
+from app.core.database import create_session
+from app.services.archive_service import ArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+def run_once() -> dict:
+    """Run a single archive pass in its own session."""
+    db = create_session()
+    try:
+        return ArchiveService(db).run()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old events to Parquet")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.log_level)
+    if not settings.archive_path:
+        parser.error("ARCHIVE_PATH is not set")
+    
+    while True:
+        started = time.monotonic()
+        try:
+            result = run_once()
+            logger.info("Archived %(events)d events in %(partitions)d partitions", result)
+        except Exception:
+            logger.exception("Archive pass failed")
+        
+        if args.once:
+            break
+        elapsed = time.monotonic() - started
+        time.sleep(max(0.0, settings.archive_interval_seconds - elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Event ingest worker.
+
+With ``INGEST_MODE=stream`` the API publishes each accepted batch to the
+``meter:ingest`` Redis stream instead of writing it. Workers in the
+``ingest-writers`` consumer group bulk-insert several batches per transaction,
+update their counters in one pipeline and acknowledge the batches only after
+the commit. Batches left pending by a crashed worker are reclaimed by the
+others, skipping events that were already stored.
+
+When a group of batches fails to store, each batch is retried on its own so
+one bad batch does not hold back the rest. A batch that still fails is left
+pending to be retried; after ``ingest_max_deliveries`` deliveries it moves
+to the ``meter:ingest:dead`` stream instead. Connection errors are never
+held against a batch.
+
+Run with ``python -m app.workers.ingest``; ``--processes N`` starts N workers
+on this host, and any number of hosts can run them.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import List, Tuple, Dict, Any
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from sqlalchemy.exc import InterfaceError, OperationalError
+from app.config import settings
+from app.core.database import create_session
+from app.services.cache_service import AsyncCacheService
+from app.services.event_service import EventService
+
+logger = logging.getLogger(__name__)
+
+
+def _decode(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Restore event ids and timestamps serialized by the API."""
+    return [
+        {**event, "id": uuid.UUID(event["id"]), "timestamp": datetime.fromisoformat(event["timestamp"])}
+        for event in events
+    ]
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Check whether an error says nothing about the batch being written."""
+    return isinstance(exc, (OperationalError, InterfaceError, RedisConnectionError, RedisTimeoutError))
+
+
+async def write_entries(entries: List[Tuple[str, List[Dict[str, Any]]]], reclaimed: bool) -> int:
+    """Write the events of several stream entries in one transaction."""
+    events_data = [event for _, events in entries for event in _decode(events)]
+    db = create_session()
+    try:
+        return await EventService(db).write_batch(
+            events_data, datetime.utcnow(), skip_existing=reclaimed
+        )
+    finally:
+        db.close()
+
+
+async def write_each(entries: List[Tuple[str, List[Dict[str, Any]]]]) -> int:
+    """
+    Write and acknowledge stream entries one at a time after a group failed.
+    
+    Entries that fail stay pending, or are dead-lettered once delivered
+    ingest_max_deliveries times; transient errors are raised.
+    """
+    written = 0
+    for entry_id, events in entries:
+        try:
+            # The group may have failed after committing, so skip stored events
+            written += await write_entries([(entry_id, events)], True)
+        except Exception as exc:
+            if _is_transient(exc):
+                raise
+            deliveries = await AsyncCacheService.get_delivery_count(entry_id)
+            if deliveries < settings.ingest_max_deliveries:
+                logger.warning("Ingest entry %s failed (delivery %d); left pending", entry_id, deliveries)
+                continue
+            logger.error("Ingest entry %s failed %d times; dead-lettered", entry_id, deliveries, exc_info=True)
+            await AsyncCacheService.dead_letter_events(entry_id, events, repr(exc))
+            continue
+        await AsyncCacheService.ack_events([entry_id])
+    return written
+
+
+async def run(consumer: str):
+    """Consume the ingest stream until the process is stopped."""
+    backoff = 1
+    
+    while True:
+        try:
+            reclaimed, entries = await AsyncCacheService.read_events(
+                consumer,
+                settings.ingest_read_count,
+                5000,
+                settings.ingest_reclaim_idle_ms
+            )
+            if not entries:
+                continue
+            
+            try:
+                written = await write_entries(entries, reclaimed)
+            except Exception as exc:
+                if _is_transient(exc):
+                    raise
+                logger.warning("Storing %d batches together failed; retrying each", len(entries), exc_info=True)
+                written = await write_each(entries)
+            else:
+                await AsyncCacheService.ack_events([entry_id for entry_id, _ in entries])
+            logger.debug("Stored %d events from %d batches", written, len(entries))
+            backoff = 1
+        except Exception:
+            # Unacknowledged batches stay pending and are reclaimed
+            logger.exception("Event write failed; retrying in %ss", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+
+def run_worker(consumer: str):
+    asyncio.run(run(consumer))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write events from the ingest stream")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.log_level)
+    
+    if args.processes <= 1:
+        run_worker(args.consumer)
+        return
+    
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(f"{args.consumer}-{i}",), name=f"ingest-{i}")
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Periodic counter and aggregate reconciliation worker.
+
+Run with ``python -m app.workers.reconcile`` (add ``--once`` for a single
+pass, e.g. from cron).
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.core.database import create_session
+from app.core.redis import close_async_redis
+from app.services.reconciliation_service import ReconciliationService
+
+logger = logging.getLogger(__name__)
+
+
+async def run_once() -> dict:
+    """Run a single reconciliation pass in its own session."""
+    db = create_session()
+    try:
+        return await ReconciliationService(db).run()
+    finally:
+        db.close()
+        # The async client is bound to this pass's event loop
+        await close_async_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile Redis counters with the database")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.log_level)
+    
+    while True:
+        started = time.monotonic()
+        try:
+            result = asyncio.run(run_once())
+            logger.info(
+                "Reconciled %(checked)d counters: %(drifted)d drifted, "
+                "%(repaired)d repaired, drift rate %(drift_rate).4f, "
+                "%(aggregates_recomputed)d aggregates recomputed",
+                result
+            )
+        except Exception:
+            logger.exception("Reconciliation pass failed")
+        
+        if args.once:
+            break
+        elapsed = time.monotonic() - started
+        time.sleep(max(0.0, settings.reconciliation_interval_seconds - elapsed))
+
+
+if __name__ == "__main__":
+    main()
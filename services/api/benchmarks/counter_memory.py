@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare Redis memory used by the legacy and compact counter layouts.
+
+Writes synthetic counters for every (tenant, resource, feature, period) into
+the target Redis, measures ``used_memory`` for each layout and deletes the
+keys it created. Point it at a scratch database:
+
+    python -m benchmarks.counter_memory --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import json
+from datetime import datetime
+from redis import Redis
+from app.config import settings
+from app.core.redis import get_redis
+from app.services.cache_service import CacheService, _intern_cache
+
+PERIODS = ["hourly", "daily", "monthly"]
+
+
+def _names(prefix: str, count: int) -> list[str]:
+    return [f"{prefix}_{i:06d}" for i in range(count)]
+
+
+def _used_memory(redis: Redis) -> int:
+    return int(redis.info("memory")["used_memory"])
+
+
+def _write_legacy(redis: Redis, tenants, resources, features, now: datetime) -> int:
+    pipe = redis.pipeline(transaction=False)
+    keys = 0
+    for tenant in tenants:
+        for resource in resources:
+            for feature in features:
+                for period in PERIODS:
+                    key = CacheService.get_counter_key(tenant, resource, feature, period, now)
+                    pipe.set(key, 1, ex=86400)
+                    keys += 1
+        pipe.execute()
+    return keys
+
+
+def _write_compact(redis: Redis, tenants, resources, features, now: datetime) -> int:
+    # Keys, fields and the intern hashes come from CacheService itself
+    pipe = redis.pipeline(transaction=False)
+    hashes = set()
+    for tenant in tenants:
+        for period in PERIODS:
+            for resource in resources:
+                for feature in features:
+                    key, field = CacheService.get_counter_location(
+                        tenant, resource, feature, period, now
+                    )
+                    pipe.hset(key, field, 1)
+                    hashes.add(key)
+            pipe.expire(key, 86400)
+        pipe.execute()
+    # Plus the intern map, its reverse and its sequence
+    return len(hashes) + 3
+
+
+def _measure(redis: Redis, writer, *args) -> dict:
+    redis.flushdb()
+    _intern_cache.clear()
+    before = _used_memory(redis)
+    keys = writer(redis, *args)
+    after = _used_memory(redis)
+    redis.flushdb()
+    return {"keys": keys, "bytes": after - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default=settings.redis_url)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--resources", type=int, default=5)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    
+    # CacheService writes through the shared client, so point it at the scratch database
+    settings.redis_url = args.redis_url
+    redis = get_redis()
+    if redis.dbsize():
+        raise SystemExit(f"Refusing to run against non-empty database: {args.redis_url}")
+    
+    tenants = _names("org", args.tenants)
+    resources = _names("resource", args.resources)
+    features = _names("feature", args.features)
+    now = datetime.utcnow()
+    
+    legacy = _measure(redis, _write_legacy, tenants, resources, features, now)
+    compact = _measure(redis, _write_compact, tenants, resources, features, now)
+    counters = len(tenants) * len(resources) * len(features) * len(PERIODS)
+    
+    results = {
+        "counters": counters,
+        "legacy": legacy,
+        "compact": compact,
+        "legacy_bytes_per_counter": round(legacy["bytes"] / counters, 1),
+        "compact_bytes_per_counter": round(compact["bytes"] / counters, 1),
+        "reduction": round(1 - compact["bytes"] / legacy["bytes"], 3) if legacy["bytes"] else None
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
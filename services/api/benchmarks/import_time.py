@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Import-time budget for the API.
+
+Imports ``app.main`` in fresh interpreters and reports the median wall time,
+the share spent in the framework libraries themselves and the slowest
+``app`` modules. Exits non-zero when a budget is exceeded, so it can gate CI:
+
+    python -m benchmarks.import_time --app-budget-ms 300 --budget-ms 1000
+
+The app budget covers what this repo controls (its modules, models and route
+registration); the total also depends on the machine and library versions.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Third-party packages the app cannot start without
+BASELINE_IMPORTS = "fastapi, sqlalchemy.orm, pydantic_settings, redis, prometheus_client"
+
+TIMER = "import time; t = time.perf_counter(); import {modules}; print(time.perf_counter() - t)"
+
+
+def _time_import(modules: str, runs: int) -> float:
+    """Median seconds to import modules in a fresh interpreter."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", TIMER.format(modules=modules)], text=True
+        )
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def _slowest_app_modules(limit: int) -> list:
+    """Cumulative import time of the slowest app modules, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if name == "app" or name.startswith("app."):
+            try:
+                modules.append((int(cumulative) / 1000, name))
+            except ValueError:
+                continue
+    return sorted(modules, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="Budget for importing app.main")
+    parser.add_argument(
+        "--app-budget-ms",
+        type=float,
+        default=300,
+        help="Budget for app.main beyond importing the framework libraries"
+    )
+    args = parser.parse_args()
+    
+    # Importing the app must not need a reachable database or Redis
+    os.environ.setdefault("DATABASE_URL", "postgresql://budget@127.0.0.1:1/budget")
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+    
+    baseline_ms = _time_import(BASELINE_IMPORTS, args.runs) * 1000
+    total_ms = _time_import("app.main", args.runs) * 1000
+    app_ms = max(0.0, total_ms - baseline_ms)
+    
+    budget = f" (budget {args.budget_ms:.0f} ms)" if args.budget_ms else ""
+    print(f"import app.main:     {total_ms:8.1f} ms{budget}")
+    print(f"  framework imports: {baseline_ms:8.1f} ms")
+    print(f"  app modules:       {app_ms:8.1f} ms (budget {args.app_budget_ms:.0f} ms)")
+    print("Slowest app modules (cumulative, single run):")
+    for elapsed, name in _slowest_app_modules(10):
+        print(f"  {elapsed:8.1f} ms  {name}")
+    
+    over_total = args.budget_ms is not None and total_ms > args.budget_ms
+    if over_total or app_ms > args.app_budget_ms:
+        print("Import-time budget exceeded", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""End-to-end ingest and query benchmark.
+
+Drives ``/events`` (ingest and list), ``/events/batch`` (JSON rows and gzip
+columnar), ``/validate`` and ``/aggregates`` in-process through the ASGI app
+at a configurable concurrency and reports throughput, p50/p99 latency and
+database/Redis round trips per request.
+
+Against the configured Postgres and Redis (``DATABASE_URL``/``REDIS_URL``):
+
+    python -m benchmarks.ingest_query --output results/$(git rev-parse --short HEAD).json
+
+Self-contained, on SQLite and fakeredis (``pip install fakeredis[lua]``):
+
+    python -m benchmarks.ingest_query --backend sqlite
+
+Compare two runs with ``--compare old.json``.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+API_KEY = "bench_key_00000000"
+SCENARIOS = ["events", "events_batch", "events_columnar", "validate", "events_list", "aggregates"]
+TENANTS = [f"bench_org_{i:03d}" for i in range(10)]
+FEATURES = ["api_call", "pdf_export", "invoice_generate", "data_export"]
+
+
+class RoundTrips:
+    """Counts database statements and Redis round trips."""
+    
+    def __init__(self):
+        self.db = 0
+        self.redis = 0
+    
+    def reset(self):
+        self.db = 0
+        self.redis = 0
+
+
+def _setup_sqlite(path: str):
+    """Point the app at a SQLite file and fakeredis before it is imported."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    if os.path.exists(path):
+        os.remove(path)
+    
+    from sqlalchemy.dialects.postgresql import JSONB, UUID
+    from sqlalchemy.ext.compiler import compiles
+    
+    @compiles(JSONB, "sqlite")
+    def _compile_jsonb(type_, compiler, **kw):
+        return "JSON"
+    
+    @compiles(UUID, "sqlite")
+    def _compile_uuid(type_, compiler, **kw):
+        return "CHAR(32)"
+    
+    import fakeredis
+    import fakeredis.aioredis
+    import app.core.redis as core_redis
+    server = fakeredis.FakeServer()
+    core_redis.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    core_redis.async_redis_client = fakeredis.aioredis.FakeRedis(
+        server=server, decode_responses=True
+    )
+
+
+def _instrument(trips: RoundTrips, engine):
+    """Count SQL statements on the engine and Redis commands/pipelines."""
+    from sqlalchemy import event
+    from app.core.redis import get_redis, get_async_redis
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(*args, **kwargs):
+        trips.db += 1
+    
+    client = get_redis()
+    execute_command = client.execute_command
+    make_pipeline = client.pipeline
+    
+    def counting_execute_command(*args, **kwargs):
+        trips.redis += 1
+        return execute_command(*args, **kwargs)
+    
+    def counting_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+        
+        def counting_execute(*a, **kw):
+            trips.redis += 1
+            return execute(*a, **kw)
+        
+        pipe.execute = counting_execute
+        return pipe
+    
+    client.execute_command = counting_execute_command
+    client.pipeline = counting_pipeline
+    
+    async_client = asyncio.run(get_async_redis())
+    async_execute_command = async_client.execute_command
+    make_async_pipeline = async_client.pipeline
+    
+    async def counting_async_execute_command(*args, **kwargs):
+        trips.redis += 1
+        return await async_execute_command(*args, **kwargs)
+    
+    def counting_async_pipeline(*args, **kwargs):
+        pipe = make_async_pipeline(*args, **kwargs)
+        execute = pipe.execute
+        
+        async def counting_execute(*a, **kw):
+            trips.redis += 1
+            return await execute(*a, **kw)
+        
+        pipe.execute = counting_execute
+        return pipe
+    
+    async_client.execute_command = counting_async_execute_command
+    async_client.pipeline = counting_async_pipeline
+
+
+def _seed(session_factory):
+    """Create the benchmark API key and quotas."""
+    from app.core.security import hash_api_key
+    from app.models.database import MeteringAPIKey, MeteringQuota
+    
+    db = session_factory()
+    try:
+        key_hash = hash_api_key(API_KEY)
+        if not db.query(MeteringAPIKey).filter(MeteringAPIKey.key_hash == key_hash).first():
+            db.add(MeteringAPIKey(key_hash=key_hash, name="Benchmark Key", is_active=True))
+        for tenant_id in TENANTS:
+            for feature in FEATURES:
+                db.add(MeteringQuota(
+                    tenant_id=tenant_id,
+                    resource="bench",
+                    feature=feature,
+                    limit_value=10_000_000,
+                    period="daily"
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _event(i: int) -> dict:
+    return {
+        "tenant_id": TENANTS[i % len(TENANTS)],
+        "resource": "bench",
+        "feature": FEATURES[i % len(FEATURES)],
+        "quantity": 1,
+        "metadata": {"request_id": i}
+    }
+
+
+def _columnar(events: list) -> bytes:
+    """Encode events as a gzip-compressed columnar batch."""
+    dictionaries = {"tenant_id": {}, "resource": {}, "feature": {}}
+    columns = {"tenant_id": [], "resource": [], "feature": []}
+    for event in events:
+        for field, dictionary in dictionaries.items():
+            columns[field].append(dictionary.setdefault(event[field], len(dictionary)))
+    payload = {
+        "tenants": list(dictionaries["tenant_id"]),
+        "resources": list(dictionaries["resource"]),
+        "features": list(dictionaries["feature"]),
+        "tenant_idx": columns["tenant_id"],
+        "resource_idx": columns["resource"],
+        "feature_idx": columns["feature"],
+        "quantities": [event["quantity"] for event in events],
+        "timestamps": [int(time.time() * 1000)] * len(events)
+    }
+    return gzip.compress(json.dumps(payload).encode(), compresslevel=5)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _run_scenario(client, trips, name, make_request, requests, concurrency, events_per_request=1):
+    """Issue requests at the given concurrency and summarize them."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+    
+    trips.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "events_per_sec": round((requests - errors) * events_per_request / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "db_queries_per_request": round(trips.db / requests, 2),
+        "redis_round_trips_per_request": round(trips.redis / requests, 2)
+    }
+
+
+async def _run(args, app, trips) -> dict:
+    import httpx
+    
+    headers = {"X-API-Key": API_KEY}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    now = datetime.utcnow()
+    
+    async def post_event(client, i):
+        return await client.post("/v1/meter/events", json=_event(i))
+    
+    async def post_batch(client, i):
+        events = [_event(i * args.batch_size + j) for j in range(args.batch_size)]
+        return await client.post("/v1/meter/events/batch", json={"events": events})
+    
+    async def post_columnar(client, i):
+        events = [_event(i * args.batch_size + j) for j in range(args.batch_size)]
+        return await client.post(
+            "/v1/meter/events/batch",
+            content=_columnar(events),
+            headers={
+                "Content-Type": "application/vnd.metering.columnar+json",
+                "Content-Encoding": "gzip"
+            }
+        )
+    
+    async def validate(client, i):
+        event = _event(i)
+        return await client.post("/v1/meter/validate", json={
+            "tenant_id": event["tenant_id"],
+            "resource": event["resource"],
+            "feature": event["feature"],
+            "quantity": 1,
+            "period": "daily"
+        })
+    
+    async def list_events(client, i):
+        return await client.get("/v1/meter/events", params={
+            "tenant_id": TENANTS[i % len(TENANTS)],
+            "page_size": 100
+        })
+    
+    async def aggregates(client, i):
+        return await client.get("/v1/meter/aggregates", params={
+            "window_type": "hourly",
+            "tenant_id": TENANTS[i % len(TENANTS)],
+            "start_date": (now - timedelta(hours=2)).isoformat(),
+            "end_date": (now + timedelta(hours=1)).isoformat()
+        })
+    
+    scenarios = {
+        "events": (post_event, args.requests, 1),
+        "events_batch": (post_batch, max(1, args.requests // 10), args.batch_size),
+        "events_columnar": (post_columnar, max(1, args.requests // 10), args.batch_size),
+        "validate": (validate, args.requests, 1),
+        "events_list": (list_events, max(1, args.requests // 10), 1),
+        "aggregates": (aggregates, max(1, args.requests // 10), 1)
+    }
+    
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for name in args.scenarios:
+            make_request, requests, events_per_request = scenarios[name]
+            results[name] = await _run_scenario(
+                client, trips, name, make_request, requests, args.concurrency, events_per_request
+            )
+            print(f"{name:>14}: {json.dumps(results[name])}", file=sys.stderr)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def _compare(old: dict, new: dict):
+    """Print throughput and p99 changes between two result files."""
+    print(f"Comparing {old.get('commit')} -> {new.get('commit')}")
+    for name, result in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        throughput = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p99 = (result["p99_ms"] / before["p99_ms"] - 1) * 100 if before["p99_ms"] else 0.0
+        print(f"{name:>14}: throughput {throughput:+.1f}%  p99 {p99:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest and query benchmark")
+    parser.add_argument("--backend", choices=["configured", "sqlite"], default="configured")
+    parser.add_argument("--sqlite-path", default="bench.db")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="In-flight requests (default 16; 1 on SQLite, which serializes writers)"
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=SCENARIOS
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+    
+    if args.concurrency is None:
+        args.concurrency = 1 if args.backend == "sqlite" else 16
+    if args.backend == "sqlite":
+        _setup_sqlite(args.sqlite_path)
+    
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base, create_session, get_db, get_engine, get_read_db
+    from app.main import app
+    
+    session_factory = create_session
+    bench_engine = get_engine()
+    if args.backend == "sqlite":
+        # Sessions are created in the threadpool and used on the event loop
+        bench_engine = create_engine(
+            os.environ["DATABASE_URL"], connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=bench_engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+        
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+    
+    trips = RoundTrips()
+    _seed(session_factory)
+    _instrument(trips, bench_engine)
+    
+    results = {
+        "commit": _git_commit(),
+        "backend": args.backend,
+        "created_at": datetime.utcnow().isoformat(),
+        "batch_size": args.batch_size,
+        "scenarios": asyncio.run(_run(args, app, trips))
+    }
+    
+    print(json.dumps(results, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            _compare(json.load(fh), results)
+
+
+if __name__ == "__main__":
+    main()
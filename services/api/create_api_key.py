@@ -9,7 +9,7 @@ from sqlalchemy.orm import sessionmaker
 from app.models.database import MeteringAPIKey
 from app.config import settings
 
-def create_api_key(api_key: str, name: str = "Development Key"):
+def create_api_key(api_key: str, name: str = "Development Key", admin: bool = False):
     """Create an API key in the database."""
     # Hash the key
     key_hash = hashlib.sha256(api_key.encode()).hexdigest()
@@ -35,7 +35,8 @@ def create_api_key(api_key: str, name: str = "Development Key"):
         key_hash=key_hash,
         name=name,
         is_active=True,
-        created_at=datetime.utcnow()
+        created_at=datetime.utcnow(),
+        key_metadata={"admin": True} if admin else None
     )
     
     session.add(api_key_obj)
@@ -46,6 +47,7 @@ def create_api_key(api_key: str, name: str = "Development Key"):
     print("=" * 60)
     print(f"API Key: {api_key}")
     print(f"Name: {name}")
+    print(f"Admin: {admin}")
     print(f"\nUse this in your requests:")
     print(f"  Header: X-API-Key: {api_key}")
     print(f"\nOr set in .env file:")
@@ -55,16 +57,18 @@ def create_api_key(api_key: str, name: str = "Development Key"):
     session.close()
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        api_key = sys.argv[1]
-        name = sys.argv[2] if len(sys.argv) > 2 else "Development Key"
+    admin = "--admin" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--admin"]
+    if args:
+        api_key = args[0]
+        name = args[1] if len(args) > 1 else "Development Key"
     else:
         # Default development key
         api_key = "dev_key_12345"
         name = "Development Key"
         print("Using default API key. You can specify custom key:")
-        print("  python3 create_api_key.py <your_key> [name]")
+        print("  python3 create_api_key.py <your_key> [name] [--admin]")
         print()
     
-    create_api_key(api_key, name)
+    create_api_key(api_key, name, admin)
 
@@ -10,6 +10,7 @@ from app.models.database import MeteringEvent, MeteringQuota, MeteringAPIKey
 from app.core.redis import get_redis
 from app.config import settings
 from app.services.cache_service import CacheService
+from app.services.event_service import COUNTER_PERIODS
 
 def seed_data():
     """Seed sample data into database and Redis."""
@@ -114,15 +115,14 @@ def seed_data():
                         events_created += 1
                         
                         # Update Redis counters
-                        for period in ["hourly", "daily", "monthly"]:
-                            cache_service.increment_counter(
-                                tenant_id,
-                                resource,
-                                feature,
-                                period,
-                                event_timestamp,
-                                quantity
-                            )
+                        cache_service.increment_counters(
+                            tenant_id,
+                            resource,
+                            feature,
+                            COUNTER_PERIODS,
+                            event_timestamp,
+                            quantity
+                        )
     
     session.commit()
     print(f"✅ Created {events_created} sample events")
@@ -150,15 +150,14 @@ def seed_data():
         recent_events += 1
         
         # Update Redis counters
-        for period in ["hourly", "daily", "monthly"]:
-            cache_service.increment_counter(
-                tenant_id,
-                resource,
-                feature,
-                period,
-                event.timestamp,
-                1
-            )
+        cache_service.increment_counters(
+            tenant_id,
+            resource,
+            feature,
+            COUNTER_PERIODS,
+            event.timestamp,
+            1
+        )
     
     session.commit()
     print(f"✅ Created {recent_events} recent events")
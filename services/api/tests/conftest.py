@@ -1,14 +1,32 @@
 """Pytest configuration and fixtures."""
 
+import fakeredis
 import pytest
+from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
+from app.core import redis as redis_module
 from app.core.database import Base, get_db
 from app.main import app
+from app.services import cache_service
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite:///./test.db"
 
+
+# SQLite stand-ins for the Postgres column types
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,6 +53,24 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
-    yield app.test_client()
+    yield TestClient(app)
     app.dependency_overrides.clear()
 
+
+@pytest.fixture
+def redis(monkeypatch):
+    """Point the sync and async Redis clients at one in-memory server."""
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(redis_module, "redis_client", client)
+    monkeypatch.setattr(
+        redis_module,
+        "async_redis_client",
+        fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    )
+    # Interned ids and expiry markers belong to the server they came from
+    cache_service._intern_cache.clear()
+    cache_service._expiry_set.clear()
+    yield client
+    cache_service._intern_cache.clear()
+    cache_service._expiry_set.clear()
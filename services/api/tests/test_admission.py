@@ -0,0 +1,196 @@
+"""Tests for admission control."""
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.config import settings
+from app.core.admission import AdmissionController, PRIORITY_INGEST, PRIORITY_VALIDATE, admission
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Two in-flight slots, a short queue and a short queue timeout."""
+    monkeypatch.setattr(settings, "admission_max_in_flight", 2)
+    monkeypatch.setattr(settings, "admission_per_key_limit", 0)
+    monkeypatch.setattr(settings, "admission_max_queue", 3)
+    monkeypatch.setattr(settings, "admission_queue_timeout_ms", 50)
+    monkeypatch.setattr(settings, "admission_retry_after_seconds", 7)
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_capacity_without_queueing(limits):
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("b", PRIORITY_INGEST)
+    
+    assert controller.in_flight == 2
+    assert controller.waiters == []
+    assert controller.per_key == {"a": 1, "b": 1}
+
+
+@pytest.mark.asyncio
+async def test_release_hands_slot_to_highest_priority_waiter(limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_queue_timeout_ms", 5000)
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    
+    admitted = []
+    
+    async def wait(key, priority):
+        await controller.acquire(key, priority)
+        admitted.append(key)
+    
+    ingest = asyncio.create_task(wait("ingest", PRIORITY_INGEST))
+    await asyncio.sleep(0)
+    validate = asyncio.create_task(wait("validate", PRIORITY_VALIDATE))
+    await asyncio.sleep(0)
+    assert len(controller.waiters) == 2
+    
+    controller.release("a")
+    await asyncio.sleep(0.01)
+    # Validation queued later but goes first; the slot moved without being freed
+    assert admitted == ["validate"]
+    assert controller.in_flight == 2
+    
+    controller.release("a")
+    await asyncio.gather(ingest, validate)
+    assert admitted == ["validate", "ingest"]
+    assert controller.in_flight == 2
+    
+    controller.release("validate")
+    controller.release("ingest")
+    assert controller.in_flight == 0
+    assert controller.per_key == {}
+
+
+@pytest.mark.asyncio
+async def test_new_request_queues_behind_waiters_even_with_free_slot(limits):
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    waiter = asyncio.create_task(controller.acquire("b", PRIORITY_VALIDATE))
+    await asyncio.sleep(0)
+    
+    controller.in_flight -= 1  # A slot frees up without a handoff
+    late = asyncio.create_task(controller.acquire("c", PRIORITY_VALIDATE))
+    await asyncio.sleep(0)
+    assert len(controller.waiters) == 2
+    
+    controller.release("a")
+    await waiter
+    assert not late.done()
+    late.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await late
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_with_503_and_forgets_waiter(limits):
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await controller.acquire("b", PRIORITY_VALIDATE)
+    
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "7"}
+    assert controller.waiters == []
+    assert "b" not in controller.per_key
+    
+    # The timed-out waiter no longer takes released slots
+    controller.release("a")
+    assert controller.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately(limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_queue", 1)
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    waiter = asyncio.create_task(controller.acquire("b", PRIORITY_INGEST))
+    await asyncio.sleep(0)
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await controller.acquire("c", PRIORITY_VALIDATE)
+    assert exc_info.value.status_code == 503
+    assert "c" not in controller.per_key
+    
+    controller.release("a")
+    await waiter
+
+
+@pytest.mark.asyncio
+async def test_per_key_limit_rejects_with_429(limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_per_key_limit", 1)
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await controller.acquire("a", PRIORITY_INGEST)
+    assert exc_info.value.status_code == 429
+    assert controller.per_key == {"a": 1}
+    
+    # Other keys are unaffected
+    await controller.acquire("b", PRIORITY_INGEST)
+    assert controller.in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_on_handed_over_slot(limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_queue_timeout_ms", 5000)
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    first = asyncio.create_task(controller.acquire("b", PRIORITY_VALIDATE))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(controller.acquire("c", PRIORITY_INGEST))
+    await asyncio.sleep(0)
+    
+    # The slot is handed to the first waiter, which goes away before running
+    controller.release("a")
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    
+    await second
+    assert controller.in_flight == 2
+    assert controller.waiters == []
+    assert controller.per_key == {"a": 1, "c": 1}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue(limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_queue_timeout_ms", 5000)
+    controller = AdmissionController()
+    await controller.acquire("a", PRIORITY_INGEST)
+    await controller.acquire("a", PRIORITY_INGEST)
+    waiter = asyncio.create_task(controller.acquire("b", PRIORITY_INGEST))
+    await asyncio.sleep(0)
+    
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert controller.waiters == []
+    assert "b" not in controller.per_key
+    
+    controller.release("a")
+    controller.release("a")
+    assert controller.in_flight == 0
+
+
+def test_overloaded_endpoint_rejects_before_authentication(client, limits, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_queue", 0)
+    monkeypatch.setattr(admission, "in_flight", 2)
+    
+    response = client.post(
+        "/v1/meter/events",
+        json={"tenant_id": "t", "resource": "r", "feature": "f"},
+        headers={"X-API-Key": "not-a-key"}
+    )
+    
+    # 503 rather than 401: the key was never looked up
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
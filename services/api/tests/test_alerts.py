@@ -0,0 +1,98 @@
+"""Tests for quota alert publishing."""
+
+import uuid
+import pytest
+from datetime import datetime
+from app.models.database import MeteringQuota
+from app.models.schemas import EventCreate
+from app.services import alert_service
+from app.services.cache_service import ALERTS_STREAM_KEY, AsyncCacheService, CacheService
+from app.services.event_service import EventService
+
+ALERT = {
+    "tenant_id": "acme",
+    "resource": "api",
+    "feature": "search",
+    "period": "monthly",
+    "window_start": "2026-01-01T00:00:00",
+    "level": "limit",
+    "usage": 100
+}
+
+
+def test_alert_is_published_once_per_window_and_level(redis):
+    assert CacheService.publish_alert(ALERT, 60)
+    assert not CacheService.publish_alert(ALERT, 60)
+    assert CacheService.publish_alert({**ALERT, "level": "threshold"}, 60)
+    
+    entries = redis.xrange(ALERTS_STREAM_KEY)
+    assert [fields["level"] for _, fields in entries] == ["limit", "threshold"]
+    assert entries[0][1]["usage"] == "100"
+
+
+@pytest.mark.asyncio
+async def test_async_publish_shares_dedupe_with_sync(redis):
+    assert await AsyncCacheService.publish_alert(ALERT, 60)
+    assert not CacheService.publish_alert(ALERT, 60)
+    assert redis.xlen(ALERTS_STREAM_KEY) == 1
+
+
+def test_failed_publish_does_not_mark_alert_sent(redis):
+    # A stream key of the wrong type makes XADD fail inside the script
+    redis.set(ALERTS_STREAM_KEY, "not a stream")
+    with pytest.raises(Exception):
+        CacheService.publish_alert(ALERT, 60)
+    
+    redis.delete(ALERTS_STREAM_KEY)
+    assert CacheService.publish_alert(ALERT, 60)
+    assert redis.xlen(ALERTS_STREAM_KEY) == 1
+
+
+@pytest.fixture
+def yearly_quota(db):
+    db.add(MeteringQuota(
+        tenant_id="acme", resource="api", feature="search",
+        limit_value=10, period="yearly", alert_threshold=80
+    ))
+    db.commit()
+    alert_service._quota_cache.clear()
+    yield
+    alert_service._quota_cache.clear()
+
+
+def _event(quantity: int, timestamp: datetime) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "tenant_id": "acme",
+        "resource": "api",
+        "feature": "search",
+        "quantity": quantity,
+        "timestamp": timestamp,
+        "event_metadata": None
+    }
+
+
+@pytest.mark.asyncio
+async def test_yearly_quota_crossings_alert_from_batches(db, redis, yearly_quota):
+    now = datetime.utcnow()
+    service = EventService(db)
+    await service.write_batch([_event(3, now), _event(4, now)], now)
+    assert redis.xlen(ALERTS_STREAM_KEY) == 0
+    
+    await service.write_batch([_event(5, now)], now)
+    
+    alerts = [fields for _, fields in redis.xrange(ALERTS_STREAM_KEY)]
+    assert sorted(alert["level"] for alert in alerts) == ["limit", "threshold"]
+    assert {alert["period"] for alert in alerts} == {"yearly"}
+    assert {alert["usage"] for alert in alerts} == {"12"}
+
+
+@pytest.mark.asyncio
+async def test_yearly_quota_crossings_alert_from_single_events(db, redis, yearly_quota):
+    service = EventService(db)
+    for _ in range(2):
+        await service.ingest_event(EventCreate(tenant_id="acme", resource="api", feature="search", quantity=5))
+    
+    alerts = [fields for _, fields in redis.xrange(ALERTS_STREAM_KEY)]
+    assert sorted(alert["level"] for alert in alerts) == ["limit", "threshold"]
+    assert CacheService.get_counter("acme", "api", "search", "yearly", datetime.utcnow()) == 10
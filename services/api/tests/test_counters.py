@@ -0,0 +1,84 @@
+"""Tests for the compact Redis counter layout."""
+
+import pytest
+from datetime import datetime
+from app.config import settings
+from app.services import cache_service
+from app.services.cache_service import ACTIVE_COUNTERS_KEY, CacheService
+
+COUNTER = ("acme", "api", "search")
+
+
+@pytest.fixture
+def hash_layout(monkeypatch):
+    monkeypatch.setattr(settings, "counter_layout", "hash")
+
+
+def _now() -> datetime:
+    return datetime.utcnow().replace(minute=30, second=0, microsecond=0)
+
+
+def test_names_are_interned_once(redis):
+    first = CacheService.intern("acme")
+    cache_service._intern_cache.clear()
+    
+    assert CacheService.intern("acme") == first
+    assert CacheService.intern("globex") != first
+    assert CacheService.resolve_interned([first, "zz"]) == ["acme", None]
+
+
+def test_counters_share_one_hash_per_tenant_window(redis, hash_layout):
+    timestamp = _now()
+    CacheService.increment_counter_batch([
+        ("acme", "api", "search", "hourly", timestamp, 2),
+        ("acme", "api", "export", "hourly", timestamp, 3),
+    ])
+    
+    key, _ = CacheService.get_counter_location(*COUNTER, "hourly", timestamp)
+    assert key.startswith("mc:")
+    assert CacheService.parse_counter_key(key) == (
+        CacheService.intern("acme"), "hourly", timestamp.replace(minute=0)
+    )
+    assert len(redis.hgetall(key)) == 2
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 2
+
+
+def test_dual_layout_reads_sum_of_both_layouts(redis, monkeypatch):
+    monkeypatch.setattr(settings, "counter_layout", "dual")
+    timestamp = _now()
+    redis.set(CacheService.get_counter_key(*COUNTER, "hourly", timestamp), 4)
+    
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 3)
+    
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 7
+    assert CacheService.get_counter("acme", "api", "other", "hourly", timestamp) is None
+
+
+def test_increment_sets_expiry_once_per_hash(redis, hash_layout):
+    timestamp = _now()
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 2)
+    key, _ = CacheService.get_counter_location(*COUNTER, "hourly", timestamp)
+    redis.persist(key)
+    
+    assert CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 3) == [5]
+    # Already expiring: the second increment does not re-apply the TTL
+    assert redis.ttl(key) == -1
+    assert redis.sismember(ACTIVE_COUNTERS_KEY, key)
+
+
+def test_failed_increment_leaves_expiry_for_retry(redis, hash_layout, monkeypatch):
+    timestamp = _now()
+    key, _ = CacheService.get_counter_location(*COUNTER, "hourly", timestamp)
+    
+    def fail(self):
+        raise ConnectionError("redis went away")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(type(redis.pipeline()), "execute", fail)
+        with pytest.raises(ConnectionError):
+            CacheService.increment_counters(*COUNTER, ["hourly"], timestamp)
+    assert key not in cache_service._expiry_set
+    
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp)
+    assert redis.ttl(key) > 0
+    assert key in cache_service._expiry_set
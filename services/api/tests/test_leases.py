@@ -0,0 +1,42 @@
+"""Tests for quota lease reservations."""
+
+import time
+from app.services.cache_service import CacheService
+
+COUNTER = ("acme", "api", "search", "monthly")
+
+
+def test_reserve_grants_what_is_left(redis):
+    assert CacheService.reserve_lease(*COUNTER, "l1", 60, 100, 60) == 60
+    assert CacheService.reserve_lease(*COUNTER, "l2", 60, 100, 60) == 40
+    assert CacheService.reserve_lease(*COUNTER, "l3", 60, 100, 60) == 0
+    
+    expiry_key, amounts_key = CacheService.get_lease_keys(*COUNTER)
+    assert redis.hgetall(amounts_key) == {"l1": "60", "l2": "40"}
+    assert redis.zcard(expiry_key) == 2
+    assert redis.ttl(amounts_key) > 0
+
+
+def test_release_returns_units(redis):
+    CacheService.reserve_lease(*COUNTER, "l1", 60, 100, 60)
+    
+    assert CacheService.release_lease(*COUNTER, "l1") == 60
+    assert CacheService.release_lease(*COUNTER, "l1") == 0
+    assert CacheService.reserve_lease(*COUNTER, "l2", 100, 100, 60) == 100
+
+
+def test_reserve_drops_expired_leases(redis):
+    expiry_key, amounts_key = CacheService.get_lease_keys(*COUNTER)
+    redis.zadd(expiry_key, {"stale": time.time() - 1})
+    redis.hset(amounts_key, "stale", 80)
+    
+    assert CacheService.reserve_lease(*COUNTER, "l1", 60, 100, 60) == 60
+    assert redis.hgetall(amounts_key) == {"l1": "60"}
+    assert redis.zrange(expiry_key, 0, -1) == ["l1"]
+
+
+def test_leases_are_per_counter(redis):
+    CacheService.reserve_lease(*COUNTER, "l1", 100, 100, 60)
+    
+    assert CacheService.reserve_lease("acme", "api", "export", "monthly", "l2", 10, 100, 60) == 10
+    assert CacheService.reserve_lease("acme", "api", "search", "daily", "l3", 10, 100, 60) == 10
@@ -0,0 +1,83 @@
+"""Tests for batch quota validation."""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from app.models.database import MeteringEvent, MeteringQuota
+from app.models.schemas import QuotaBatchValidationRequest, QuotaValidationRequest
+from app.services.cache_service import CacheService
+from app.services.quota_service import QuotaService
+
+
+def _quota(feature: str, limit_value: int, period: str) -> MeteringQuota:
+    return MeteringQuota(
+        tenant_id="acme", resource="api", feature=feature,
+        limit_value=limit_value, period=period, alert_threshold=80
+    )
+
+
+def _check(feature: str, period: str, quantity: int = 1) -> QuotaValidationRequest:
+    return QuotaValidationRequest(
+        tenant_id="acme", resource="api", feature=feature, quantity=quantity, period=period
+    )
+
+
+@pytest.fixture
+def usage(db):
+    """Quotas on three features, with usage stored but no counters in Redis."""
+    db.add_all([
+        _quota("search", 10, "daily"),
+        _quota("export", 5, "monthly"),
+        _quota("import", 100, "hourly"),
+    ])
+    now = datetime.utcnow()
+    for feature, quantity in [("search", 4), ("search", 5), ("export", 5)]:
+        db.add(MeteringEvent(
+            tenant_id="acme", resource="api", feature=feature, quantity=quantity, timestamp=now
+        ))
+    db.commit()
+    return now
+
+
+@pytest.fixture
+def event_queries(db):
+    """Statements reading metering_events run during the test."""
+    statements = []
+    
+    def record(conn, cursor, statement, *args):
+        if "FROM metering_events" in statement:
+            statements.append(statement)
+    
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    yield statements
+    event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_cold_batch_fills_missing_counters_with_one_query(db, redis, usage, event_queries):
+    result = await QuotaService(db).validate_quota_batch(QuotaBatchValidationRequest(requests=[
+        _check("search", "daily"),
+        _check("export", "monthly"),
+        _check("import", "hourly"),
+        _check("search", "daily", quantity=2),
+    ]))
+    
+    assert len(event_queries) == 1
+    assert [r.current_usage for r in result.results] == [9, 5, 0, 9]
+    assert [r.allowed for r in result.results] == [True, False, True, False]
+    # Counters with usage are seeded for the next check
+    assert CacheService.get_counter("acme", "api", "search", "daily", usage) == 9
+    assert CacheService.get_counter("acme", "api", "export", "monthly", usage) == 5
+
+
+@pytest.mark.asyncio
+async def test_warm_batch_reads_counters_only(db, redis, usage, event_queries):
+    service = QuotaService(db)
+    request = QuotaBatchValidationRequest(requests=[_check("search", "daily"), _check("export", "monthly")])
+    await service.validate_quota_batch(request)
+    event_queries.clear()
+    
+    result = await service.validate_quota_batch(request)
+    
+    assert event_queries == []
+    assert [r.current_usage for r in result.results] == [9, 5]
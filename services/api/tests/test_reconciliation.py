@@ -0,0 +1,112 @@
+"""Tests for counter reconciliation."""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.models.database import MeteringEvent
+from app.services.cache_service import CacheService
+from app.services.reconciliation_service import ReconciliationService
+
+COUNTER = ("acme", "api", "search")
+KEY = "mc:t:h:2026010100"
+
+
+@pytest.fixture
+def hash_layout(monkeypatch):
+    monkeypatch.setattr(settings, "counter_layout", "hash")
+
+
+def _now() -> datetime:
+    return datetime.utcnow().replace(minute=30, second=0, microsecond=0)
+
+
+def _store(db, quantity: int, timestamp: datetime, created_at: datetime):
+    db.add(MeteringEvent(
+        tenant_id=COUNTER[0],
+        resource=COUNTER[1],
+        feature=COUNTER[2],
+        quantity=quantity,
+        timestamp=timestamp,
+        created_at=created_at
+    ))
+    db.commit()
+
+
+def test_compare_and_set_applies_only_unchanged_fields(redis):
+    redis.hset(KEY, mapping={"a:b": 10, "a:c": 20})
+    
+    applied = CacheService.compare_and_set_counters(
+        KEY, "hourly", [("a:b", 10, 12), ("a:c", 19, 30), ("a:d", 0, 5)]
+    )
+    
+    assert applied == 2
+    assert redis.hgetall(KEY) == {"a:b": "12", "a:c": "20", "a:d": "5"}
+    assert redis.ttl(KEY) > 0
+
+
+def test_compare_and_set_keeps_existing_expiry(redis):
+    redis.hset(KEY, "a:b", 1)
+    redis.expire(KEY, 30)
+    
+    CacheService.compare_and_set_counters(KEY, "hourly", [("a:b", 1, 2)])
+    
+    assert redis.ttl(KEY) <= 30
+
+
+def test_dirty_windows_are_claimed_once(redis):
+    window = ("acme", "hourly", datetime(2026, 1, 1, 10))
+    CacheService.mark_windows_dirty([window, window])
+    
+    assert CacheService.pop_dirty_windows(10) == [window]
+    assert CacheService.pop_dirty_windows(10) == []
+
+
+def test_reconcile_leaves_in_flight_increments_alone(db, redis, hash_layout):
+    timestamp = _now()
+    stored = datetime.now(timezone.utc)
+    _store(db, 10, timestamp, stored - timedelta(hours=1))
+    _store(db, 5, timestamp, stored)
+    # Only the settled event has reached the counter so far
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 10)
+    
+    result = ReconciliationService(db).reconcile_counters()
+    
+    assert result["drifted"] == 0
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 10
+
+
+def test_reconcile_clamps_drifted_counters(db, redis, hash_layout):
+    timestamp = _now()
+    _store(db, 15, timestamp, datetime.now(timezone.utc) - timedelta(hours=1))
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 115)
+    
+    result = ReconciliationService(db).reconcile_counters()
+    
+    assert result["repaired"] == 1
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 15
+
+
+def test_reconcile_restores_lost_counters(db, redis, hash_layout):
+    timestamp = _now()
+    _store(db, 8, timestamp, datetime.now(timezone.utc) - timedelta(hours=1))
+    CacheService.increment_counters("acme", "api", "export", ["hourly"], timestamp, 1)
+    
+    result = ReconciliationService(db).reconcile_counters()
+    
+    assert result["repaired"] == 2
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 8
+    assert CacheService.get_counter("acme", "api", "export", "hourly", timestamp) == 0
+
+
+@pytest.mark.asyncio
+async def test_run_reconciles_counters_and_claims_dirty_windows(db, redis, hash_layout):
+    timestamp = _now()
+    _store(db, 8, timestamp, datetime.now(timezone.utc) - timedelta(hours=1))
+    CacheService.increment_counters(*COUNTER, ["hourly"], timestamp, 3)
+    CacheService.mark_windows_dirty([("acme", "hourly", timestamp - timedelta(hours=2))])
+    
+    result = await ReconciliationService(db).run()
+    
+    assert result["repaired"] == 1
+    assert CacheService.get_counter(*COUNTER, "hourly", timestamp) == 8
+    assert CacheService.pop_dirty_windows(10) == []
@@ -0,0 +1,101 @@
+"""Tests for heavy-hitter error bounds against exact GROUP BY results."""
+
+import random
+import uuid
+import pytest
+from datetime import datetime
+from sqlalchemy import func
+from app.config import settings
+from app.models.database import MeteringEvent
+from app.services.event_service import EventService
+from app.services.top_service import TopService
+from app.utils.time_utils import get_time_window
+
+TENANTS = [f"org_{i:03d}" for i in range(300)]
+FEATURES = [f"feature_{i:02d}" for i in range(80)]
+RESOURCES = ["api", "billing", "storage"]
+CAPACITY = 20
+
+
+def _zipf(values: list, rng: random.Random, count: int) -> list:
+    return rng.choices(values, weights=[1 / rank for rank in range(1, len(values) + 1)], k=count)
+
+
+def _events(now: datetime, rng: random.Random, count: int) -> list:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant,
+            "resource": RESOURCES[FEATURES.index(feature) % len(RESOURCES)],
+            "feature": feature,
+            "quantity": rng.randint(1, 10),
+            "timestamp": now,
+            "event_metadata": None
+        }
+        for tenant, feature in zip(_zipf(TENANTS, rng, count), _zipf(FEATURES, rng, count))
+    ]
+
+
+async def _ingest(db, now: datetime):
+    rng = random.Random(7)
+    service = EventService(db)
+    for _ in range(6):
+        await service.write_batch(_events(now, rng, 500), now)
+
+
+def _exact(db, now: datetime, dimension: str) -> dict:
+    """Exact usage per member in now's hour, by GROUP BY over stored events."""
+    hour_start, hour_end = get_time_window(now, "hourly")
+    if dimension == "tenants":
+        columns = (MeteringEvent.tenant_id,)
+    else:
+        columns = (MeteringEvent.resource, MeteringEvent.feature)
+    rows = db.query(*columns, func.sum(MeteringEvent.quantity)).filter(
+        MeteringEvent.timestamp >= hour_start,
+        MeteringEvent.timestamp <= hour_end
+    ).group_by(*columns).all()
+    return {row[0] if len(columns) == 1 else tuple(row[:-1]): int(row[-1]) for row in rows}
+
+
+def _member(item: dict):
+    return item["tenant_id"] if "tenant_id" in item else (item["resource"], item["feature"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dimension", ["tenants", "features"])
+async def test_top_counts_bound_exact_usage(db, redis, monkeypatch, dimension):
+    monkeypatch.setattr(settings, "top_k_capacity", CAPACITY)
+    now = datetime.utcnow()
+    await _ingest(db, now)
+    exact = _exact(db, now, dimension)
+    
+    top = await TopService().get_top(dimension, "hourly", CAPACITY, now)
+    
+    assert top["total"] == sum(exact.values())
+    # More members than the summary holds, so counts are estimates
+    assert len(exact) > CAPACITY and top["max_error"] > 0
+    assert top["max_error"] <= top["total"] // CAPACITY
+    assert len(top["items"]) == min(CAPACITY, len(exact))
+    reported = set()
+    for item in top["items"]:
+        member = _member(item)
+        reported.add(member)
+        assert item["quantity"] - item["error"] <= exact.get(member, 0) <= item["quantity"]
+        assert item["error"] <= top["max_error"]
+    # Anything not tracked is no larger than the largest possible overestimate
+    for member, untracked in exact.items():
+        if member not in reported:
+            assert untracked <= top["max_error"]
+
+
+@pytest.mark.asyncio
+async def test_top_is_exact_below_capacity(db, redis, monkeypatch):
+    monkeypatch.setattr(settings, "top_k_capacity", CAPACITY)
+    now = datetime.utcnow()
+    await EventService(db).write_batch(_events(now, random.Random(1), 5), now)
+    exact = _exact(db, now, "tenants")
+    
+    top = await TopService().get_top("tenants", "hourly", CAPACITY, now)
+    
+    assert top["max_error"] == 0
+    assert {_member(item): item["quantity"] for item in top["items"]} == exact
@@ -78,6 +78,9 @@ if [ ! -f ".env" ]; then
     echo "⚠️  Please update .env with your database credentials"
 fi
 
+# Apply database migrations
+python3 -m alembic upgrade head
+
 # Start API
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 &
 API_PID=$!